@@ -5,6 +5,8 @@ const API_BASE_URL = 'http://localhost:5001';
 let currentAudioFile = null;
 let currentAudioBase64 = null;
 let currentAudioFormat = null;
+// id do catálogo quando o áudio vem da biblioteca: o servidor lê o arquivo, sem reenviar o base64
+let currentAudioId = null;
 
 // Elementos DOM
 const audioFileInput = document.getElementById('audioFile');
@@ -53,6 +55,7 @@ function handleFileSelect(event) {
     }
 
     currentAudioFile = file;
+    currentAudioId = null;
     fileNameSpan.textContent = file.name;
     
     // Determina o formato do áudio
@@ -100,6 +103,7 @@ function resetFileSelection() {
     currentAudioFile = null;
     currentAudioBase64 = null;
     currentAudioFormat = null;
+    currentAudioId = null;
     fileNameSpan.textContent = 'Escolher arquivo MP3 ou WAV';
     audioPreview.style.display = 'none';
     audioPlayer.src = '';
@@ -110,11 +114,24 @@ function resetFileSelection() {
     audioFileInput.value = '';
 }
 
+/**
+ * Corpo JSON com o áudio atual: o id do catálogo ou o conteúdo em base64
+ */
+function audioRequestBody() {
+    if (currentAudioId) {
+        return { audio_id: currentAudioId };
+    }
+    return {
+        audio_data: currentAudioBase64,
+        audio_format: currentAudioFormat
+    };
+}
+
 /**
  * Manipula as requisições de análise
  */
 async function handleAnalysis(type) {
-    if (!currentAudioBase64) {
+    if (!currentAudioBase64 && !currentAudioId) {
         showAlert('Por favor, selecione um arquivo de áudio primeiro.', 'warning');
         return;
     }
@@ -142,15 +159,18 @@ async function handleAnalysis(type) {
     completeAnalysisBtn.disabled = true;
 
     try {
+        // A análise completa usa streaming: cada etapa aparece assim que fica pronta
+        if (type === 'complete') {
+            await streamCompleteAnalysis();
+            return;
+        }
+
         const response = await fetch(`${API_BASE_URL}${endpoint}`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                audio_data: currentAudioBase64,
-                audio_format: currentAudioFormat
-            })
+            body: JSON.stringify(audioRequestBody())
         });
 
         if (!response.ok) {
@@ -175,6 +195,74 @@ async function handleAnalysis(type) {
     }
 }
 
+/**
+ * Executa a análise completa via Server-Sent Events, exibindo transcrição,
+ * emoção e os tokens da análise conforme chegam do servidor
+ */
+async function streamCompleteAnalysis() {
+    const response = await fetch(`${API_BASE_URL}/analyse-patient-psychological-issue/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(audioRequestBody())
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || `Erro HTTP: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const partial = {};
+    let analysisText = '';
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let dataText = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) dataText += line.slice(6);
+            });
+            const data = dataText ? JSON.parse(dataText) : {};
+
+            if (eventName === 'error') {
+                throw new Error(data.error);
+            }
+            if (eventName === 'result') {
+                displayResult(data, 'complete');
+                return;
+            }
+            if (eventName === 'transcription' || eventName === 'emotion') {
+                partial[eventName] = data[eventName];
+            } else if (eventName === 'token') {
+                analysisText += data.content;
+            }
+
+            loadingDiv.style.display = 'none';
+            resultDiv.style.display = 'block';
+            resultDiv.innerHTML = formatCompleteAnalysisResult(partial);
+            if (analysisText) {
+                const pre = document.createElement('pre');
+                pre.style.whiteSpace = 'pre-wrap';
+                pre.textContent = analysisText;
+                resultDiv.appendChild(pre);
+            }
+        }
+    }
+}
+
 /**
  * Exibe o resultado da análise
  */
@@ -579,7 +667,7 @@ function createAudioItem(audio) {
             Seu navegador não suporta o elemento de áudio.
         </audio>
         <div class="audio-actions">
-            <button class="btn btn-primary btn-small" onclick="selectLibraryAudio('${audio.name}', '${audio.format}')">
+            <button class="btn btn-primary btn-small" onclick="selectLibraryAudio('${audio.name}', '${audio.format}', '${audio.id}')">
                 ✅ Selecionar Áudio
             </button>
         </div>
@@ -638,7 +726,7 @@ function getAudioIcon(filename) {
 /**
  * Seleciona áudio da biblioteca e carrega na seção principal
  */
-async function selectLibraryAudio(filename, format) {
+async function selectLibraryAudio(filename, format, audioId) {
     try {
         // Busca o áudio da API
         const response = await fetch(`${API_BASE_URL}/audio/${encodeURIComponent(filename)}`);
@@ -664,21 +752,15 @@ async function selectLibraryAudio(filename, format) {
         audioPlayer.src = objectURL;
         audioPreview.style.display = 'block';
         
-        // Converte para base64
-        const reader = new FileReader();
-        
-        reader.onload = function(event) {
-            const base64String = event.target.result.split(',')[1];
-            currentAudioBase64 = base64String;
-            
-            // Habilita os botões
-            transcribeBtn.disabled = false;
-            analyseBtn.disabled = false;
-            emotionBtn.disabled = false;
-            completeAnalysisBtn.disabled = false;
-        };
-        
-        reader.readAsDataURL(blob);
+        // Áudios do catálogo são enviados pelo id; o servidor lê o arquivo direto do disco
+        currentAudioId = audioId;
+        currentAudioBase64 = null;
+
+        // Habilita os botões
+        transcribeBtn.disabled = false;
+        analyseBtn.disabled = false;
+        emotionBtn.disabled = false;
+        completeAnalysisBtn.disabled = false;
         
         // Scroll suave para a seção de upload
         const uploadSection = document.querySelector('.upload-section');
@@ -723,6 +805,7 @@ async function analyzeLibraryAudio(filename, type) {
             // Define como áudio atual
             currentAudioBase64 = base64String;
             currentAudioFormat = format;
+            currentAudioId = null;
 
             // Scroll para a seção de resultados
             resultSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
@@ -6,4 +6,20 @@ psycological_analyser = importlib.import_module(".psycological-analyser", packag
 # Export the functions
 analyse_psicological_issue = psycological_analyser.analyse_psicological_issue
 
-__all__ = ["analyse_psicological_issue"]
+from .pipeline import (
+    analyse_patient_audio, analyse_patient_batch, stream_patient_audio, PipelineStageError, PIPELINE_MODES, pipeline_mode,
+)
+from .schema import AnalysisSchemaError, analysis_schema_errors, validate_analysis
+
+__all__ = [
+    "analyse_psicological_issue",
+    "analyse_patient_audio",
+    "analyse_patient_batch",
+    "stream_patient_audio",
+    "PipelineStageError",
+    "PIPELINE_MODES",
+    "pipeline_mode",
+    "AnalysisSchemaError",
+    "analysis_schema_errors",
+    "validate_analysis",
+]
@@ -1,3 +1,28 @@
-from .core import transcribe_audio_file as transcribe_audio, analyse_audio_psicological_issue
+from .core import (
+    transcribe_audio_file as transcribe_audio,
+    analyse_audio_psicological_issue,
+    get_transcription,
+    get_audio_psicological_analysis,
+    stream_audio_psicological_analysis,
+    get_transcription_and_analysis,
+    stream_transcription_and_analysis,
+    transcription_backend,
+    local_transcriber,
+    TRANSCRIPTION_BACKENDS,
+)
+from .local_asr import LocalWhisperTranscriber, WHISPER_SIZES
 
-__all__ = ["transcribe_audio", "analyse_audio_psicological_issue"]
\ No newline at end of file
+__all__ = [
+    "transcribe_audio",
+    "analyse_audio_psicological_issue",
+    "get_transcription",
+    "get_audio_psicological_analysis",
+    "stream_audio_psicological_analysis",
+    "get_transcription_and_analysis",
+    "stream_transcription_and_analysis",
+    "transcription_backend",
+    "local_transcriber",
+    "TRANSCRIPTION_BACKENDS",
+    "LocalWhisperTranscriber",
+    "WHISPER_SIZES",
+]
\ No newline at end of file
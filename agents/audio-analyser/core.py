@@ -1,10 +1,40 @@
+import base64
 import json
+import os
 from flask import jsonify
-from clients.openrouter import get_openrouter_audio_client
+from clients.openrouter import get_openrouter_audio_client, OPENROUTER_AUDIO_MODEL
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from typing import Dict, Any, Union
+from agents.prompts import (
+    AUDIO_ANALYSIS_INPUT, PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS, TRANSCRIPTION, TRANSCRIPTION_AND_ANALYSIS,
+    TRANSCRIPTION_AND_ANALYSIS_INPUT, prompt_version,
+)
+from agents.schema import AnalysisSchemaError, validate_analysis
+from helper import (
+    CatalogAudio, audio_digest, cache_key, result_cache, single_flight, compact_audio, compaction_enabled, compaction_settings,
+    trim_audio_bytes, vad_enabled, vad_settings, llm_call, load_waveform, trim_silence,
+)
+
+from .local_asr import LocalWhisperTranscriber
+
+TRANSCRIPTION_BACKENDS = ("openrouter", "local")
+# torch/transformers and the Whisper checkpoint are only loaded on the first local transcription
+local_transcriber = LocalWhisperTranscriber.from_env()
+
+
+def transcription_backend(backend: str = None) -> str:
+    """
+    Resolve the transcription backend: "openrouter" (the remote audio model) or "local" (Whisper on CPU).
+
+    Raises:
+        ValueError: If the backend, or TRANSCRIPTION_BACKEND when `backend` is None, is not one of TRANSCRIPTION_BACKENDS.
+    """
+    backend = (backend or os.getenv("TRANSCRIPTION_BACKEND", "openrouter")).lower()
+    if backend not in TRANSCRIPTION_BACKENDS:
+        raise ValueError(f"Backend de transcrição inválido: {backend} (use {' ou '.join(TRANSCRIPTION_BACKENDS)})")
+    return backend
 
-from langchain_core.messages import HumanMessage
-from typing import Dict, Any
-from agents.prompts import PSYCOLOGICAL_ANALYSIS
 
 def transcribe_audio(audio_data: str, audio_format: str = "wav") -> Dict[str, Any]:
     """
@@ -15,7 +45,7 @@ def transcribe_audio(audio_data: str, audio_format: str = "wav") -> Dict[str, An
         content=[
             {
                 "type": "text",
-                "text": "Transcribe the audio to text. Transcribe in the same language as the audio."
+                "text": TRANSCRIPTION
             },
             {
                 "type": "input_audio",
@@ -27,7 +57,9 @@ def transcribe_audio(audio_data: str, audio_format: str = "wav") -> Dict[str, An
         ]
     )
     try:
-        response = client.invoke([message])
+        with llm_call(OPENROUTER_AUDIO_MODEL, "llm_transcription") as call:
+            response = client.invoke([message])
+            call.record(response)
         return {"choices": [{"message": {"content": response.content}}]}
     except Exception as e:
         raise Exception(f"Erro ao transcrever áudio: {str(e)}")
@@ -38,11 +70,24 @@ def analyze_audio_content(audio_data: str, audio_format: str = "wav") -> Dict[st
     Analyzes audio content for psychological signals using OpenRouter's GPT-4o Audio Preview model via ChatOpenAI.
     """
     client = get_openrouter_audio_client(temperature=0.1)
-    message = HumanMessage(
+    with llm_call(OPENROUTER_AUDIO_MODEL, "llm_audio_analysis") as call:
+        response = client.invoke(_audio_analysis_messages(audio_data, audio_format))
+        call.record(response)
+    return {"choices": [{"message": {"content": response.content}}]}
+
+
+# whole prompt texts, versioned in the cache keys
+AUDIO_ANALYSIS_PROMPT = PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS + AUDIO_ANALYSIS_INPUT
+TRANSCRIPTION_AND_ANALYSIS_PROMPT = TRANSCRIPTION_AND_ANALYSIS + TRANSCRIPTION_AND_ANALYSIS_INPUT
+
+
+def _audio_analysis_messages(audio_data: str, audio_format: str) -> list:
+    # the instructions go first, in their own message, so every request shares the same cacheable prefix
+    return [SystemMessage(content=PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS), HumanMessage(
         content=[
             {
                 "type": "text",
-                "text": PSYCOLOGICAL_ANALYSIS
+                "text": AUDIO_ANALYSIS_INPUT
             },
             {
                 "type": "input_audio",
@@ -52,34 +97,166 @@ def analyze_audio_content(audio_data: str, audio_format: str = "wav") -> Dict[st
                 }
             }
         ]
+    )]
+
+def _as_base64(audio_data: Union[str, bytes]) -> str:
+    if isinstance(audio_data, (bytes, bytearray)):
+        return base64.b64encode(audio_data).decode("ascii")
+    return audio_data
+
+
+def _cache_key(audio_data: Union[str, bytes], audio_format: str, prompt: str, compact: bool, vad: bool) -> str:
+    # compaction and silence trimming change what the model hears, so their settings are part of the key
+    settings = sorted(compaction_settings().items()) if compact else None
+    trimming = sorted(vad_settings().items()) if vad else None
+    return cache_key(
+        audio_digest(audio_data), audio_format, OPENROUTER_AUDIO_MODEL, prompt_version(prompt), settings, trimming
     )
-    response = client.invoke([message])
-    return {"choices": [{"message": {"content": response.content}}]}
 
-def transcribe_audio_file(audio_data: str, audio_format: str = "wav"):
+
+def _upload_payload(
+    audio_data: Union[str, bytes],
+    audio_format: str,
+    compact: bool,
+    vad: bool = False,
+    compaction_report: Dict[str, Any] = None,
+    vad_report: Dict[str, Any] = None,
+):
+    """
+    Returns the (base64, format) sent to the audio model: silence trimmed and compacted when requested.
+    The reports, when given, are filled with the speech segments and the upload sizes.
+    """
+    if isinstance(audio_data, CatalogAudio):
+        # a file sent as is goes from its memory map to base64; trimming and compaction need the bytes
+        if not vad and not compact:
+            return audio_data.base64(), audio_format
+        audio_data = audio_data.read()
+    if vad:
+        raw = base64.b64decode(audio_data, validate=True) if isinstance(audio_data, str) else audio_data
+        if compact:
+            # compaction resamples the trimmed audio anyway, so trim it at the compaction rate
+            trimmed, report = trim_audio_bytes(raw, audio_format, compaction_settings()["sample_rate"])
+        else:
+            trimmed, report = trim_audio_bytes(raw, audio_format)
+        # uncompacted, the trimmed WAV replaces the original only when it is smaller (a compressed upload often is not)
+        report["trimmed_upload"] = compact or len(trimmed) < len(raw)
+        audio_data, audio_format = (trimmed, "wav") if report["trimmed_upload"] else (raw, audio_format)
+        if vad_report is not None:
+            vad_report.update(report)
+    if not compact:
+        return _as_base64(audio_data), audio_format
+    payload, payload_format, stats = compact_audio(audio_data, audio_format)
+    if compaction_report is not None:
+        compaction_report.update(stats)
+    return payload, payload_format
+
+
+def get_transcription(
+    audio_data: Union[str, bytes],
+    audio_format: str = "wav",
+    compact: bool = None,
+    compaction_report: Dict[str, Any] = None,
+    vad: bool = None,
+    vad_report: Dict[str, Any] = None,
+    backend: str = None,
+) -> str:
     """
-    Transcribes audio file using OpenRouter's GPT-4o Audio Preview model.
+    Transcribes audio and returns only the text, without a Flask response (safe outside a request context).
+    Results are cached by audio content, format, model, prompt version, compaction and VAD settings, and
+    concurrent calls for the same audio and settings share one transcription (single flight).
 
     Args:
-        audio_data (str): Base64 encoded audio data
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
         audio_format (str): Audio format (default: "wav")
+        compact (bool): Downmix, resample and re-encode the audio before uploading it (default: AUDIO_COMPACTION)
+        compaction_report (dict): Filled with the original and uploaded sizes when the audio is compacted
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+        vad_report (dict): Filled with the speech segments and the fraction of audio removed
+        backend (str): "openrouter" or "local" (default: TRANSCRIPTION_BACKEND)
 
     Returns:
-        flask.Response: JSON response with transcribed text
+        str: Transcribed text
     """
-    try:
-        result = transcribe_audio(audio_data, audio_format)
-        
-        # Extract the transcribed text from the response
+    vad = vad_enabled() if vad is None else vad
+    if transcription_backend(backend) == "local":
+        return _get_local_transcription(audio_data, audio_format, vad, vad_report)
+    compact = compaction_enabled() if compact is None else compact
+    key = _cache_key(audio_data, audio_format, TRANSCRIPTION, compact, vad)
+    hit, transcription = result_cache.get("transcription", key)
+    if hit:
+        return transcription
+
+    def compute():
+        result = transcribe_audio(*_upload_payload(audio_data, audio_format, compact, vad, compaction_report, vad_report))
         if 'choices' in result and len(result['choices']) > 0:
             transcription = result['choices'][0]['message']['content']
-        else:
-            transcription = "Não foi possível transcrever o áudio."
-        
-        return jsonify({
+            result_cache.set("transcription", key, transcription)
+            return transcription
+        return "Não foi possível transcrever o áudio."
+
+    return single_flight.do("transcription", key, compute, cache=result_cache)
+
+
+def _get_local_transcription(
+    audio_data: Union[str, bytes], audio_format: str, vad: bool, vad_report: Dict[str, Any] = None
+) -> str:
+    """
+    Transcribes audio with the local Whisper model. The waveform is decoded at the model's rate through
+    helper.load_waveform, so the emotion prediction of the same recording reuses it instead of decoding
+    it again. Nothing is uploaded, so compaction does not apply.
+    """
+    trimming = sorted(vad_settings().items()) if vad else None
+    key = cache_key(
+        audio_digest(audio_data), audio_format, local_transcriber.model_id, local_transcriber.language,
+        local_transcriber.chunk_seconds, trimming,
+    )
+    hit, transcription = result_cache.get("transcription", key)
+    if hit:
+        return transcription
+
+    def compute():
+        sampling_rate = local_transcriber.sampling_rate
+        waveform = load_waveform(audio_data, audio_format, sampling_rate)
+        if vad:
+            waveform, report = trim_silence(waveform, sampling_rate)
+            if vad_report is not None:
+                vad_report.update(report)
+        transcription = local_transcriber.transcribe(waveform)
+        result_cache.set("transcription", key, transcription)
+        return transcription
+
+    return single_flight.do("transcription", key, compute, cache=result_cache)
+
+
+def transcribe_audio_file(
+    audio_data: Union[str, bytes], audio_format: str = "wav", compact: bool = None, vad: bool = None, backend: str = None
+):
+    """
+    Transcribes audio file using OpenRouter's GPT-4o Audio Preview model, or the local Whisper model.
+
+    Args:
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
+        audio_format (str): Audio format (default: "wav")
+        compact (bool): Compact the audio before uploading it (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+        backend (str): "openrouter" or "local" (default: TRANSCRIPTION_BACKEND)
+
+    Returns:
+        flask.Response: JSON response with transcribed text, plus `compaction` and `vad` reports when they ran
+    """
+    try:
+        compaction, trimming = {}, {}
+        transcription = get_transcription(audio_data, audio_format, compact, compaction, vad, trimming, backend)
+
+        response = {
             "transcription": transcription,
             "success": True
-        })
+        }
+        if compaction:
+            response["compaction"] = compaction
+        if trimming:
+            response["vad"] = trimming
+        return jsonify(response)
     
     except Exception as e:
         return jsonify({
@@ -88,40 +265,249 @@ def transcribe_audio_file(audio_data: str, audio_format: str = "wav"):
         }), 500
 
 
-def analyse_audio_psicological_issue(audio_data: str, audio_format: str = "wav"):
+def get_audio_psicological_analysis(
+    audio_data: Union[str, bytes],
+    audio_format: str = "wav",
+    compact: bool = None,
+    compaction_report: Dict[str, Any] = None,
+    vad: bool = None,
+    vad_report: Dict[str, Any] = None,
+) -> Dict[str, Any]:
     """
-    Analyzes audio content for psychological signals using OpenRouter.
+    Analyzes audio content for psychological signals and returns the analysis as a dict.
+
+    Parsed JSON analyses are cached by audio content, format, model, prompt version, compaction and VAD settings,
+    and concurrent calls for the same audio and settings share one analysis (single flight).
 
     Args:
-        audio_data (str): Base64 encoded audio data
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
         audio_format (str): Audio format (default: "wav")
+        compact (bool): Downmix, resample and re-encode the audio before uploading it (default: AUDIO_COMPACTION)
+        compaction_report (dict): Filled with the original and uploaded sizes when the audio is compacted
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+        vad_report (dict): Filled with the speech segments and the fraction of audio removed
 
     Returns:
-        flask.Response: JSON response with psychological analysis
+        dict: Parsed analysis, or `raw_analysis` with a disclaimer when the model did not return valid JSON
     """
-    try:
-        result = analyze_audio_content(audio_data, audio_format)
-        
+    compact = compaction_enabled() if compact is None else compact
+    vad = vad_enabled() if vad is None else vad
+    key = _cache_key(audio_data, audio_format, AUDIO_ANALYSIS_PROMPT, compact, vad)
+    hit, analysis = result_cache.get("audio_analysis", key)
+    if hit:
+        return analysis
+
+    def compute():
+        result = analyze_audio_content(*_upload_payload(audio_data, audio_format, compact, vad, compaction_report, vad_report))
+
         # Extract the analysis from the response
         if 'choices' in result and len(result['choices']) > 0:
             analysis_content = result['choices'][0]['message']['content']
-            
+
             # Try to parse as JSON
             try:
                 analysis = json.loads(analysis_content)
             except json.JSONDecodeError:
                 # If not valid JSON, return as raw text
-                analysis = {
+                return {
                     "raw_analysis": analysis_content,
                     "disclaimer": "Esta é uma análise automática e deve ser revisada por um psicólogo certificado."
                 }
-        else:
-            analysis = {
-                "error": "Não foi possível analisar o conteúdo do áudio.",
-                "disclaimer": "Esta é uma análise automática e deve ser revisada por um psicólogo certificado."
+            result_cache.set("audio_analysis", key, analysis)
+            return analysis
+
+        return {
+            "error": "Não foi possível analisar o conteúdo do áudio.",
+            "disclaimer": "Esta é uma análise automática e deve ser revisada por um psicólogo certificado."
+        }
+
+    return single_flight.do("audio_analysis", key, compute, cache=result_cache)
+
+
+def stream_audio_psicological_analysis(
+    audio_data: Union[str, bytes], audio_format: str = "wav", compact: bool = None, vad: bool = None
+):
+    """
+    Streams the audio psychological analysis as it is generated.
+
+    Yields the text chunks of the answer as they arrive; the generator's return value is the same
+    dict get_audio_psicological_analysis would return. A cached analysis is yielded as a single chunk.
+
+    Args:
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
+        audio_format (str): Audio format (default: "wav")
+        compact (bool): Compact the audio before uploading it (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+    """
+    compact = compaction_enabled() if compact is None else compact
+    vad = vad_enabled() if vad is None else vad
+    key = _cache_key(audio_data, audio_format, AUDIO_ANALYSIS_PROMPT, compact, vad)
+    hit, analysis = result_cache.get("audio_analysis", key)
+    if hit:
+        yield json.dumps(analysis, ensure_ascii=False)
+        return analysis
+
+    client = get_openrouter_audio_client(temperature=0.1)
+    content = []
+    messages = _audio_analysis_messages(*_upload_payload(audio_data, audio_format, compact, vad))
+    with llm_call(OPENROUTER_AUDIO_MODEL, "llm_audio_analysis") as call:
+        for chunk in client.stream(messages):
+            call.record(chunk)
+            if chunk.content:
+                content.append(chunk.content)
+                yield chunk.content
+
+    try:
+        analysis = json.loads("".join(content))
+    except json.JSONDecodeError:
+        return {
+            "raw_analysis": "".join(content),
+            "disclaimer": "Esta é uma análise automática e deve ser revisada por um psicólogo certificado."
+        }
+    result_cache.set("audio_analysis", key, analysis)
+    return analysis
+
+
+def _transcription_and_analysis_messages(audio_data: str, audio_format: str, emotion: str) -> list:
+    return [SystemMessage(content=TRANSCRIPTION_AND_ANALYSIS), HumanMessage(
+        content=[
+            {
+                "type": "text",
+                "text": TRANSCRIPTION_AND_ANALYSIS_INPUT.format(emotion_to_analyse=emotion)
+            },
+            {
+                "type": "input_audio",
+                "input_audio": {
+                    "data": audio_data,
+                    "format": audio_format
+                }
             }
-        
-        return jsonify(analysis)
+        ]
+    )]
+
+
+def _parse_transcription_and_analysis(content: str) -> Dict[str, Any]:
+    try:
+        answer = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise AnalysisSchemaError([f"a resposta não é um JSON válido ({e})"]) from e
+    if not isinstance(answer, dict) or not isinstance(answer.get("transcription"), str):
+        raise AnalysisSchemaError(["campo obrigatório ausente: transcription"])
+    return {"transcription": answer["transcription"], "analysis": validate_analysis(answer.get("analysis"))}
+
+
+def get_transcription_and_analysis(
+    audio_data: Union[str, bytes],
+    audio_format: str,
+    emotion: str,
+    compact: bool = None,
+    compaction_report: Dict[str, Any] = None,
+    vad: bool = None,
+    vad_report: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """
+    Transcribes the audio and analyses it in a single call to the audio model (single-call pipeline mode).
+
+    The emotion predicted locally is injected into the prompt, and the `analysis` of the answer must follow
+    the same schema as the two-call mode (agents.schema). Results are cached by audio content, format, emotion,
+    model, prompt version, compaction and VAD settings, and concurrent identical calls share one model call.
+
+    Args:
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
+        audio_format (str): Audio format
+        emotion (str): Emotion label predicted for the audio
+        compact (bool): Downmix, resample and re-encode the audio before uploading it (default: AUDIO_COMPACTION)
+        compaction_report (dict): Filled with the original and uploaded sizes when the audio is compacted
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+        vad_report (dict): Filled with the speech segments and the fraction of audio removed
+
+    Returns:
+        dict: `transcription` (str) and `analysis` (dict)
+
+    Raises:
+        AnalysisSchemaError: If the answer is not valid JSON or does not follow the schema.
+    """
+    compact = compaction_enabled() if compact is None else compact
+    vad = vad_enabled() if vad is None else vad
+    key = cache_key(_cache_key(audio_data, audio_format, TRANSCRIPTION_AND_ANALYSIS_PROMPT, compact, vad), emotion)
+    hit, answer = result_cache.get("transcription_analysis", key)
+    if hit:
+        return answer
+
+    def compute():
+        messages = _transcription_and_analysis_messages(
+            *_upload_payload(audio_data, audio_format, compact, vad, compaction_report, vad_report), emotion
+        )
+        client = get_openrouter_audio_client(temperature=0.1)
+        with llm_call(OPENROUTER_AUDIO_MODEL, "llm_transcription_analysis") as call:
+            response = client.invoke(messages)
+            call.record(response)
+
+        answer = _parse_transcription_and_analysis(response.content)
+        result_cache.set("transcription_analysis", key, answer)
+        return answer
+
+    return single_flight.do("transcription_analysis", key, compute, cache=result_cache)
+
+
+def stream_transcription_and_analysis(
+    audio_data: Union[str, bytes],
+    audio_format: str,
+    emotion: str,
+    compact: bool = None,
+    compaction_report: Dict[str, Any] = None,
+    vad: bool = None,
+    vad_report: Dict[str, Any] = None,
+):
+    """
+    Streams the single-call transcription and analysis as it is generated.
+
+    Yields the text chunks of the JSON answer as they arrive; the generator's return value is the same
+    dict get_transcription_and_analysis returns. A cached answer is yielded as a single chunk.
+
+    Raises:
+        AnalysisSchemaError: If the answer is not valid JSON or does not follow the schema.
+    """
+    compact = compaction_enabled() if compact is None else compact
+    vad = vad_enabled() if vad is None else vad
+    key = cache_key(_cache_key(audio_data, audio_format, TRANSCRIPTION_AND_ANALYSIS_PROMPT, compact, vad), emotion)
+    hit, answer = result_cache.get("transcription_analysis", key)
+    if hit:
+        yield json.dumps(answer, ensure_ascii=False)
+        return answer
+
+    messages = _transcription_and_analysis_messages(
+        *_upload_payload(audio_data, audio_format, compact, vad, compaction_report, vad_report), emotion
+    )
+    client = get_openrouter_audio_client(temperature=0.1)
+    content = []
+    with llm_call(OPENROUTER_AUDIO_MODEL, "llm_transcription_analysis") as call:
+        for chunk in client.stream(messages):
+            call.record(chunk)
+            if chunk.content:
+                content.append(chunk.content)
+                yield chunk.content
+
+    answer = _parse_transcription_and_analysis("".join(content))
+    result_cache.set("transcription_analysis", key, answer)
+    return answer
+
+
+def analyse_audio_psicological_issue(audio_data: str, audio_format: str = "wav", compact: bool = None, vad: bool = None):
+    """
+    Analyzes audio content for psychological signals using OpenRouter.
+
+    Args:
+        audio_data (str): Base64 encoded audio data
+        audio_format (str): Audio format (default: "wav")
+        compact (bool): Compact the audio before uploading it (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before uploading the audio (default: VAD_ENABLED)
+
+    Returns:
+        flask.Response: JSON response with psychological analysis
+    """
+    try:
+        return jsonify(get_audio_psicological_analysis(audio_data, audio_format, compact, vad=vad))
     
     except Exception as e:
         return jsonify({
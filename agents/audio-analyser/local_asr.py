@@ -0,0 +1,167 @@
+"""Local Whisper speech recognition on CPU, an alternative to transcribing with the remote audio model."""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from helper import timed
+
+# size names accepted by LOCAL_ASR_MODEL besides full HuggingFace checkpoint ids
+WHISPER_SIZES = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large-v3": "openai/whisper-large-v3",
+    "large-v3-turbo": "openai/whisper-large-v3-turbo",
+}
+
+
+class LocalWhisperTranscriber:
+    """
+    Lazy, thread-safe holder of a transformers speech-recognition pipeline running a Whisper checkpoint on CPU.
+
+    Like the emotion model, torch and transformers are only imported on first use. Recordings longer
+    than the model's 30 s input are cut into `chunk_seconds` windows with overlapping strides, which
+    are decoded `batch_size` at a time and merged by the pipeline. Transcriptions run one at a time:
+    a single CPU-bound decode already uses every torch thread, so concurrent ones would only slow
+    each other down.
+
+    Args:
+        model_id: HuggingFace checkpoint of a Whisper-family model, or one of the WHISPER_SIZES names.
+        chunk_seconds: Length of the windows long recordings are cut into.
+        batch_size: Windows decoded per forward pass.
+        language: Spoken language, e.g. "portuguese"; None lets the model detect it.
+    """
+
+    def __init__(self, model_id: str = "small", chunk_seconds: float = 30.0, batch_size: int = 4, language: Optional[str] = None):
+        self.model_id = WHISPER_SIZES.get(model_id, model_id)
+        self.chunk_seconds = chunk_seconds
+        self.batch_size = max(1, batch_size)
+        self.language = language
+        self._lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        self._pipeline = None
+        self._state = "not_loaded"
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._loaded_at: Optional[str] = None
+        self._transcriptions = 0
+        self._audio_seconds = 0.0
+        self._inference_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LocalWhisperTranscriber":
+        """Build a transcriber configured by LOCAL_ASR_MODEL, LOCAL_ASR_CHUNK_SECONDS, LOCAL_ASR_BATCH_SIZE and LOCAL_ASR_LANGUAGE."""
+        return cls(
+            model_id=os.getenv("LOCAL_ASR_MODEL", "small"),
+            chunk_seconds=float(os.getenv("LOCAL_ASR_CHUNK_SECONDS", "30")),
+            batch_size=int(os.getenv("LOCAL_ASR_BATCH_SIZE", "4")),
+            language=os.getenv("LOCAL_ASR_LANGUAGE") or None,
+        )
+
+    def get(self):
+        """Return the speech-recognition pipeline, loading it if needed."""
+        loaded = self._pipeline
+        if loaded is not None:
+            return loaded
+        return self.load()
+
+    def load(self):
+        """Load the pipeline once on the CPU; concurrent callers wait for the same load."""
+        with self._lock:
+            if self._pipeline is not None:
+                return self._pipeline
+
+            self._state = "loading"
+            started = time.perf_counter()
+            try:
+                from transformers import pipeline
+
+                self._pipeline = pipeline("automatic-speech-recognition", model=self.model_id, device="cpu")
+            except Exception as e:
+                self._state = "failed"
+                self._error = str(e)
+                raise
+
+            self._load_seconds = time.perf_counter() - started
+            self._loaded_at = datetime.now().isoformat()
+            self._state = "ready"
+            self._error = None
+            return self._pipeline
+
+    def preload(self, background: bool = True) -> Optional[threading.Thread]:
+        """Load the pipeline ahead of the first transcription, in a daemon thread when `background` is True."""
+        def run():
+            try:
+                self.load()
+            except Exception:
+                # status() already reports the failure; transcriptions will retry the load
+                pass
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="local-asr-preload", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def sampling_rate(self) -> int:
+        """Sampling rate the model expects (loads the pipeline)."""
+        return self.get().feature_extractor.sampling_rate
+
+    def transcribe(self, waveform: np.ndarray) -> str:
+        """
+        Transcribe a mono float32 waveform sampled at `sampling_rate`.
+
+        Args:
+            waveform: Audio to transcribe, of any length.
+
+        Returns:
+            str: The transcribed text.
+        """
+        asr = self.get()
+        sampling_rate = asr.feature_extractor.sampling_rate
+        generate_kwargs = {"task": "transcribe"}
+        if self.language:
+            generate_kwargs["language"] = self.language
+
+        with self._inference_lock, timed("local_asr"):
+            started = time.perf_counter()
+            # cached waveforms are read-only, and torch expects writable arrays
+            result = asr(
+                {"raw": np.array(waveform, dtype=np.float32), "sampling_rate": sampling_rate},
+                chunk_length_s=self.chunk_seconds,
+                batch_size=self.batch_size,
+                generate_kwargs=generate_kwargs,
+            )
+            self._transcriptions += 1
+            self._audio_seconds += len(waveform) / sampling_rate
+            self._inference_seconds += time.perf_counter() - started
+        return result["text"].strip()
+
+    @property
+    def ready(self) -> bool:
+        return self._pipeline is not None
+
+    def status(self) -> Dict[str, Any]:
+        """Return the model, its loading state and the real-time factor of the transcriptions so far."""
+        return {
+            "model_id": self.model_id,
+            "chunk_seconds": self.chunk_seconds,
+            "batch_size": self.batch_size,
+            "language": self.language,
+            "state": self._state,
+            "ready": self.ready,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+            "transcriptions": self._transcriptions,
+            "audio_seconds": round(self._audio_seconds, 1),
+            "real_time_factor": round(self._inference_seconds / self._audio_seconds, 3) if self._audio_seconds else None,
+        }
@@ -1,3 +1,49 @@
-from .core import predict_emotion, predict_emotion_from_base64
+from .core import (
+    predict_emotion,
+    predict_emotion_batch,
+    predict_emotion_from_base64,
+    predict_emotion_from_bytes,
+    predict_emotion_timeline,
+    predict_emotion_timeline_from_base64,
+    predict_emotion_timeline_from_bytes,
+    batcher,
+    model_holder,
+    preload_model,
+    registry,
+    EmotionTimelineTooLongError,
+)
+from .batching import EmotionBatcher, EmotionQueueFullError, EmotionQueueTimeoutError
+from .model_holder import EmotionModelHolder
+from .backends import TorchEmotionBackend, OnnxEmotionBackend, export_onnx, check_parity, extract_features, model_input_name
+from .registry import EmotionModelRegistry, EMOTION_LABELS, KNOWN_EMOTION_MODELS, OTHER_LABEL, normalize_label, parse_models
 
-__all__ = ["predict_emotion", "predict_emotion_from_base64"]
+__all__ = [
+    "predict_emotion",
+    "predict_emotion_batch",
+    "predict_emotion_from_base64",
+    "predict_emotion_from_bytes",
+    "predict_emotion_timeline",
+    "predict_emotion_timeline_from_base64",
+    "predict_emotion_timeline_from_bytes",
+    "batcher",
+    "model_holder",
+    "preload_model",
+    "registry",
+    "EmotionTimelineTooLongError",
+    "EmotionModelRegistry",
+    "EMOTION_LABELS",
+    "KNOWN_EMOTION_MODELS",
+    "OTHER_LABEL",
+    "normalize_label",
+    "parse_models",
+    "EmotionModelHolder",
+    "TorchEmotionBackend",
+    "OnnxEmotionBackend",
+    "export_onnx",
+    "check_parity",
+    "extract_features",
+    "model_input_name",
+    "EmotionBatcher",
+    "EmotionQueueFullError",
+    "EmotionQueueTimeoutError",
+]
@@ -0,0 +1,217 @@
+"""Inference backends for the emotion classifier (PyTorch and ONNX Runtime)."""
+
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from helper import timed
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def model_input_name(feature_extractor) -> str:
+    """Model input a feature extractor produces: "input_features" (Whisper log-mel) or "input_values" (waveform)."""
+    names = getattr(feature_extractor, "model_input_names", None)
+    return names[0] if names else "input_features"
+
+
+def _fit_length(audio_array, max_length):
+    if len(audio_array) > max_length:
+        return audio_array[:max_length]
+    return np.pad(audio_array, (0, max_length - len(audio_array)))
+
+
+def extract_features(audio_arrays, feature_extractor, max_duration=30.0, return_tensors="np"):
+    """
+    Feature extractor output for a batch of waveforms.
+
+    Whisper encoders take fixed 30 s log-mel windows, so their clips are padded to `max_duration`;
+    raw-waveform encoders (wav2vec2, HuBERT) only pad the batch to its longest clip, since a long
+    run of padding would dilute their pooled output.
+    """
+    max_length = int(feature_extractor.sampling_rate * max_duration)
+    with timed("feature_extraction"):
+        if model_input_name(feature_extractor) == "input_features":
+            return feature_extractor(
+                [_fit_length(audio_array, max_length) for audio_array in audio_arrays],
+                sampling_rate=feature_extractor.sampling_rate,
+                max_length=max_length,
+                truncation=True,
+                return_tensors=return_tensors,
+            )
+        return feature_extractor(
+            [audio_array[:max_length] for audio_array in audio_arrays],
+            sampling_rate=feature_extractor.sampling_rate,
+            padding="longest",
+            return_tensors=return_tensors,
+        )
+
+
+class TorchEmotionBackend:
+    """
+    Runs the HuggingFace model with PyTorch on whatever device it was placed on at load time.
+
+    Args:
+        model: Loaded `AutoModelForAudioClassification`.
+        input_name: Keyword the model takes its features as (see `model_input_name`).
+    """
+
+    name = "torch"
+
+    def __init__(self, model, input_name: str = "input_features"):
+        self.model = model
+        self.input_name = input_name
+
+    def predict_proba(self, input_features: np.ndarray) -> np.ndarray:
+        """Return softmax probabilities for a batch of model inputs (log-mel features or waveforms)."""
+        import torch
+
+        device = next(self.model.parameters()).device
+        features = torch.from_numpy(np.ascontiguousarray(input_features)).to(device)
+        with torch.no_grad():
+            logits = self.model(**{self.input_name: features}).logits
+        return torch.softmax(logits, dim=-1).cpu().numpy()
+
+
+class OnnxEmotionBackend:
+    """
+    Runs an exported (optionally INT8-quantized) ONNX graph with ONNX Runtime on CPU.
+
+    Args:
+        onnx_path: Path to the exported model.
+        intra_op_threads: Threads per inference; None lets ONNX Runtime decide.
+    """
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: str, intra_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict_proba(self, input_features: np.ndarray) -> np.ndarray:
+        """Return softmax probabilities for a batch of model inputs (log-mel features or waveforms)."""
+        (logits,) = self.session.run(None, {self._input_name: input_features.astype(np.float32, copy=False)})
+        return _softmax(logits)
+
+
+def as_backend(model):
+    """Wrap a raw PyTorch model in a TorchEmotionBackend; backends are returned unchanged."""
+    if hasattr(model, "predict_proba"):
+        return model
+    return TorchEmotionBackend(model)
+
+
+def onnx_model_path(onnx_dir: str, model_id: str, quantize: bool) -> str:
+    """Location of the exported graph for a checkpoint, e.g. `<dir>/<model>/model.int8.onnx`."""
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_id)
+    filename = "model.int8.onnx" if quantize else "model.onnx"
+    return os.path.join(onnx_dir, safe_id, filename)
+
+
+def export_onnx(model, feature_extractor, output_path: str, quantize: bool = False) -> str:
+    """
+    Export a PyTorch audio classification model to ONNX, optionally applying dynamic INT8 quantization.
+
+    The batch dimension is dynamic; the time dimension is fixed by the feature extractor (30 s for Whisper)
+    and dynamic for raw-waveform models.
+    Weights larger than 2 GB are stored as external data next to the graph.
+
+    Args:
+        model: Loaded `AutoModelForAudioClassification` (moved to CPU for export).
+        feature_extractor: Matching feature extractor, used to build the dummy input.
+        output_path: Destination `.onnx` path.
+        quantize: Apply `onnxruntime.quantization.quantize_dynamic` with INT8 weights.
+
+    Returns:
+        The output path.
+    """
+    import torch
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    input_name = model_input_name(feature_extractor)
+    silence = np.zeros(int(feature_extractor.sampling_rate), dtype=np.float32)
+    dummy = feature_extractor(silence, sampling_rate=feature_extractor.sampling_rate, return_tensors="pt")[input_name]
+    dynamic_axes = {input_name: {0: "batch"} if input_name == "input_features" else {0: "batch", 1: "samples"}}
+
+    fp32_path = output_path if not quantize else output_path.replace(".int8.onnx", ".onnx")
+    if not os.path.exists(fp32_path):
+        model = model.to("cpu").eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (dummy,),
+                fp32_path,
+                input_names=[input_name],
+                output_names=["logits"],
+                dynamic_axes={**dynamic_axes, "logits": {0: "batch"}},
+                opset_version=17,
+                do_constant_folding=True,
+            )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8, use_external_data_format=True)
+    return output_path
+
+
+def check_parity(
+    reference,
+    candidate,
+    feature_extractor,
+    id2label: Dict[int, str],
+    audio_arrays: List[np.ndarray],
+) -> Dict[str, Any]:
+    """
+    Compare the labels and probabilities of two backends over the same clips.
+
+    Args:
+        reference: Backend treated as ground truth (usually torch).
+        candidate: Backend under test (usually onnx).
+        feature_extractor: Feature extractor shared by both backends.
+        id2label: Label mapping of the checkpoint.
+        audio_arrays: Waveforms at the feature extractor sampling rate.
+
+    Returns:
+        Dict with label agreement, max probability difference, per-clip labels and mean latency per backend.
+    """
+    # one clip per call, built exactly as a single request is when it reaches the model
+    input_name = model_input_name(feature_extractor)
+    clips = [extract_features([audio_array], feature_extractor)[input_name] for audio_array in audio_arrays]
+
+    results = {}
+    for role, backend in (("reference", reference), ("candidate", candidate)):
+        probabilities = []
+        started = time.perf_counter()
+        for features in clips:
+            probabilities.append(backend.predict_proba(features)[0])
+        elapsed = time.perf_counter() - started
+        results[role] = (np.stack(probabilities), elapsed / max(len(clips), 1))
+
+    reference_probs, reference_latency = results["reference"]
+    candidate_probs, candidate_latency = results["candidate"]
+    reference_labels = [id2label[int(i)] for i in reference_probs.argmax(axis=-1)]
+    candidate_labels = [id2label[int(i)] for i in candidate_probs.argmax(axis=-1)]
+    matches = sum(r == c for r, c in zip(reference_labels, candidate_labels))
+
+    return {
+        "clips": len(clips),
+        "label_agreement": matches / max(len(clips), 1),
+        "max_probability_diff": float(np.abs(reference_probs - candidate_probs).max()) if len(clips) else 0.0,
+        "reference": {"backend": reference.name, "labels": reference_labels, "mean_latency_ms": round(reference_latency * 1000, 1)},
+        "candidate": {"backend": candidate.name, "labels": candidate_labels, "mean_latency_ms": round(candidate_latency * 1000, 1)},
+    }
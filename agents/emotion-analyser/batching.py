@@ -0,0 +1,177 @@
+"""Dynamic micro-batching scheduler for the emotion classifier."""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class EmotionQueueFullError(RuntimeError):
+    """Raised when the batching queue is at capacity and cannot accept more requests."""
+
+
+class EmotionQueueTimeoutError(EmotionQueueFullError):
+    """Raised when a queued request does not get its label within the timeout."""
+
+
+class EmotionBatcher:
+    """
+    Collects emotion requests that arrive within a short window and runs them as one batch.
+
+    Requests are queued by `submit`; a single worker thread takes the first pending request,
+    keeps collecting until `max_batch_size` is reached or `max_wait_ms` has elapsed, and then
+    calls `predict_batch` once for the whole group. Each caller receives its own label.
+
+    Args:
+        predict_batch: Callable receiving a list of mono float32 arrays and returning one label per array.
+        max_batch_size: Maximum number of requests per forward pass.
+        max_wait_ms: How long to wait for more requests after the first one arrives.
+        max_queue_size: Maximum number of pending requests before `submit` rejects new ones.
+        timeout: Default max seconds `submit` waits for a label.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[np.ndarray]], List[str]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_queue_size: int = 64,
+        timeout: float = 120.0,
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.timeout = float(timeout)
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+        self._batches = 0
+        self._requests = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._last_batch_size = 0
+        self._last_batch_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, predict_batch: Callable[[List[np.ndarray]], List[str]]) -> "EmotionBatcher":
+        """
+        Build a batcher configured by EMOTION_BATCH_MAX_SIZE, EMOTION_BATCH_MAX_WAIT_MS, EMOTION_BATCH_MAX_QUEUE
+        and EMOTION_BATCH_TIMEOUT_SECONDS.
+        """
+        return cls(
+            predict_batch,
+            max_batch_size=int(os.getenv("EMOTION_BATCH_MAX_SIZE", "8")),
+            max_wait_ms=float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "10")),
+            max_queue_size=int(os.getenv("EMOTION_BATCH_MAX_QUEUE", "64")),
+            timeout=float(os.getenv("EMOTION_BATCH_TIMEOUT_SECONDS", "120")),
+        )
+
+    def submit(self, audio_array: np.ndarray, timeout: Optional[float] = None) -> str:
+        """
+        Queue an audio array for classification and block until its label is ready.
+
+        Args:
+            audio_array: Mono float32 waveform at the feature extractor sampling rate.
+            timeout: Max seconds to wait for the result (None: the batcher's `timeout`).
+
+        Returns:
+            Predicted emotion label.
+
+        Raises:
+            EmotionQueueFullError: If the queue is at capacity.
+            EmotionQueueTimeoutError: If the label is not ready within the timeout.
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((audio_array, future))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise EmotionQueueFullError(
+                f"Fila de inferência de emoção cheia ({self.max_queue_size} requisições pendentes)"
+            )
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # a request still in the queue is dropped by the worker; one already in a batch just has its label ignored
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise EmotionQueueTimeoutError(f"Tempo esgotado aguardando a inferência de emoção ({timeout:g} s)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the batcher configuration and counters."""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "max_queue_size": self.max_queue_size,
+                "timeout_seconds": self.timeout,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "last_batch_size": self._last_batch_size,
+                "last_batch_ms": round(self._last_batch_seconds * 1000, 2),
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # requests whose caller already timed out are not worth a forward pass
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            arrays = [item[0] for item in batch]
+            futures = [item[1] for item in batch]
+            started = time.perf_counter()
+            try:
+                labels = list(self.predict_batch(arrays))
+                if len(labels) != len(futures):
+                    raise RuntimeError(
+                        f"predict_batch returned {len(labels)} labels for a batch of {len(futures)} requests"
+                    )
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, label in zip(futures, labels):
+                    future.set_result(label)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._last_batch_size = len(batch)
+                self._last_batch_seconds = elapsed
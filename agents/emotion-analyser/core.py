@@ -1,83 +1,311 @@
+import base64
 import os
+from typing import Union
 
-import librosa
 import numpy as np
-import torch
-from transformers import AutoModelForAudioClassification, AutoFeatureExtractor
 
-from helper import base64_to_temp_file
+from helper import (
+    CatalogAudio, audio_digest, cache_key, load_waveform, result_cache, single_flight, timed, trim_silence, vad_enabled,
+    vad_settings,
+)
 
-model_id = "firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3"
-model = AutoModelForAudioClassification.from_pretrained(model_id)
+from .backends import as_backend, extract_features, model_input_name
+from .batching import EmotionBatcher
+from .registry import EmotionModelRegistry
 
-feature_extractor = AutoFeatureExtractor.from_pretrained(model_id, do_normalize=True)
-id2label = model.config.id2label
+# every configured checkpoint gets its own holder and batcher; torch/transformers and the checkpoint
+# are only loaded on first use (or by preload_model)
+registry = EmotionModelRegistry.from_env(
+    lambda holder: EmotionBatcher.from_env(lambda audio_arrays: predict_emotion_batch(audio_arrays, *holder.get()))
+)
+# the default model, as before the registry
+model_id = registry.model_id()
+model_holder = registry.holder()
+batcher = registry.batcher()
 
+# timeline windows are forward passes that do not go through the batcher's queue, so a single request
+# is capped (240 windows = one hour with the default 15 s hop)
+TIMELINE_MAX_WINDOWS = int(os.getenv("EMOTION_TIMELINE_MAX_WINDOWS", "240"))
 
-def preprocess_audio(audio_path, feature_extractor, max_duration=30.0):
-    audio_array, sampling_rate = librosa.load(audio_path, sr=None)
 
-    max_length = int(feature_extractor.sampling_rate * max_duration)
-    if len(audio_array) > max_length:
-        audio_array = audio_array[:max_length]
+class EmotionTimelineTooLongError(ValueError):
+    """Raised when a timeline would need more windows than allowed for one request."""
+
+
+def preprocess_audio(audio, feature_extractor, max_duration=30.0, return_tensors="pt"):
+    """
+    Build model inputs from an audio file path or a mono float32 waveform.
+
+    Waveforms must already be sampled at `feature_extractor.sampling_rate` (see `helper.decode_audio_bytes`);
+    file paths are loaded and resampled to that rate.
+    """
+    if isinstance(audio, np.ndarray):
+        audio_array = audio
     else:
-        audio_array = np.pad(audio_array, (0, max_length - len(audio_array)))
-
-    inputs = feature_extractor(
-        audio_array,
-        sampling_rate=feature_extractor.sampling_rate,
-        max_length=max_length,
-        truncation=True,
-        return_tensors="pt",
-    )
-    return inputs
+        import librosa
+
+        with timed("decode"):
+            audio_array, _ = librosa.load(audio, sr=feature_extractor.sampling_rate)
+
+    return extract_features([audio_array], feature_extractor, max_duration, return_tensors)
+
+
+def predict_emotion(audio, model, feature_extractor, id2label, max_duration=30.0):
+    """
+    Predict emotion from an audio file path or a waveform at the feature extractor rate.
+
+    `model` may be a PyTorch model (used on the device it already lives on) or an inference backend.
+    """
+    inputs = preprocess_audio(audio, feature_extractor, max_duration, return_tensors="np")
+    with timed("model_forward"):
+        probabilities = as_backend(model).predict_proba(inputs[model_input_name(feature_extractor)])
+    predicted_id = int(probabilities[0].argmax())
+    return id2label[predicted_id]
+
+
+def _forward_batch(audio_arrays, model, feature_extractor, max_duration=30.0):
+    """Run a padded batch through the model or backend and return the softmax probabilities."""
+    inputs = extract_features(audio_arrays, feature_extractor, max_duration)
+    with timed("model_forward"):
+        return as_backend(model).predict_proba(inputs[model_input_name(feature_extractor)])
+
+
+def predict_emotion_batch(audio_arrays, model, feature_extractor, id2label, max_duration=30.0):
+    """Predict one emotion per waveform, running all of them as a single padded batch."""
+    probabilities = _forward_batch(audio_arrays, model, feature_extractor, max_duration)
+    return [id2label[int(predicted_id)] for predicted_id in probabilities.argmax(axis=-1)]
 
 
-def predict_emotion(audio_path, model, feature_extractor, id2label, max_duration=30.0):
-    """Predict emotion from an audio file path."""
-    inputs = preprocess_audio(audio_path, feature_extractor, max_duration)
+def predict_emotion_timeline(
+    audio_array,
+    model,
+    feature_extractor,
+    id2label,
+    window_seconds=30.0,
+    hop_seconds=15.0,
+    batch_size=8,
+    max_windows=None,
+):
+    """
+    Classify a waveform of any length with overlapping windows.
+
+    The waveform is split into `window_seconds` windows (at most 30 s, the model input size) every
+    `hop_seconds`; the last window is aligned to the end of the audio so nothing is dropped.
+    Windows are run through the model `batch_size` at a time, at most `max_windows` of them (None: no limit). The aggregated label comes from the mean of the window probabilities,
+    weighted by how much real audio each window holds. Classes that `id2label` maps to the same label add up in `scores`.
+
+    Returns:
+        Dict with the aggregated `emotion`, its `scores`, the per-window `timeline` and the `duration` in seconds.
+
+    Raises:
+        EmotionTimelineTooLongError: If the audio needs more than `max_windows` windows.
+    """
+    sampling_rate = feature_extractor.sampling_rate
+    window = int(sampling_rate * window_seconds)
+    hop = max(1, int(sampling_rate * hop_seconds))
+    total = len(audio_array)
+
+    starts = list(range(0, max(total - window, 0) + 1, hop))
+    if starts[-1] + window < total:
+        starts.append(total - window)
+    if max_windows is not None and len(starts) > max_windows:
+        raise EmotionTimelineTooLongError(
+            f"Áudio longo demais para a linha do tempo: {len(starts)} janelas (máximo {max_windows}); aumente hop_seconds"
+        )
+
+    probabilities = []
+    for i in range(0, len(starts), batch_size):
+        chunk = [audio_array[start:start + window] for start in starts[i:i + batch_size]]
+        probabilities.append(_forward_batch(chunk, model, feature_extractor))
+    probabilities = np.concatenate(probabilities, axis=0)
+
+    weights = np.array([min(window, total - start) for start in starts], dtype=np.float64)
+    aggregated = (probabilities * weights[:, None]).sum(axis=0) / max(weights.sum(), 1.0)
+
+    timeline = []
+    for start, window_probabilities in zip(starts, probabilities):
+        predicted_id = int(window_probabilities.argmax())
+        timeline.append({
+            "start": round(start / sampling_rate, 2),
+            "end": round(min(start + window, total) / sampling_rate, 2),
+            "emotion": id2label[predicted_id],
+            "confidence": round(float(window_probabilities[predicted_id]), 4),
+        })
+
+    scores = {}
+    for i, score in enumerate(aggregated):
+        scores[id2label[i]] = scores.get(id2label[i], 0.0) + float(score)
+    return {
+        "emotion": max(scores, key=scores.get),
+        "scores": {label: round(score, 4) for label, score in scores.items()},
+        "timeline": timeline,
+        "duration": round(total / sampling_rate, 2),
+    }
+
+
+def predict_emotion_from_bytes(
+    audio_bytes: Union[bytes, CatalogAudio],
+    audio_format: str = "wav",
+    max_duration: float = 30.0,
+    vad: bool = None,
+    vad_report: dict = None,
+    model: str = None,
+) -> str:
+    """
+    Predict emotion from encoded audio bytes (e.g. a raw or multipart upload).
+
+    Args:
+        audio_bytes: Encoded audio content, or a catalogued file.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        max_duration: Max duration in seconds to process. Shorter clips are zero-padded by the batcher.
+        vad: Trim the silence first, so the window holds speech only (default: VAD_ENABLED).
+        vad_report: Filled with the speech segments and the fraction of audio removed.
+        model: Registry name of the model (default: EMOTION_MODEL).
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = model.to(device)
-    inputs = {key: value.to(device) for key, value in inputs.items()}
+    Returns:
+        Predicted emotion label, one of registry.EMOTION_LABELS.
 
-    with torch.no_grad():
-        outputs = model(**inputs)
+    Raises:
+        EmotionQueueFullError: If the batching queue is at capacity.
+        ValueError: If `model` is not configured.
+    """
+    vad = vad_enabled() if vad is None else vad
+    trimming = sorted(vad_settings().items()) if vad else None
+    holder, model_batcher = registry.holder(model), registry.batcher(model)
+    key = cache_key(audio_digest(audio_bytes), audio_format, holder.model_id, holder.backend_name, max_duration, trimming)
+    hit, label = result_cache.get("emotion", key)
+    if hit:
+        return label
 
-    logits = outputs.logits
-    predicted_id = torch.argmax(logits, dim=-1).item()
-    predicted_label = id2label[predicted_id]
+    def compute():
+        _, feature_extractor, _ = holder.get()
+        # shared through the waveform cache with the local transcription of the same recording
+        audio_array = load_waveform(audio_bytes, audio_format, feature_extractor.sampling_rate)
+        if vad:
+            audio_array, report = trim_silence(audio_array, feature_extractor.sampling_rate)
+            if vad_report is not None:
+                vad_report.update(report)
+        audio_array = audio_array[: int(feature_extractor.sampling_rate * max_duration)]
+        # includes the wait for the batch; feature extraction and forward are also timed on their own
+        with timed("emotion_inference"):
+            label = model_batcher.submit(audio_array)
+        result_cache.set("emotion", key, label)
+        return label
 
-    return predicted_label
+    # concurrent requests for the same audio and settings share one prediction
+    return single_flight.do("emotion", key, compute, cache=result_cache)
 
 
 def predict_emotion_from_base64(
     base64_audio: str,
     audio_format: str = "wav",
     max_duration: float = 30.0,
+    vad: bool = None,
+    vad_report: dict = None,
+    model: str = None,
 ) -> str:
     """
     Predict emotion from base64-encoded audio.
 
     Args:
         base64_audio: Base64-encoded audio content (no data URL prefix).
-        audio_format: Format of the audio, e.g. "wav", "mp3". Used for the temp file extension and librosa.
-        max_duration: Max duration in seconds to process.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        max_duration: Max duration in seconds to process. Shorter clips are zero-padded by the batcher.
+        vad: Trim the silence first, so the window holds speech only (default: VAD_ENABLED).
+        vad_report: Filled with the speech segments and the fraction of audio removed.
+        model: Registry name of the model (default: EMOTION_MODEL).
 
     Returns:
-        Predicted emotion label.
+        Predicted emotion label, one of registry.EMOTION_LABELS.
+
+    Raises:
+        EmotionQueueFullError: If the batching queue is at capacity.
+        ValueError: If `model` is not configured.
+    """
+    return predict_emotion_from_bytes(
+        base64.b64decode(base64_audio, validate=True), audio_format, max_duration, vad, vad_report, model
+    )
+
+
+def predict_emotion_timeline_from_bytes(
+    audio_bytes: Union[bytes, CatalogAudio],
+    audio_format: str = "wav",
+    window_seconds: float = 30.0,
+    hop_seconds: float = 15.0,
+    model: str = None,
+) -> dict:
+    """
+    Predict an emotion timeline for encoded audio bytes of any length.
+
+    Args:
+        audio_bytes: Encoded audio content, or a catalogued file.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        window_seconds: Length of each analysed window in seconds.
+        hop_seconds: Distance between window starts; smaller than window_seconds means overlap.
+        model: Registry name of the model (default: EMOTION_MODEL).
+
+    Returns:
+        Dict with the aggregated emotion, scores, per-window timeline and duration.
+
+    Raises:
+        ValueError: If `model` is not configured.
+        EmotionTimelineTooLongError: If the audio needs more than EMOTION_TIMELINE_MAX_WINDOWS windows.
     """
-    temp_path = base64_to_temp_file(base64_audio, audio_format)
-    try:
-        return predict_emotion(
-            temp_path,
-            model,
+    holder, model_batcher = registry.holder(model), registry.batcher(model)
+    key = cache_key(audio_digest(audio_bytes), audio_format, holder.model_id, holder.backend_name, window_seconds, hop_seconds)
+    hit, timeline = result_cache.get("emotion_timeline", key)
+    if hit:
+        return timeline
+
+    def compute():
+        backend, feature_extractor, id2label = holder.get()
+        audio_array = load_waveform(audio_bytes, audio_format, feature_extractor.sampling_rate)
+        timeline = predict_emotion_timeline(
+            audio_array,
+            backend,
             feature_extractor,
             id2label,
-            max_duration=max_duration,
+            window_seconds=window_seconds,
+            hop_seconds=hop_seconds,
+            batch_size=model_batcher.max_batch_size,
+            max_windows=TIMELINE_MAX_WINDOWS,
         )
-    finally:
-        try:
-            os.unlink(temp_path)
-        except OSError:
-            pass
+        result_cache.set("emotion_timeline", key, timeline)
+        return timeline
+
+    return single_flight.do("emotion_timeline", key, compute, cache=result_cache)
+
+
+def predict_emotion_timeline_from_base64(
+    base64_audio: str,
+    audio_format: str = "wav",
+    window_seconds: float = 30.0,
+    hop_seconds: float = 15.0,
+    model: str = None,
+) -> dict:
+    """
+    Predict an emotion timeline for base64-encoded audio of any length.
+
+    Args:
+        base64_audio: Base64-encoded audio content (no data URL prefix).
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        window_seconds: Length of each analysed window in seconds.
+        hop_seconds: Distance between window starts; smaller than window_seconds means overlap.
+        model: Registry name of the model (default: EMOTION_MODEL).
+
+    Returns:
+        Dict with the aggregated emotion, scores, per-window timeline and duration.
+    """
+    return predict_emotion_timeline_from_bytes(
+        base64.b64decode(base64_audio, validate=True), audio_format, window_seconds, hop_seconds, model
+    )
+
+
+def preload_model(background: bool = True, warmup: bool = True, model: str = None):
+    """Load an emotion model (default: EMOTION_MODEL) ahead of the first request; warmup goes through the batcher's forward path."""
+    holder = registry.holder(model)
+    return holder.preload(
+        background=background,
+        warmup=warmup,
+        predict_batch=lambda audio_arrays: predict_emotion_batch(audio_arrays, *holder.get()),
+    )
@@ -0,0 +1,208 @@
+"""Lazy, thread-safe holder for the emotion classification model."""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from helper import env_flag
+
+from .backends import OnnxEmotionBackend, TorchEmotionBackend, export_onnx, model_input_name, onnx_model_path
+
+
+class EmotionModelHolder:
+    """
+    Loads the emotion model on first use instead of at import time.
+
+    torch and transformers are only imported inside `load`, so importing the emotion analyser
+    (and therefore `main.py`) stays cheap. `preload` can start loading in a background thread
+    and optionally run a warmup inference on a silent clip, and `status` reports readiness.
+
+    The loaded model is wrapped in an inference backend (see `backends.py`): "torch" runs the
+    HuggingFace model directly, "onnx" runs an exported graph with ONNX Runtime, exporting it
+    on first use when it is not cached yet. With `label_map`, the checkpoint's `id2label` is
+    translated on load (see `registry.normalize_label`), so every model answers with the same labels.
+
+    Args:
+        model_id: HuggingFace checkpoint of an `AutoModelForAudioClassification` model.
+        backend: "torch" or "onnx".
+        onnx_dir: Directory where exported ONNX graphs are cached.
+        onnx_quantize: Use dynamic INT8 quantization for the ONNX graph.
+        onnx_threads: intra-op threads for ONNX Runtime (None lets it decide).
+        torch_threads: intra-op threads for torch in this process (None keeps torch's default).
+        label_map: Translates each label of the checkpoint; None keeps them as they are.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        backend: str = "torch",
+        onnx_dir: str = ".onnx-cache",
+        onnx_quantize: bool = True,
+        onnx_threads: Optional[int] = None,
+        torch_threads: Optional[int] = None,
+        label_map: Optional[Callable[[str], str]] = None,
+    ):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Backend de emoção inválido: {backend} (use 'torch' ou 'onnx')")
+        self.model_id = model_id
+        self.backend_name = backend
+        self.onnx_dir = onnx_dir
+        self.onnx_quantize = onnx_quantize
+        self.onnx_threads = onnx_threads
+        self.torch_threads = torch_threads
+        self.label_map = label_map
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[Any, Any, Dict[int, str]]] = None
+        self._state = "not_loaded"
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._loaded_at: Optional[str] = None
+        self._warm = False
+        self._warmup_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, model_id: str, label_map: Optional[Callable[[str], str]] = None) -> "EmotionModelHolder":
+        """Build a holder configured by EMOTION_BACKEND, EMOTION_ONNX_DIR, EMOTION_ONNX_QUANTIZE, EMOTION_ONNX_THREADS and EMOTION_TORCH_THREADS."""
+        threads = os.getenv("EMOTION_ONNX_THREADS")
+        torch_threads = os.getenv("EMOTION_TORCH_THREADS")
+        return cls(
+            model_id,
+            backend=os.getenv("EMOTION_BACKEND", "torch").lower(),
+            onnx_dir=os.getenv("EMOTION_ONNX_DIR", ".onnx-cache"),
+            onnx_quantize=env_flag("EMOTION_ONNX_QUANTIZE", "true"),
+            onnx_threads=int(threads) if threads else None,
+            torch_threads=int(torch_threads) if torch_threads else None,
+            label_map=label_map,
+        )
+
+    def get(self) -> Tuple[Any, Any, Dict[int, str]]:
+        """Return (backend, feature_extractor, id2label), loading them if needed."""
+        loaded = self._loaded
+        if loaded is not None:
+            return loaded
+        return self.load()
+
+    def load(self) -> Tuple[Any, Any, Dict[int, str]]:
+        """Load the backend and feature extractor once; concurrent callers wait for the same load."""
+        with self._lock:
+            if self._loaded is not None:
+                return self._loaded
+
+            self._state = "loading"
+            started = time.perf_counter()
+            try:
+                from transformers import AutoConfig, AutoFeatureExtractor
+
+                feature_extractor = AutoFeatureExtractor.from_pretrained(self.model_id, do_normalize=True)
+                id2label = {int(i): label for i, label in AutoConfig.from_pretrained(self.model_id).id2label.items()}
+                if self.label_map is not None:
+                    id2label = {i: self.label_map(label) for i, label in id2label.items()}
+                if self.backend_name == "onnx":
+                    backend = self._load_onnx(feature_extractor)
+                else:
+                    backend = TorchEmotionBackend(self._load_torch_model(), model_input_name(feature_extractor))
+            except Exception as e:
+                self._state = "failed"
+                self._error = str(e)
+                raise
+
+            self._loaded = (backend, feature_extractor, id2label)
+            self._load_seconds = time.perf_counter() - started
+            self._loaded_at = datetime.now().isoformat()
+            self._state = "ready"
+            self._error = None
+            return self._loaded
+
+    def apply_thread_limits(self) -> None:
+        """
+        Apply `torch_threads` to torch in the current process.
+
+        Thread settings are per process, so a pre-fork server calls this again in every worker.
+        Does nothing before torch has been imported.
+        """
+        torch = sys.modules.get("torch")
+        if torch is not None and self.torch_threads:
+            torch.set_num_threads(self.torch_threads)
+
+    def _load_torch_model(self):
+        import torch
+        from transformers import AutoModelForAudioClassification
+
+        self.apply_thread_limits()
+
+        model = AutoModelForAudioClassification.from_pretrained(self.model_id)
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        return model.to(device).eval()
+
+    def _load_onnx(self, feature_extractor) -> OnnxEmotionBackend:
+        onnx_path = onnx_model_path(self.onnx_dir, self.model_id, self.onnx_quantize)
+        if not os.path.exists(onnx_path):
+            # the torch weights are only needed for the export and are released right after
+            export_onnx(self._load_torch_model(), feature_extractor, onnx_path, quantize=self.onnx_quantize)
+        return OnnxEmotionBackend(onnx_path, intra_op_threads=self.onnx_threads)
+
+    def warmup(self, predict_batch=None) -> None:
+        """
+        Run one inference on a second of silence so the first real request does not pay for lazy initialisation.
+
+        Args:
+            predict_batch: Optional callable receiving a list of waveforms; defaults to a direct forward pass.
+        """
+        backend, feature_extractor, _ = self.get()
+        started = time.perf_counter()
+        silence = np.zeros(int(feature_extractor.sampling_rate), dtype=np.float32)
+        if predict_batch is not None:
+            predict_batch([silence])
+        else:
+            inputs = feature_extractor(silence, sampling_rate=feature_extractor.sampling_rate, return_tensors="np")
+            backend.predict_proba(inputs[model_input_name(feature_extractor)])
+        self._warmup_seconds = time.perf_counter() - started
+        self._warm = True
+
+    def preload(self, background: bool = True, warmup: bool = True, predict_batch=None) -> Optional[threading.Thread]:
+        """
+        Load (and optionally warm up) the model, in a daemon thread when `background` is True.
+
+        Returns:
+            The started thread when running in background, otherwise None.
+        """
+        def run():
+            try:
+                self.load()
+                if warmup:
+                    self.warmup(predict_batch)
+            except Exception:
+                # status() already reports the failure; requests will retry the load
+                pass
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="emotion-model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded is not None
+
+    def status(self) -> Dict[str, Any]:
+        """Return the readiness state, load time and warmup information."""
+        return {
+            "model_id": self.model_id,
+            "backend": self.backend_name,
+            "torch_threads": self.torch_threads,
+            "state": self._state,
+            "ready": self.ready,
+            "warm": self._warm,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "warmup_seconds": round(self._warmup_seconds, 3) if self._warmup_seconds is not None else None,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+            "labels": sorted(set(self._loaded[2].values())) if self._loaded is not None else None,
+        }
@@ -0,0 +1,157 @@
+"""Registry of the emotion checkpoints a deployment can serve, with a common label space."""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .batching import EmotionBatcher
+from .model_holder import EmotionModelHolder
+
+# labels every model answers with, whatever its checkpoint calls them
+EMOTION_LABELS = ("angry", "disgust", "fearful", "happy", "neutral", "sad", "surprised")
+OTHER_LABEL = "other"
+
+LABEL_ALIASES = {
+    "ang": "angry",
+    "anger": "angry",
+    "dis": "disgust",
+    "disgusted": "disgust",
+    "fea": "fearful",
+    "fear": "fearful",
+    "hap": "happy",
+    "happiness": "happy",
+    "joy": "happy",
+    "neu": "neutral",
+    "calm": "neutral",
+    "sadness": "sad",
+    "sur": "surprised",
+    "surprise": "surprised",
+    "ps": "surprised",
+}
+
+# name -> checkpoint of the models known to work with the emotion analyser
+KNOWN_EMOTION_MODELS = {
+    "whisper-large-v3": "firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3",
+    "wav2vec2-xlsr": "ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition",
+    "wav2vec2-base": "superb/wav2vec2-base-superb-er",
+    "hubert-base": "superb/hubert-base-superb-er",
+}
+DEFAULT_EMOTION_MODEL = "whisper-large-v3"
+
+
+def normalize_label(label: str) -> str:
+    """Map a checkpoint label ("hap", "Anger", "calm", ...) to EMOTION_LABELS, or OTHER_LABEL when it has no match."""
+    label = str(label).strip().lower()
+    label = LABEL_ALIASES.get(label, label)
+    return label if label in EMOTION_LABELS else OTHER_LABEL
+
+
+def parse_models(spec: str) -> Dict[str, str]:
+    """
+    Parse an EMOTION_MODELS value: comma-separated `name=checkpoint` pairs, or names of KNOWN_EMOTION_MODELS.
+
+    Raises:
+        ValueError: If a bare name is not one of KNOWN_EMOTION_MODELS.
+    """
+    models = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, checkpoint = entry.partition("=")
+        name = name.strip()
+        if not checkpoint:
+            if name not in KNOWN_EMOTION_MODELS:
+                raise ValueError(
+                    f"Modelo de emoção desconhecido: {name} (use nome=checkpoint ou um de {', '.join(KNOWN_EMOTION_MODELS)})"
+                )
+            checkpoint = KNOWN_EMOTION_MODELS[name]
+        models[name] = checkpoint.strip()
+    return models
+
+
+class EmotionModelRegistry:
+    """
+    Named emotion checkpoints, each with its own lazily created model holder and batcher.
+
+    Nothing is loaded until a model is first used, so listing several checkpoints costs nothing
+    for the ones a deployment never selects. All of them answer in EMOTION_LABELS (plus
+    OTHER_LABEL for labels with no match), so callers can switch models without handling
+    another label set.
+
+    Args:
+        models: name -> HuggingFace checkpoint of an `AutoModelForAudioClassification` model.
+        default: Name used when a call does not choose a model.
+        make_batcher: Builds the batcher of a holder; its predict_batch runs that holder's model.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, str],
+        default: str,
+        make_batcher: Callable[[EmotionModelHolder], EmotionBatcher],
+    ):
+        if default not in models:
+            raise ValueError(f"Modelo de emoção padrão não configurado: {default} (modelos: {', '.join(models)})")
+        self.models = dict(models)
+        self.default = default
+        self.make_batcher = make_batcher
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[EmotionModelHolder, EmotionBatcher]] = {}
+
+    @classmethod
+    def from_env(cls, make_batcher: Callable[[EmotionModelHolder], EmotionBatcher]) -> "EmotionModelRegistry":
+        """
+        Build a registry configured by EMOTION_MODELS (default: every KNOWN_EMOTION_MODELS entry) and
+        EMOTION_MODEL (default model name, "whisper-large-v3").
+        """
+        spec = os.getenv("EMOTION_MODELS")
+        models = parse_models(spec) if spec else dict(KNOWN_EMOTION_MODELS)
+        return cls(models, os.getenv("EMOTION_MODEL", DEFAULT_EMOTION_MODEL), make_batcher)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self.models)
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """
+        Name of the model to use: `name`, or the default when it is None.
+
+        Raises:
+            ValueError: If `name` is not configured.
+        """
+        name = name or self.default
+        if name not in self.models:
+            raise ValueError(f"Modelo de emoção inválido: {name} (use {', '.join(self.models)})")
+        return name
+
+    def model_id(self, name: Optional[str] = None) -> str:
+        """Checkpoint of a model (the default one when `name` is None)."""
+        return self.models[self.resolve(name)]
+
+    def holder(self, name: Optional[str] = None) -> EmotionModelHolder:
+        """Model holder of a model (the default one when `name` is None)."""
+        return self._entry(name)[0]
+
+    def batcher(self, name: Optional[str] = None) -> EmotionBatcher:
+        """Batcher of a model (the default one when `name` is None)."""
+        return self._entry(name)[1]
+
+    def _entry(self, name: Optional[str]) -> Tuple[EmotionModelHolder, EmotionBatcher]:
+        name = self.resolve(name)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                holder = EmotionModelHolder.from_env(self.models[name], label_map=normalize_label)
+                entry = self._entries[name] = (holder, self.make_batcher(holder))
+            return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the default model, the configured checkpoints and the status of the ones in use."""
+        with self._lock:
+            entries = dict(self._entries)
+        return {
+            "default": self.default,
+            "labels": list(EMOTION_LABELS),
+            "models": {
+                name: entries[name][0].status() if name in entries else {"model_id": model_id, "state": "not_used"}
+                for name, model_id in self.models.items()
+            },
+        }
@@ -0,0 +1,413 @@
+"""
+Patient analysis pipeline: transcription and emotion prediction run concurrently, then the psychological analysis.
+
+In the single-call mode the emotion is predicted first and the audio model returns the transcription and the
+analysis in one answer, which saves the second round trip to the LLM provider.
+"""
+
+import contextvars
+import importlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+audio_analyser = importlib.import_module("agents.audio-analyser")
+emotion_analyser = importlib.import_module("agents.emotion-analyser")
+psycological_analyser = importlib.import_module("agents.psycological-analyser")
+
+# Transcription is network-bound and emotion inference is CPU-bound, so threads overlap them well
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PIPELINE_MAX_WORKERS", "8")),
+    thread_name_prefix="patient-pipeline",
+)
+
+# Items of a batch run in their own pool: each one waits on stages submitted to `executor`, so sharing
+# that pool could leave every worker waiting for stages that have no worker left to run them
+BATCH_MAX_CONCURRENCY = max(1, int(os.getenv("BATCH_MAX_CONCURRENCY", "4")))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix="patient-batch")
+
+PIPELINE_MODES = ("two_call", "single_call")
+
+
+def pipeline_mode() -> str:
+    """Default pipeline mode, from PATIENT_PIPELINE_MODE: "two_call" (default) or "single_call"."""
+    mode = os.getenv("PATIENT_PIPELINE_MODE", "two_call").lower()
+    return mode if mode in PIPELINE_MODES else "two_call"
+
+
+class PipelineStageError(Exception):
+    """Raised when one stage of the pipeline fails; `stage` names it and `__cause__` holds the original error."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Erro na etapa '{stage}': {error}")
+        self.stage = stage
+        self.error = error
+
+
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def _result(stage: str, future) -> Tuple[Any, float]:
+    try:
+        return future.result()
+    except Exception as e:
+        raise PipelineStageError(stage, e) from e
+
+
+def _emotion_predictor(audio_data: Union[str, bytes]) -> Callable:
+    # bytes of uploads and catalogued files (helper.CatalogAudio) skip the base64 decoding
+    if isinstance(audio_data, str):
+        return emotion_analyser.predict_emotion_from_base64
+    return emotion_analyser.predict_emotion_from_bytes
+
+
+def _submit_audio_stages(
+    audio_data: Union[str, bytes],
+    audio_format: str,
+    compact: bool,
+    vad: bool,
+    reports: Dict[str, Any],
+    backend: str,
+    emotion_model: Optional[str],
+):
+    predict_emotion = _emotion_predictor(audio_data)
+    # copied contexts carry the request's Server-Timing collector into the worker threads
+    transcription_future = executor.submit(
+        contextvars.copy_context().run, _timed, audio_analyser.get_transcription, audio_data, audio_format,
+        compact, reports["compaction"], vad, reports["vad"], backend,
+    )
+    emotion_future = executor.submit(
+        contextvars.copy_context().run, _timed, predict_emotion, audio_data, audio_format, 30.0, vad, reports["emotion_vad"],
+        emotion_model,
+    )
+    return transcription_future, emotion_future
+
+
+def _new_reports() -> Dict[str, Dict[str, Any]]:
+    return {"compaction": {}, "vad": {}, "emotion_vad": {}}
+
+
+def _add_reports(result: Dict[str, Any], reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Adds the compaction and VAD reports of the stages that ran them (cached stages run neither)."""
+    if reports["compaction"]:
+        result["compaction"] = reports["compaction"]
+    if reports["vad"] or reports["emotion_vad"]:
+        result["vad"] = reports["vad"] or reports["emotion_vad"]
+    return result
+
+
+def analyse_patient_audio(
+    audio_data: Union[str, bytes],
+    audio_format: str = "wav",
+    compact: bool = None,
+    vad: bool = None,
+    mode: str = None,
+    transcription_backend: str = None,
+    emotion_model: str = None,
+) -> Dict[str, Any]:
+    """
+    Runs the full patient pipeline on an audio recording.
+
+    The remote transcription and the local emotion inference are submitted to a shared thread pool
+    together, so the wall time of that step is the slower of the two instead of their sum. The
+    psychological analysis then receives both results.
+
+    Args:
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
+        audio_format (str): Audio format (default: "wav")
+        compact (bool): Compact the audio before uploading it for transcription (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before transcription and emotion prediction (default: VAD_ENABLED)
+        mode (str): "two_call" or "single_call" (default: PATIENT_PIPELINE_MODE)
+        transcription_backend (str): "openrouter" or "local" (default: TRANSCRIPTION_BACKEND); the
+            single-call mode always transcribes with the audio model
+        emotion_model (str): Registry name of the emotion model (default: EMOTION_MODEL)
+
+    Returns:
+        dict: `resume`, `emotion`, `transcription`, `pipeline_mode`, `transcription_backend` (two-call mode)
+        and `timings` (milliseconds per stage and total), plus `compaction` (bytes saved) and `vad`
+        (fraction of audio removed) when they ran
+
+    Raises:
+        PipelineStageError: If any stage fails.
+    """
+    if (pipeline_mode() if mode is None else mode) == "single_call":
+        return _analyse_patient_audio_single_call(audio_data, audio_format, compact, vad, emotion_model)
+
+    started = time.perf_counter()
+    backend = audio_analyser.transcription_backend(transcription_backend)
+    reports = _new_reports()
+    transcription_future, emotion_future = _submit_audio_stages(
+        audio_data, audio_format, compact, vad, reports, backend, emotion_model
+    )
+
+    transcription, transcription_ms = _result("transcription", transcription_future)
+    emotion, emotion_ms = _result("emotion", emotion_future)
+
+    try:
+        analysis, analysis_ms = _timed(psycological_analyser.get_psicological_analysis, transcription, emotion)
+    except Exception as e:
+        raise PipelineStageError("analysis", e) from e
+
+    result = {
+        "resume": analysis,
+        "emotion": emotion,
+        "transcription": transcription,
+        "pipeline_mode": "two_call",
+        "transcription_backend": backend,
+        "timings": {
+            "transcription_ms": transcription_ms,
+            "emotion_ms": emotion_ms,
+            "analysis_ms": analysis_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+    return _add_reports(result, reports)
+
+
+def _analyse_patient_audio_single_call(
+    audio_data: Union[str, bytes], audio_format: str, compact: bool, vad: bool, emotion_model: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Single-call mode: the local emotion prediction runs first, then one audio model call returns the
+    transcription and the analysis (validated against the two-call schema) with that emotion injected.
+    """
+    started = time.perf_counter()
+    reports = _new_reports()
+    try:
+        emotion, emotion_ms = _timed(
+            _emotion_predictor(audio_data), audio_data, audio_format, 30.0, vad, reports["emotion_vad"], emotion_model
+        )
+    except Exception as e:
+        raise PipelineStageError("emotion", e) from e
+
+    try:
+        answer, analysis_ms = _timed(
+            audio_analyser.get_transcription_and_analysis, audio_data, audio_format, emotion,
+            compact, reports["compaction"], vad, reports["vad"],
+        )
+    except Exception as e:
+        raise PipelineStageError("transcription_analysis", e) from e
+
+    result = {
+        "resume": answer["analysis"],
+        "emotion": emotion,
+        "transcription": answer["transcription"],
+        "pipeline_mode": "single_call",
+        "timings": {
+            "emotion_ms": emotion_ms,
+            "transcription_analysis_ms": analysis_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+    return _add_reports(result, reports)
+
+
+def stream_patient_audio(
+    audio_data: Union[str, bytes],
+    audio_format: str = "wav",
+    compact: bool = None,
+    vad: bool = None,
+    mode: str = None,
+    transcription_backend: str = None,
+    emotion_model: str = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Runs the patient pipeline and yields (event, data) pairs as each stage progresses.
+
+    Events, in order of arrival:
+        - `transcription` / `emotion`: stage result and its duration, whichever finishes first comes first
+          (single-call mode: `emotion`, then the tokens, then `transcription` once the answer is parsed)
+        - `token`: a chunk of the psychological analysis as the model generates it
+        - `result`: the same payload analyse_patient_audio returns
+        - `error`: the failed stage and message; no events follow it
+
+    Args:
+        audio_data (str | bytes): Base64 encoded audio data, or the raw audio bytes of an upload
+        audio_format (str): Audio format (default: "wav")
+        compact (bool): Compact the audio before uploading it for transcription (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before transcription and emotion prediction (default: VAD_ENABLED)
+        mode (str): "two_call" or "single_call" (default: PATIENT_PIPELINE_MODE)
+        transcription_backend (str): "openrouter" or "local" (default: TRANSCRIPTION_BACKEND); the
+            single-call mode always transcribes with the audio model
+        emotion_model (str): Registry name of the emotion model (default: EMOTION_MODEL)
+    """
+    if (pipeline_mode() if mode is None else mode) == "single_call":
+        yield from _stream_patient_audio_single_call(audio_data, audio_format, compact, vad, emotion_model)
+        return
+
+    started = time.perf_counter()
+    backend = audio_analyser.transcription_backend(transcription_backend)
+    reports = _new_reports()
+    transcription_future, emotion_future = _submit_audio_stages(
+        audio_data, audio_format, compact, vad, reports, backend, emotion_model
+    )
+    stages = {transcription_future: "transcription", emotion_future: "emotion"}
+    results = {}
+    timings = {}
+
+    for future in as_completed(stages):
+        stage = stages[future]
+        try:
+            results[stage], timings[f"{stage}_ms"] = _result(stage, future)
+        except PipelineStageError as e:
+            yield "error", {"stage": e.stage, "error": str(e)}
+            return
+        yield stage, {stage: results[stage], "elapsed_ms": timings[f"{stage}_ms"]}
+
+    analysis_started = time.perf_counter()
+    try:
+        analysis = yield from _stream_tokens(
+            psycological_analyser.stream_psicological_analysis(results["transcription"], results["emotion"])
+        )
+    except Exception as e:
+        yield "error", {"stage": "analysis", "error": str(PipelineStageError("analysis", e))}
+        return
+    timings["analysis_ms"] = round((time.perf_counter() - analysis_started) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    result = {
+        "resume": analysis,
+        "emotion": results["emotion"],
+        "transcription": results["transcription"],
+        "pipeline_mode": "two_call",
+        "transcription_backend": backend,
+        "timings": timings,
+    }
+    yield "result", _add_reports(result, reports)
+
+
+def _stream_patient_audio_single_call(
+    audio_data: Union[str, bytes], audio_format: str, compact: bool, vad: bool, emotion_model: Optional[str]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    started = time.perf_counter()
+    reports = _new_reports()
+    timings = {}
+    try:
+        emotion, timings["emotion_ms"] = _timed(
+            _emotion_predictor(audio_data), audio_data, audio_format, 30.0, vad, reports["emotion_vad"], emotion_model
+        )
+    except Exception as e:
+        yield "error", {"stage": "emotion", "error": str(PipelineStageError("emotion", e))}
+        return
+    yield "emotion", {"emotion": emotion, "elapsed_ms": timings["emotion_ms"]}
+
+    analysis_started = time.perf_counter()
+    try:
+        answer = yield from _stream_tokens(audio_analyser.stream_transcription_and_analysis(
+            audio_data, audio_format, emotion, compact, reports["compaction"], vad, reports["vad"]
+        ))
+    except Exception as e:
+        yield "error", {"stage": "transcription_analysis", "error": str(PipelineStageError("transcription_analysis", e))}
+        return
+    timings["transcription_analysis_ms"] = round((time.perf_counter() - analysis_started) * 1000, 1)
+    yield "transcription", {"transcription": answer["transcription"], "elapsed_ms": timings["transcription_analysis_ms"]}
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    result = {
+        "resume": answer["analysis"],
+        "emotion": emotion,
+        "transcription": answer["transcription"],
+        "pipeline_mode": "single_call",
+        "timings": timings,
+    }
+    yield "result", _add_reports(result, reports)
+
+
+def _stream_tokens(chunks):
+    """Re-yields text chunks as `token` events and returns the chunk generator's return value."""
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration as stop:
+            return stop.value
+        yield "token", {"content": chunk}
+
+
+def analyse_patient_batch(
+    items: Iterable[Tuple[Any, Callable[[], Tuple[Union[str, bytes], str]]]],
+    compact: bool = None,
+    vad: bool = None,
+    max_concurrency: Optional[int] = None,
+    mode: str = None,
+    transcription_backend: str = None,
+    emotion_model: str = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Runs the patient pipeline over many recordings and yields each outcome as soon as it is ready.
+
+    At most `max_concurrency` items are in flight and an item's audio is only loaded when it gets a
+    slot, so memory stays bounded however long the batch is. The emotion predictions of the items in
+    flight reach the emotion batcher together and share forward passes. A failing item yields an error
+    record and the rest of the batch carries on.
+
+    Args:
+        items: (item_id, load) pairs; `load()` returns (audio_data, audio_format) and may raise
+        compact (bool): Compact the audio before uploading it for transcription (default: AUDIO_COMPACTION)
+        vad (bool): Trim the silence before transcription and emotion prediction (default: VAD_ENABLED)
+        max_concurrency (int): Items in flight, capped at BATCH_MAX_CONCURRENCY (default: the cap)
+        mode (str): "two_call" or "single_call" (default: PATIENT_PIPELINE_MODE)
+        transcription_backend (str): "openrouter" or "local" (default: TRANSCRIPTION_BACKEND)
+        emotion_model (str): Registry name of the emotion model (default: EMOTION_MODEL)
+
+    Yields:
+        dict: `index`, `id` and `status`; `result` (the analyse_patient_audio payload) when it
+        succeeded, `stage` and `error` when it failed. Records come in completion order.
+    """
+    limit = max(1, min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    queued = iter(enumerate(items))
+    pending = {}
+
+    def submit_next() -> bool:
+        for index, (item_id, load) in queued:
+            # the copied context keeps the request's route for the LLM usage accounting
+            future = batch_executor.submit(
+                contextvars.copy_context().run, _run_batch_item,
+                load, compact, vad, mode, transcription_backend, emotion_model,
+            )
+            pending[future] = (index, item_id)
+            return True
+        return False
+
+    while len(pending) < limit and submit_next():
+        pass
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, item_id = pending.pop(future)
+                submit_next()
+                yield _batch_record(index, item_id, future)
+    finally:
+        # the consumer went away (e.g. the client disconnected): drop the items that have not started
+        for future in pending:
+            future.cancel()
+
+
+def _run_batch_item(
+    load: Callable[[], Tuple[Union[str, bytes], str]],
+    compact: bool,
+    vad: bool,
+    mode: Optional[str],
+    transcription_backend: Optional[str],
+    emotion_model: Optional[str],
+) -> Dict[str, Any]:
+    try:
+        audio_data, audio_format = load()
+    except Exception as e:
+        raise PipelineStageError("input", e) from e
+    return analyse_patient_audio(audio_data, audio_format, compact, vad, mode, transcription_backend, emotion_model)
+
+
+def _batch_record(index: int, item_id: Any, future) -> Dict[str, Any]:
+    record = {"index": index, "id": item_id}
+    try:
+        record.update(status="succeeded", result=future.result())
+    except PipelineStageError as e:
+        record.update(status="failed", stage=e.stage, error=str(e))
+    except Exception as e:
+        record.update(status="failed", stage=None, error=str(e))
+    return record
@@ -1,12 +1,23 @@
 """
 Shared prompts for agents. Import from here in psycological-analyser and audio-analyser.
 """
+import hashlib
 
-PSYCOLOGICAL_ANALYSIS = """
+
+def prompt_version(prompt: str) -> str:
+    """Short hash of a prompt's text; used in cache keys so editing a prompt invalidates its cached results."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+TRANSCRIPTION = "Transcribe the audio to text. Transcribe in the same language as the audio."
+
+# Static instructions go in the system message and the inputs in the user message: the identical prefix of
+# every request lets providers that cache prompts (e.g. OpenAI, automatically above 1024 tokens) reuse it.
+PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS = """
         You are an assistant performing NON-DIAGNOSTIC psychological text analysis for a certified psychologist.
 
         TASK
-        Analyze the following text written by a person and emotion. Identify emotional/mental-health *signals* strictly based on the text and emotion. Do NOT diagnose. Provide a reliability ("confiability") score and justify it.
+        Analyze the text written by a person and the emotion given in the user message. Identify emotional/mental-health *signals* strictly based on the text and emotion. Do NOT diagnose. Provide a reliability ("confiability") score and justify it.
         Use the emotion input and the text analysed to suggest a recommendation to help the person.
 
         EXAMPLES
@@ -28,52 +39,140 @@ PSYCOLOGICAL_ANALYSIS = """
         6) Should remove any sensitive data about the person, that could lead to privacy or identificate the person
 
         OUTPUT FORMAT (JSON ONLY; follow this schema exactly)
-        {{
+        {
         "disclaimer": "string (must mention certified psychologist and non-diagnostic nature)",
         "text_summary": "string (1-3 sentences, neutral)",
         "observed_cues": [
-            {{
+            {
             "cue": "string (direct quote or close paraphrase from the text)",
             "category": "string (e.g., mood/anxiety/stress/trauma/self-esteem/sleep/thought patterns)",
             "why_it_matters": "string (brief, non-diagnostic)"
-            }}
+            }
         ],
         "possible_interpretations": [
-            {{
+            {
             "interpretation": "string (cautious, non-diagnostic)",
-            }}
+            }
         ],
         "alternative_explanations_and_limitations": [
             "string (at least 3 items)"
         ],
-        "risk_screening": {{
+        "risk_screening": {
             "self_harm_or_suicide_signals": "none | unclear | possible | likely",
             "violence_or_imminent_danger_signals": "none | unclear | possible | likely",
             "recommended_action_if_risk": "string (only if possible/likely; otherwise empty string)"
-        }},
+        },
         "conclusion_for_psychologist": "string (3–6 sentences, cautious summary; no diagnosis)",
-        "confiability_score": {{
+        "confiability_score": {
             "score": "number (0-100)",
             "rating_label": "low | medium | high",
             "justification": [
             "string (specific reasons tied to text quality and evidence)"
             ]
-        }},
+        },
         "follow_up_questions_for_clinician": [
             "string (3–8 questions a psychologist could ask)"
         ],
         recommendation: "string"
-        }}
+        }
 
         COMPLETENESS CHECK (DO INTERNALLY BEFORE OUTPUT)
         - Did you include the disclaimer?
         - Did you avoid diagnosis?
         - Did you include cues, interpretations, limitations, risk screening, conclusion, confiability score + justification?
         - Is the output valid JSON only?
+    """
 
+PSYCOLOGICAL_ANALYSIS_INPUT = """
         INPUT TEXT (analyze this):
         <<<{text_to_analyse}>>>
 
         EMOTION (analyze this):
         <<<{emotion_to_analyse}>>>
     """
+
+# the audio analysis sends the same instructions with the recording in place of the text and emotion
+AUDIO_ANALYSIS_INPUT = "INPUT AUDIO (analyze what the person says and the emotion in the voice; apply the same rules and output format):"
+
+# both parts, for prompt_version
+PSYCOLOGICAL_ANALYSIS = PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS + PSYCOLOGICAL_ANALYSIS_INPUT
+
+# Single-call mode of the patient pipeline: transcription and analysis in one answer of the audio model.
+# "analysis" follows the same OUTPUT FORMAT as PSYCOLOGICAL_ANALYSIS (checked by agents.schema).
+TRANSCRIPTION_AND_ANALYSIS = """
+        You are an assistant performing NON-DIAGNOSTIC psychological analysis for a certified psychologist.
+
+        TASK
+        1) Transcribe the audio to text, in the same language as the audio.
+        2) Analyze the transcribed text together with the emotion detected in the voice by a separate model (given in the user message). Identify emotional/mental-health *signals* strictly based on the text and emotion. Do NOT diagnose. Provide a reliability ("confiability") score and justify it.
+        Use the emotion input and the text analysed to suggest a recommendation to help the person.
+
+        EXAMPLES
+
+        emotion: angry
+        recommendation : Breath deep using your nose and count to 10. After that, release the breath through your mouth
+
+        emotion: sad
+        recommendation : Call to a helping center for depression to talk about your issues. Try to spend more time in outdoor activities
+
+
+        NON-NEGOTIABLE RULES
+        1) Always include a disclaimer stating: this is only an analysis and must be used by a certified psychologist to provide any diagnosis.
+        2) Do NOT output a diagnosis or definitive disorder label. Avoid claims like "she has X". Use cautious language: "may indicate", "could be consistent with", "signals suggest".
+        3) Evidence-first order: (a) observed cues with quotes/paraphrases → (b) cautious interpretations → (c) alternative explanations/limitations → (d) conclusion for psychologist.
+        4) Risk handling: If the text suggests self-harm/suicidality/violence/imminent danger as possible or likely, include an urgent recommended action to seek immediate professional help (without diagnosing).
+        5) Output MUST be valid JSON ONLY (no markdown, no extra text).
+        6) The transcription is verbatim; the analysis should remove any sensitive data about the person, that could lead to privacy or identificate the person
+
+        OUTPUT FORMAT (JSON ONLY; follow this schema exactly)
+        {
+        "transcription": "string (verbatim transcription of the audio)",
+        "analysis": {
+            "disclaimer": "string (must mention certified psychologist and non-diagnostic nature)",
+            "text_summary": "string (1-3 sentences, neutral)",
+            "observed_cues": [
+                {
+                "cue": "string (direct quote or close paraphrase from the text)",
+                "category": "string (e.g., mood/anxiety/stress/trauma/self-esteem/sleep/thought patterns)",
+                "why_it_matters": "string (brief, non-diagnostic)"
+                }
+            ],
+            "possible_interpretations": [
+                {
+                "interpretation": "string (cautious, non-diagnostic)"
+                }
+            ],
+            "alternative_explanations_and_limitations": [
+                "string (at least 3 items)"
+            ],
+            "risk_screening": {
+                "self_harm_or_suicide_signals": "none | unclear | possible | likely",
+                "violence_or_imminent_danger_signals": "none | unclear | possible | likely",
+                "recommended_action_if_risk": "string (only if possible/likely; otherwise empty string)"
+            },
+            "conclusion_for_psychologist": "string (3–6 sentences, cautious summary; no diagnosis)",
+            "confiability_score": {
+                "score": "number (0-100)",
+                "rating_label": "low | medium | high",
+                "justification": [
+                "string (specific reasons tied to text quality and evidence)"
+                ]
+            },
+            "follow_up_questions_for_clinician": [
+                "string (3–8 questions a psychologist could ask)"
+            ],
+            "recommendation": "string"
+        }
+        }
+
+        COMPLETENESS CHECK (DO INTERNALLY BEFORE OUTPUT)
+        - Did you transcribe the whole audio?
+        - Did you include the disclaimer and avoid diagnosis?
+        - Did you include cues, interpretations, limitations, risk screening, conclusion, confiability score + justification?
+        - Is the output valid JSON only?
+    """
+
+TRANSCRIPTION_AND_ANALYSIS_INPUT = """
+        EMOTION DETECTED IN THE VOICE (analyze this):
+        <<<{emotion_to_analyse}>>>
+    """
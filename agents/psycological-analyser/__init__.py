@@ -1,3 +1,3 @@
-from .core import analyse_psicological_issue
+from .core import analyse_psicological_issue, get_psicological_analysis, stream_psicological_analysis
 
-__all__ = ["analyse_psicological_issue"]
+__all__ = ["analyse_psicological_issue", "get_psicological_analysis", "stream_psicological_analysis"]
@@ -1,9 +1,76 @@
 import json
 import requests
 from flask import jsonify
-from langchain_core.prompts import PromptTemplate
-from clients.openrouter import get_openrouter_client
-from agents.prompts import PSYCOLOGICAL_ANALYSIS
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from clients.openrouter import get_openrouter_client, OPENROUTER_CHAT_MODEL
+from agents.prompts import PSYCOLOGICAL_ANALYSIS, PSYCOLOGICAL_ANALYSIS_INPUT, PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS, prompt_version
+from helper import cache_key, result_cache, single_flight, llm_call, truncate_transcript
+
+def _analysis_chain():
+    # static instructions as the system message (a prefix the provider can cache), text and emotion in the user message
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content=PSYCOLOGICAL_ANALYSIS_INSTRUCTIONS),
+        ("human", PSYCOLOGICAL_ANALYSIS_INPUT),
+    ])
+    llm = get_openrouter_client(temperature=0.5, model_kwargs={"response_format": {"type": "json_object"}})
+    return prompt | llm
+
+
+def get_psicological_analysis(text, emotion):
+    """
+    Runs the psychological analysis chain and returns the parsed JSON as a dict.
+
+    Unlike analyse_psicological_issue it does not build a Flask response, so it can run in worker threads.
+    Results are cached by text, emotion, model and prompt version, and concurrent calls with the same
+    inputs share one model call (single flight). Transcripts longer than ANALYSIS_MAX_TRANSCRIPT_TOKENS
+    are shortened first, keeping their beginning and end.
+    """
+    text = truncate_transcript(text, OPENROUTER_CHAT_MODEL)
+    key = cache_key(text, emotion, OPENROUTER_CHAT_MODEL, prompt_version(PSYCOLOGICAL_ANALYSIS))
+    hit, analysis = result_cache.get("text_analysis", key)
+    if hit:
+        return analysis
+
+    def compute():
+        with llm_call(OPENROUTER_CHAT_MODEL, "llm_text_analysis") as call:
+            result = _analysis_chain().invoke({"text_to_analyse": text, "emotion_to_analyse": emotion})
+            call.record(result)
+
+        analysis = json.loads(result.content)
+        result_cache.set("text_analysis", key, analysis)
+        return analysis
+
+    return single_flight.do("text_analysis", key, compute, cache=result_cache)
+
+
+def stream_psicological_analysis(text, emotion):
+    """
+    Streams the psychological analysis as it is generated.
+
+    Yields the text chunks of the JSON answer as they arrive from the model; the generator's return
+    value (StopIteration.value, or `yield from`) is the parsed analysis dict. A cached analysis is
+    yielded as a single chunk. Long transcripts are shortened as in get_psicological_analysis.
+    """
+    text = truncate_transcript(text, OPENROUTER_CHAT_MODEL)
+    key = cache_key(text, emotion, OPENROUTER_CHAT_MODEL, prompt_version(PSYCOLOGICAL_ANALYSIS))
+    hit, analysis = result_cache.get("text_analysis", key)
+    if hit:
+        yield json.dumps(analysis, ensure_ascii=False)
+        return analysis
+
+    content = []
+    with llm_call(OPENROUTER_CHAT_MODEL, "llm_text_analysis") as call:
+        for chunk in _analysis_chain().stream({"text_to_analyse": text, "emotion_to_analyse": emotion}):
+            call.record(chunk)
+            if chunk.content:
+                content.append(chunk.content)
+                yield chunk.content
+
+    analysis = json.loads("".join(content))
+    result_cache.set("text_analysis", key, analysis)
+    return analysis
+
 
 def analyse_psicological_issue(text, emotion):
     """
@@ -11,10 +78,4 @@ def analyse_psicological_issue(text, emotion):
 
     It should analyse and indicate the confiability of the analysis
     """
-    prompt = PromptTemplate.from_template(PSYCOLOGICAL_ANALYSIS)
-
-    llm = get_openrouter_client(temperature=0.5, model_kwargs={"response_format": {"type": "json_object"}})
-    chain = prompt | llm
-    result = chain.invoke({"text_to_analyse": text, "emotion_to_analyse": emotion})
-
-    return jsonify(json.loads(result.content))
\ No newline at end of file
+    return jsonify(get_psicological_analysis(text, emotion))
\ No newline at end of file
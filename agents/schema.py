@@ -0,0 +1,93 @@
+"""
+Output schema of the psychological analysis (the OUTPUT FORMAT of prompts.PSYCOLOGICAL_ANALYSIS).
+"""
+
+from typing import Any, Dict, List
+
+RISK_LEVELS = ("none", "unclear", "possible", "likely")
+RATING_LABELS = ("low", "medium", "high")
+
+# top-level field -> expected type
+ANALYSIS_FIELDS = {
+    "disclaimer": str,
+    "text_summary": str,
+    "observed_cues": list,
+    "possible_interpretations": list,
+    "alternative_explanations_and_limitations": list,
+    "risk_screening": dict,
+    "conclusion_for_psychologist": str,
+    "confiability_score": dict,
+    "follow_up_questions_for_clinician": list,
+    "recommendation": str,
+}
+CUE_FIELDS = ("cue", "category", "why_it_matters")
+RISK_FIELDS = ("self_harm_or_suicide_signals", "violence_or_imminent_danger_signals", "recommended_action_if_risk")
+
+
+class AnalysisSchemaError(ValueError):
+    """Raised when a model answer does not follow the analysis schema; `errors` lists every problem found."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("Análise fora do formato esperado: " + "; ".join(errors))
+        self.errors = errors
+
+
+def analysis_schema_errors(analysis: Any) -> List[str]:
+    """
+    Checks an analysis against the schema and returns the problems found (empty when it is valid).
+
+    Args:
+        analysis: Parsed JSON answer of the model.
+
+    Returns:
+        list[str]: One message per missing field, wrong type or value outside the allowed ones.
+    """
+    if not isinstance(analysis, dict):
+        return [f"a análise deve ser um objeto JSON, não {type(analysis).__name__}"]
+
+    errors = []
+    for field, expected in ANALYSIS_FIELDS.items():
+        if field not in analysis:
+            errors.append(f"campo obrigatório ausente: {field}")
+        elif not isinstance(analysis[field], expected):
+            errors.append(f"{field} deve ser {expected.__name__}")
+
+    for index, cue in enumerate(analysis.get("observed_cues") or []):
+        if not isinstance(cue, dict) or any(key not in cue for key in CUE_FIELDS):
+            errors.append(f"observed_cues[{index}] deve ter {', '.join(CUE_FIELDS)}")
+
+    risk = analysis.get("risk_screening")
+    if isinstance(risk, dict):
+        for field in RISK_FIELDS:
+            if field not in risk:
+                errors.append(f"campo obrigatório ausente: risk_screening.{field}")
+        for field in RISK_FIELDS[:2]:
+            if field in risk and risk[field] not in RISK_LEVELS:
+                errors.append(f"risk_screening.{field} deve ser um de {', '.join(RISK_LEVELS)}")
+
+    score = analysis.get("confiability_score")
+    if isinstance(score, dict):
+        try:
+            if not 0 <= float(score.get("score")) <= 100:
+                errors.append("confiability_score.score deve estar entre 0 e 100")
+        except (TypeError, ValueError):
+            errors.append("confiability_score.score deve ser um número")
+        if score.get("rating_label") not in RATING_LABELS:
+            errors.append(f"confiability_score.rating_label deve ser um de {', '.join(RATING_LABELS)}")
+        if not isinstance(score.get("justification"), list):
+            errors.append("confiability_score.justification deve ser list")
+
+    return errors
+
+
+def validate_analysis(analysis: Any) -> Dict[str, Any]:
+    """
+    Returns the analysis unchanged when it follows the schema.
+
+    Raises:
+        AnalysisSchemaError: If any field is missing, has the wrong type or an unexpected value.
+    """
+    errors = analysis_schema_errors(analysis)
+    if errors:
+        raise AnalysisSchemaError(errors)
+    return analysis
@@ -7,4 +7,17 @@ openrouter_module = importlib.import_module(".openrouter", package="clients")
 get_open_ai_client = open_ai_module.get_open_ai_client
 get_openrouter_client = openrouter_module.get_openrouter_client
 get_openrouter_audio_client = openrouter_module.get_openrouter_audio_client
-__all__ = ["get_open_ai_client", "get_openrouter_client", "get_openrouter_audio_client"]
+from .registry import get_chat_client, get_http_client, registry_stats, ScheduledChatOpenAI
+from .scheduler import scheduler, OutboundScheduler, LLMQueueTimeoutError
+__all__ = [
+    "get_open_ai_client",
+    "get_openrouter_client",
+    "get_openrouter_audio_client",
+    "get_chat_client",
+    "get_http_client",
+    "registry_stats",
+    "ScheduledChatOpenAI",
+    "scheduler",
+    "OutboundScheduler",
+    "LLMQueueTimeoutError",
+]
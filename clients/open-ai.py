@@ -1,10 +1,11 @@
-from langchain_openai import ChatOpenAI
+from clients.registry import get_chat_client
 import os
 
 
 def get_open_ai_client(temperature):
     """
     Returns ChatOpenAI client from Langchain with the temperature passed.
+    The client is cached per temperature and reuses a shared keep-alive connection pool.
 
     Args:
         temperature (float): The temperature for response randomness (0.0 to 1.0).
@@ -12,7 +13,7 @@ def get_open_ai_client(temperature):
     Returns:
         ChatOpenAI: A configured ChatOpenAI client instance with JSON response format.
     """
-    open_ai_client = ChatOpenAI(
+    open_ai_client = get_chat_client(
         api_key=os.getenv('OPEN_AI_API_KEY'),
         temperature=temperature,
         model="gpt-3.5-turbo",
@@ -1,17 +1,26 @@
 import os
-from langchain_openai import ChatOpenAI
+from clients.registry import get_chat_client
+
+OPENROUTER_CHAT_MODEL = "openai/gpt-4o"
+OPENROUTER_AUDIO_MODEL = "openai/gpt-4o-audio-preview"
+# Points the clients at another OpenAI-compatible server, e.g. the local stub used by scripts.benchmark
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 
 def get_openrouter_client(temperature: float = 0.7, model_kwargs: dict = {}):
     """
     Returns a configured OpenRouter LangChain client for chat/chain usage (gpt-4o).
+
+    Clients are cached per settings and share a keep-alive connection pool (see clients.registry).
     """
-    return ChatOpenAI(
-        model="openai/gpt-4o",
+    return get_chat_client(
+        model=OPENROUTER_CHAT_MODEL,
         temperature=temperature,
         streaming=True,
+        # streamed answers only report token usage when asked to
+        stream_usage=True,
         api_key=os.getenv("OPENROUTER_API_KEY"),
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
         model_kwargs=model_kwargs,
         default_headers={
             "HTTP-Referer": "https://your-site.com",
@@ -23,13 +32,16 @@ def get_openrouter_client(temperature: float = 0.7, model_kwargs: dict = {}):
 def get_openrouter_audio_client(temperature: float = 0.0):
     """
     Returns a ChatOpenAI client configured for openai/gpt-4o-audio-preview (transcription, audio analysis).
+
+    Clients are cached per settings and share a keep-alive connection pool (see clients.registry).
     """
-    return ChatOpenAI(
-        model="openai/gpt-4o-audio-preview",
+    return get_chat_client(
+        model=OPENROUTER_AUDIO_MODEL,
         temperature=temperature,
         streaming=False,
+        stream_usage=True,
         api_key=os.getenv("OPENROUTER_API_KEY"),
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
         default_headers={
             "HTTP-Referer": "https://your-site.com",
             "X-Title": "My LangChain App"
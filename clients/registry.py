@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from contextvars import ContextVar
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from .scheduler import scheduler
+
+_lock = threading.Lock()
+_clients = {}
+_http_clients = {}
+# set while a request runs inside the scheduler, so the nested _generate -> _stream call is not scheduled twice
+_in_scheduler: ContextVar[bool] = ContextVar("in_llm_scheduler", default=False)
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI whose provider requests go through the shared outbound scheduler (clients.scheduler).
+
+    Both `invoke` and `stream` (and chains built on them) get the per-model concurrency and rate
+    limits, retries with backoff and, for non-streaming clients, optional hedging.
+    """
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        if _in_scheduler.get():
+            return generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return scheduler.call(
+            self.model_name,
+            lambda: _scheduled(generate, messages, stop=stop, run_manager=run_manager, **kwargs),
+            hedge=not self.streaming,
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        stream = super()._stream
+        if _in_scheduler.get():
+            yield from stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+        yield from scheduler.stream(
+            self.model_name, lambda: _scheduled_iter(stream, messages, stop=stop, run_manager=run_manager, **kwargs)
+        )
+
+
+def _scheduled(func, *args, **kwargs):
+    token = _in_scheduler.set(True)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _in_scheduler.reset(token)
+
+
+def _scheduled_iter(func, *args, **kwargs):
+    token = _in_scheduler.set(True)
+    try:
+        yield from func(*args, **kwargs)
+    finally:
+        _in_scheduler.reset(token)
+
+
+def _http_settings():
+    return {
+        "pool_size": int(os.getenv("LLM_HTTP_POOL_SIZE", "20")),
+        "timeout": float(os.getenv("LLM_HTTP_TIMEOUT", "120")),
+        "connect_timeout": float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10")),
+        "keepalive_expiry": float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+    }
+
+
+def get_http_client(base_url: str) -> httpx.Client:
+    """
+    Returns the shared keep-alive HTTP connection pool for a provider base URL.
+
+    Pool size and timeouts come from LLM_HTTP_POOL_SIZE, LLM_HTTP_TIMEOUT,
+    LLM_HTTP_CONNECT_TIMEOUT and LLM_HTTP_KEEPALIVE_EXPIRY. httpx.Client is thread-safe,
+    so one pool is shared by every client and Flask worker thread talking to that provider.
+    """
+    with _lock:
+        http_client = _http_clients.get(base_url)
+        if http_client is None:
+            settings = _http_settings()
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings["pool_size"],
+                    max_keepalive_connections=settings["pool_size"],
+                    keepalive_expiry=settings["keepalive_expiry"],
+                ),
+                timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+            )
+            _http_clients[base_url] = http_client
+        return http_client
+
+
+def get_chat_client(**settings) -> ChatOpenAI:
+    """
+    Returns a ChatOpenAI client for the given settings, creating it only on the first call.
+
+    Clients are keyed by all their settings (model, temperature, model_kwargs, api key, ...)
+    and reuse the shared HTTP pool of their base URL, so repeated calls do not pay for client
+    construction or new TLS connections. Requests go through the outbound scheduler, which owns
+    the retries, so the OpenAI SDK's own retries are off unless `max_retries` is given.
+
+    Args:
+        **settings: Keyword arguments accepted by ChatOpenAI. `base_url` selects the HTTP pool.
+
+    Returns:
+        ChatOpenAI: The cached client instance (a ScheduledChatOpenAI).
+    """
+    settings.setdefault("max_retries", 0)
+    key = json.dumps(settings, sort_keys=True, default=str)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    http_client = get_http_client(settings.get("base_url") or "https://api.openai.com/v1")
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ScheduledChatOpenAI(http_client=http_client, **settings)
+            _clients[key] = client
+        return client
+
+
+def registry_stats():
+    """Returns how many clients and HTTP pools are cached, plus the pool settings."""
+    with _lock:
+        return {
+            "clients": len(_clients),
+            "http_pools": sorted(_http_clients.keys()),
+            **_http_settings(),
+        }
@@ -0,0 +1,366 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+import openai
+
+
+class LLMQueueTimeoutError(RuntimeError):
+    """Raised when a request waited longer than the queue timeout for a free slot of its model."""
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (`retry-after-ms` or `retry-after` header), if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # HTTP-date form
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, connection errors and 5xx answers are worth another attempt."""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second refill a bucket of `burst` tokens.
+
+    Args:
+        rate: Requests per second; 0 disables the limit.
+        burst: Bucket size, i.e. how many requests may start back to back.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(0.0, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0 on success, otherwise the seconds until one is available."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def available(self) -> Optional[float]:
+        if not self.rate:
+            return None
+        with self._lock:
+            return round(min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate), 2)
+
+
+class ModelLimiter:
+    """Concurrency slots, rate limit and counters of one model."""
+
+    def __init__(self, max_concurrency: int, rate_per_second: float, burst: int):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self.counters = {
+            "waiting": 0,
+            "in_flight": 0,
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "failures": 0,
+            "queue_timeouts": 0,
+        }
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def block_for(self, seconds: float) -> None:
+        """Hold every new request of this model back, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, timeout: Optional[float]) -> bool:
+        """Wait for a slot and a rate-limit token; `timeout=0` only takes them if free right now."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        self.count("waiting")
+        try:
+            while True:
+                blocked = self._blocked_until - time.monotonic()
+                if blocked <= 0:
+                    break
+                if deadline is not None and time.monotonic() + blocked > deadline:
+                    return False
+                time.sleep(blocked)
+            acquired = self._slots.acquire(blocking=False) if timeout == 0 else self._slots.acquire(timeout=remaining())
+            if not acquired:
+                return False
+            while True:
+                wait_seconds = self.bucket.try_acquire()
+                if not wait_seconds:
+                    break
+                if deadline is not None and time.monotonic() + wait_seconds > deadline:
+                    self._slots.release()
+                    return False
+                time.sleep(wait_seconds)
+        finally:
+            self.count("waiting", -1)
+        self.count("in_flight")
+        self.count("requests")
+        return True
+
+    def release(self) -> None:
+        self.count("in_flight", -1)
+        self._slots.release()
+
+    def hedge_executor(self) -> ThreadPoolExecutor:
+        """Threads of the hedged attempts: one per slot, so an attempt holding a slot never waits for a thread."""
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="llm-hedge")
+            return self._hedge_executor
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            blocked = max(0.0, self._blocked_until - time.monotonic())
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.bucket.rate or None,
+            "burst": self.bucket.burst,
+            "tokens_available": self.bucket.available(),
+            "blocked_seconds": round(blocked, 2),
+            **counters,
+        }
+
+
+class OutboundScheduler:
+    """
+    Shared gate for outbound LLM requests: per-model concurrency and rate limits, retries and hedging.
+
+    Every model gets its own limiter, so a burst of transcriptions does not starve the text analysis.
+    Retryable failures (429, 5xx, timeouts, connection errors) are retried with full-jitter exponential
+    backoff; a Retry-After from the provider is honoured and also holds back the other requests of that
+    model. With `hedge_after_seconds`, a non-streaming request still running after that long gets a
+    duplicate when a slot is free, and the first answer wins.
+
+    Args:
+        max_concurrency: Requests in flight per model.
+        rate_per_second: Requests started per second per model (0 disables the rate limit).
+        burst: Token bucket size.
+        max_retries: Extra attempts after the first one.
+        retry_base_seconds: Backoff of the first retry; it doubles on every attempt.
+        retry_max_seconds: Longest wait between attempts; a longer Retry-After gives up instead.
+        hedge_after_seconds: Delay before hedging a slow request (None disables hedging).
+        queue_timeout_seconds: Longest wait for a slot before raising LLMQueueTimeoutError.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        rate_per_second: float = 0.0,
+        burst: int = 10,
+        max_retries: int = 3,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 30.0,
+        hedge_after_seconds: Optional[float] = None,
+        queue_timeout_seconds: Optional[float] = 60.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max(0, int(max_retries))
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.hedge_after_seconds = hedge_after_seconds or None
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "OutboundScheduler":
+        """Build a scheduler configured by the LLM_* variables (see the README)."""
+        hedge_ms = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))
+        queue_timeout = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            rate_per_second=float(os.getenv("LLM_RATE_LIMIT_PER_SECOND", "0")),
+            burst=int(os.getenv("LLM_RATE_LIMIT_BURST", "10")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            retry_base_seconds=float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5")),
+            retry_max_seconds=float(os.getenv("LLM_RETRY_MAX_SECONDS", "30")),
+            hedge_after_seconds=hedge_ms / 1000 if hedge_ms > 0 else None,
+            queue_timeout_seconds=queue_timeout if queue_timeout > 0 else None,
+        )
+
+    def limiter(self, model: str) -> ModelLimiter:
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limiter = self._limiters[model] = ModelLimiter(self.max_concurrency, self.rate_per_second, self.burst)
+            return limiter
+
+    def call(self, model: str, func: Callable[[], Any], hedge: bool = False) -> Any:
+        """Run `func()` (one provider request) under the model's limits, retrying retryable failures."""
+        limiter = self.limiter(model)
+        attempt = 0
+        while True:
+            try:
+                if hedge and self.hedge_after_seconds:
+                    return self._hedged(limiter, func)
+                return self._once(limiter, func)
+            except LLMQueueTimeoutError:
+                # no request was sent: counted as a queue timeout, not as a provider failure to retry
+                raise
+            except Exception as e:
+                delay = self._retry_delay(limiter, e, attempt)
+                if delay is None:
+                    limiter.count("failures")
+                    raise
+            attempt += 1
+            limiter.count("retries")
+            time.sleep(delay)
+
+    def stream(self, model: str, func: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """
+        Iterate `func()` (one streaming provider request) holding a slot of the model until it ends.
+
+        Only failures before the first chunk are retried; once output reached the caller a retry
+        would duplicate it.
+        """
+        limiter = self.limiter(model)
+        attempt = 0
+        while True:
+            self._acquire(limiter)
+            started_output = False
+            try:
+                for chunk in func():
+                    started_output = True
+                    yield chunk
+                return
+            except Exception as e:
+                delay = None if started_output else self._retry_delay(limiter, e, attempt)
+                if delay is None:
+                    limiter.count("failures")
+                    raise
+            finally:
+                limiter.release()
+            attempt += 1
+            limiter.count("retries")
+            time.sleep(delay)
+
+    def _acquire(self, limiter: ModelLimiter) -> None:
+        if not limiter.acquire(self.queue_timeout_seconds):
+            limiter.count("queue_timeouts")
+            raise LLMQueueTimeoutError(
+                f"Nenhuma vaga para chamar o LLM em {self.queue_timeout_seconds:g} s "
+                f"({limiter.max_concurrency} requisições simultâneas por modelo)"
+            )
+
+    def _once(self, limiter: ModelLimiter, func: Callable[[], Any]) -> Any:
+        self._acquire(limiter)
+        try:
+            return func()
+        finally:
+            limiter.release()
+
+    def _hedged(self, limiter: ModelLimiter, func: Callable[[], Any]) -> Any:
+        self._acquire(limiter)
+        executor = limiter.hedge_executor()
+
+        def run():
+            try:
+                return func()
+            finally:
+                limiter.release()
+
+        # copied contexts keep the caller's request-scoped state (e.g. Server-Timing) in the attempts
+        primary = executor.submit(copy_context().run, run)
+        done, _ = wait([primary], timeout=self.hedge_after_seconds)
+        if done or not limiter.acquire(timeout=0):
+            return primary.result()
+
+        limiter.count("hedged")
+        hedge = executor.submit(copy_context().run, run)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if future is hedge:
+                    limiter.count("hedge_wins")
+                # the slower request cannot be cancelled mid-flight; it finishes and frees its slot on its own
+                return result
+        raise error
+
+    def _retry_delay(self, limiter: ModelLimiter, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None when the error should be raised."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        if isinstance(error, openai.RateLimitError):
+            limiter.count("rate_limited")
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            if retry_after > self.retry_max_seconds:
+                return None
+            limiter.block_for(retry_after)
+            return retry_after + random.uniform(0, self.retry_base_seconds)
+        # full jitter: spreads the retries of requests that failed together
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings and, per model, slots in use, waiting requests and retry/hedge counters."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.rate_per_second or None,
+            "max_retries": self.max_retries,
+            "hedge_after_seconds": self.hedge_after_seconds,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "models": {model: limiter.stats() for model, limiter in sorted(limiters.items())},
+        }
+
+
+scheduler = OutboundScheduler.from_env()
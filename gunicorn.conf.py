@@ -0,0 +1,43 @@
+"""
+Configuração do gunicorn para produção:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY processos com WEB_THREADS threads cada. O app é carregado no processo pai (preload_app)
+e os workers compartilham os pesos do modelo de emoção por copy-on-write.
+"""
+import gc
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+# chamadas ao LLM e streams SSE podem levar minutos
+timeout = int(os.getenv('WEB_TIMEOUT', '300'))
+graceful_timeout = 30
+
+# Threads do torch por worker: sem limite, cada worker usaria todos os núcleos e eles disputariam a CPU.
+# As variáveis são definidas aqui porque o torch é importado ao carregar o app, logo depois desta configuração.
+torch_threads = os.getenv('EMOTION_TORCH_THREADS') or str(max(1, (os.cpu_count() or 1) // workers))
+os.environ['EMOTION_TORCH_THREADS'] = torch_threads
+os.environ.setdefault('OMP_NUM_THREADS', torch_threads)
+os.environ.setdefault('MKL_NUM_THREADS', torch_threads)
+
+# Sem coleta de ciclos no processo pai enquanto o app carrega, e objetos congelados antes de cada fork:
+# assim o coletor dos workers não escreve nas páginas herdadas e elas continuam compartilhadas.
+gc.disable()
+
+def when_ready(server):
+    # o app já foi carregado (preload_app) e os primeiros workers ainda não existem: o que foi criado
+    # até aqui é congelado e o processo pai volta a coletar ciclos dos objetos novos
+    gc.freeze()
+    gc.enable()
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.init_worker()
@@ -1,5 +1,73 @@
 """Project-wide helper utilities."""
 
+from .metrics import (
+    registry as metrics_registry, timed, timed_stage, llm_call, llm_usage, add_stage_observer,
+    start_request_timings, finish_request_timings, server_timing_header, instrument_flask_app,
+)
 from .file_converter import base64_to_temp_file
+from .audio_decoder import decode_audio_bytes, decode_audio_file, decode_base64_audio
+from .result_cache import ResultCache, result_cache, audio_digest, cache_key
+from .single_flight import SingleFlight, single_flight
+from .uploads import read_audio_upload, max_upload_bytes
+from .sse import format_sse
+from .jobs import JobManager, JobStore, JobQueueFullError
+from .audio_compaction import compact_audio, compaction_enabled, compaction_settings, compaction_stats
+from .audio_catalog import AudioCatalog, CatalogAudio, file_digest, probe_audio
+from .waveform_cache import WaveformCache, waveform_cache
+from .waveforms import load_waveform
+from .tokens import count_tokens, truncate_to_tokens, truncate_transcript, max_transcript_tokens, token_stats, preload_tokenizer
+from .env import env_flag
+from .vad import detect_speech, trim_silence, trim_audio_bytes, vad_enabled, vad_settings, vad_stats
 
-__all__ = ["base64_to_temp_file"]
+__all__ = [
+    "base64_to_temp_file",
+    "decode_audio_bytes",
+    "decode_audio_file",
+    "decode_base64_audio",
+    "ResultCache",
+    "result_cache",
+    "audio_digest",
+    "cache_key",
+    "SingleFlight",
+    "single_flight",
+    "read_audio_upload",
+    "max_upload_bytes",
+    "format_sse",
+    "JobManager",
+    "JobStore",
+    "JobQueueFullError",
+    "compact_audio",
+    "compaction_enabled",
+    "compaction_settings",
+    "compaction_stats",
+    "detect_speech",
+    "trim_silence",
+    "trim_audio_bytes",
+    "vad_enabled",
+    "vad_settings",
+    "vad_stats",
+    "count_tokens",
+    "truncate_to_tokens",
+    "truncate_transcript",
+    "max_transcript_tokens",
+    "preload_tokenizer",
+    "token_stats",
+    "AudioCatalog",
+    "CatalogAudio",
+    "WaveformCache",
+    "waveform_cache",
+    "load_waveform",
+    "file_digest",
+    "probe_audio",
+    "metrics_registry",
+    "timed",
+    "timed_stage",
+    "llm_call",
+    "llm_usage",
+    "add_stage_observer",
+    "start_request_timings",
+    "finish_request_timings",
+    "server_timing_header",
+    "instrument_flask_app",
+    "env_flag",
+]
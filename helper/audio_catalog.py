@@ -0,0 +1,305 @@
+"""Incrementally refreshed index of the audio files served by the API."""
+
+import base64
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import soundfile as sf
+
+from .audio_decoder import decode_audio_file
+from .waveform_cache import waveform_cache
+
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file read in chunks; the same digest helper.audio_digest gives for its bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_audio(path: str) -> Dict[str, Any]:
+    """Duration, sample rate and channels from the file header (None when libsndfile cannot read it)."""
+    try:
+        info = sf.info(path)
+    except (sf.LibsndfileError, RuntimeError):
+        return {"duration": None, "sample_rate": None, "channels": None}
+    return {
+        "duration": round(info.frames / info.samplerate, 3) if info.samplerate else None,
+        "sample_rate": info.samplerate,
+        "channels": info.channels,
+    }
+
+
+class CatalogAudio:
+    """
+    A catalogued file, accepted by the pipelines wherever audio bytes or base64 are.
+
+    Its digest is the indexed content hash, so cached stage results are found without opening the
+    file. The content is only read when a stage needs it: the upload to the audio model is encoded
+    straight from a memory map of the file, and the local models decode it from disk into the
+    shared WaveformCache, so frequently analysed files are decoded once.
+
+    Args:
+        entry: Catalog entry of the file.
+        path: Path of the file.
+    """
+
+    __slots__ = ("id", "name", "format", "content_hash", "path")
+
+    def __init__(self, entry: Dict[str, Any], path: str):
+        self.id = entry["id"]
+        self.name = entry["name"]
+        self.format = entry["format"]
+        self.content_hash = entry["content_hash"]
+        self.path = path
+
+    def read(self) -> bytes:
+        """Encoded content of the file, for the stages that rewrite it (silence trimming, compaction)."""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def base64(self) -> str:
+        """Base64 of the file, encoded from a memory map instead of a copy of its content."""
+        with open(self.path, "rb") as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return base64.b64encode(mapped).decode("ascii")
+            except ValueError:
+                # empty files cannot be mapped
+                return ""
+
+    def waveform(self, target_sr: int = 16000) -> np.ndarray:
+        """Mono float32 waveform at `target_sr`, read-only and shared through the waveform cache."""
+        return waveform_cache.get_or_decode(
+            self.content_hash, target_sr, lambda: decode_audio_file(self.path, self.format, target_sr)
+        )
+
+    def __repr__(self) -> str:
+        return f"CatalogAudio(id={self.id!r}, name={self.name!r})"
+
+
+class AudioCatalog:
+    """
+    Index of the audio files of a directory with their size, mtime, duration, sample rate, channels and content hash.
+
+    A refresh lists the directory and only probes and hashes the files whose size or mtime changed,
+    so unchanged recordings are never read again. Lookups refresh at most every `refresh_seconds`,
+    or sooner when the directory's own mtime changes (a file was added, removed or renamed). Every
+    change bumps `fingerprint`, which the API uses as the base of its ETags. With `index_path` the
+    index is saved as JSON and reloaded on startup, so a restart does not rehash the directory.
+
+    Args:
+        directory: Directory holding the audio files.
+        refresh_seconds: Longest time a listing may miss an in-place file change.
+        index_path: JSON file to persist the index; None keeps it in memory only.
+    """
+
+    def __init__(self, directory: str, refresh_seconds: float = 5.0, index_path: Optional[str] = None):
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._dir_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._scans = 0
+        self._probed = 0
+        self.fingerprint = ""
+        self._load_index()
+
+    @classmethod
+    def from_env(cls, directory: str) -> "AudioCatalog":
+        """Build a catalog configured by AUDIO_CATALOG_REFRESH_SECONDS and AUDIO_CATALOG_INDEX."""
+        return cls(
+            directory,
+            refresh_seconds=float(os.getenv("AUDIO_CATALOG_REFRESH_SECONDS", "5")),
+            index_path=os.getenv("AUDIO_CATALOG_INDEX") or None,
+        )
+
+    @property
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan the directory if it may have changed; returns True when the index changed."""
+        with self._lock:
+            try:
+                dir_mtime = os.stat(self.directory).st_mtime
+            except OSError:
+                dir_mtime = None
+            stale = time.monotonic() - self._checked_at >= self.refresh_seconds
+            if not force and not stale and dir_mtime == self._dir_mtime:
+                return False
+            changed = self._scan()
+            self._dir_mtime = dir_mtime
+            self._checked_at = time.monotonic()
+        if changed:
+            self._save_index()
+        return changed
+
+    def _scan(self) -> bool:
+        self._scans += 1
+        entries = {}
+        try:
+            listing = list(os.scandir(self.directory))
+        except OSError:
+            listing = []
+        for item in listing:
+            if not item.name.lower().endswith(AUDIO_EXTENSIONS) or not item.is_file():
+                continue
+            stat = item.stat()
+            entry = self._entries.get(item.name)
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = self._index_file(item.path, item.name, stat)
+            entries[item.name] = entry
+
+        unchanged = entries.keys() == self._entries.keys() and all(entries[name] is self._entries[name] for name in entries)
+        if unchanged and self.fingerprint:
+            return False
+        self._entries = entries
+        self._by_id = {entry["id"]: entry for entry in entries.values()}
+        self.fingerprint = hashlib.sha256(
+            "\n".join(f"{name}:{entries[name]['content_hash']}" for name in sorted(entries)).encode("utf-8")
+        ).hexdigest()[:32]
+        return True
+
+    def _index_file(self, path: str, name: str, stat: os.stat_result) -> Dict[str, Any]:
+        self._probed += 1
+        content_hash = file_digest(path)
+        return {
+            "id": content_hash[:16],
+            "name": name,
+            "format": name.rsplit(".", 1)[-1].lower(),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "content_hash": content_hash,
+            **probe_audio(path),
+        }
+
+    def list(
+        self,
+        audio_format: Optional[str] = None,
+        name_contains: Optional[str] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        page: int = 1,
+        page_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the files sorted by name, filtered and paged.
+
+        Args:
+            audio_format: Only this extension, e.g. "mp3".
+            name_contains: Case-insensitive substring of the file name.
+            min_duration: Minimum duration in seconds (files of unknown duration are left out).
+            max_duration: Maximum duration in seconds (files of unknown duration are left out).
+            page: 1-based page number.
+            page_size: Files per page; None returns every match.
+
+        Returns:
+            Dict with `audios` (the page), `total` (matches), `page`, `page_size` and `pages`.
+        """
+        self.refresh()
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry["name"])
+
+        if audio_format:
+            entries = [entry for entry in entries if entry["format"] == audio_format.lower().lstrip(".")]
+        if name_contains:
+            entries = [entry for entry in entries if name_contains.lower() in entry["name"].lower()]
+        if min_duration is not None:
+            entries = [entry for entry in entries if entry["duration"] is not None and entry["duration"] >= min_duration]
+        if max_duration is not None:
+            entries = [entry for entry in entries if entry["duration"] is not None and entry["duration"] <= max_duration]
+
+        total = len(entries)
+        if page_size:
+            start = (max(1, page) - 1) * page_size
+            entries = entries[start:start + page_size]
+        return {
+            "audios": [dict(entry) for entry in entries],
+            "total": total,
+            "page": max(1, page) if page_size else 1,
+            "page_size": page_size,
+            "pages": max(1, -(-total // page_size)) if page_size else 1,
+        }
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Entry of a file name, or None when it is not catalogued."""
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(name)
+        return dict(entry) if entry is not None else None
+
+    def get_by_id(self, audio_id: str) -> Optional[Dict[str, Any]]:
+        """Entry of a catalog id (the first 16 hex characters of the content hash), or None."""
+        self.refresh()
+        with self._lock:
+            entry = self._by_id.get(audio_id)
+        return dict(entry) if entry is not None else None
+
+    def resolve(self, audio_id: str) -> Optional[CatalogAudio]:
+        """CatalogAudio of a catalog id, to pass to the pipelines, or None when it is unknown."""
+        entry = self.get_by_id(audio_id)
+        return CatalogAudio(entry, os.path.join(self.directory, entry["name"])) if entry is not None else None
+
+    def resolve_name(self, name: str) -> Optional[CatalogAudio]:
+        """CatalogAudio of a file name, or None when it is not catalogued."""
+        entry = self.get(name)
+        return CatalogAudio(entry, os.path.join(self.directory, entry["name"])) if entry is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of files, scans and probed files and the current fingerprint."""
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "files": len(self._entries),
+                "fingerprint": self.fingerprint,
+                "scans": self._scans,
+                "files_probed": self._probed,
+                "refresh_seconds": self.refresh_seconds,
+                "index_path": self.index_path,
+            }
+
+    def _load_index(self) -> None:
+        if not self.index_path:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("directory") != os.path.abspath(self.directory):
+            return
+        # entries are only trusted while their size and mtime match; the first refresh checks that
+        self._entries = {entry["name"]: entry for entry in data.get("entries", [])}
+
+    def _save_index(self) -> None:
+        if not self.index_path:
+            return
+        with self._lock:
+            data = {"directory": os.path.abspath(self.directory), "entries": list(self._entries.values())}
+        try:
+            directory = os.path.dirname(os.path.abspath(self.index_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # the index file only saves work on the next startup
+            pass
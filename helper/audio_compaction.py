@@ -0,0 +1,114 @@
+"""Audio compaction: mono, 16 kHz, low-bitrate re-encoding before uploading audio to a provider."""
+
+import base64
+import io
+import os
+import threading
+from typing import Any, Dict, Tuple, Union
+
+import soundfile as sf
+
+from .audio_decoder import decode_audio_bytes
+from .env import env_flag
+from .metrics import timed
+
+# libsndfile's MPEG-2 Layer III encoder (used at 16 kHz) spans 8-160 kbps across compression levels 0-1
+_MP3_MIN_KBPS = 8
+_MP3_MAX_KBPS = 160
+
+_lock = threading.Lock()
+_totals = {"requests": 0, "compacted": 0, "original_bytes": 0, "compacted_bytes": 0}
+
+
+def compaction_enabled() -> bool:
+    """Whether compaction runs by default, from AUDIO_COMPACTION (default false)."""
+    return env_flag("AUDIO_COMPACTION", "false")
+
+
+def compaction_settings() -> Dict[str, Any]:
+    """Target sampling rate and bitrate, from AUDIO_COMPACTION_SAMPLE_RATE and AUDIO_COMPACTION_BITRATE_KBPS."""
+    return {
+        "sample_rate": int(os.getenv("AUDIO_COMPACTION_SAMPLE_RATE", "16000")),
+        "bitrate_kbps": int(os.getenv("AUDIO_COMPACTION_BITRATE_KBPS", "32")),
+    }
+
+
+def encode_mp3(audio_array, sample_rate: int, bitrate_kbps: int) -> bytes:
+    """
+    Encode a mono float32 waveform as constant-bitrate MP3 with soundfile.
+
+    Falls back to 16-bit PCM WAV when the local libsndfile has no MP3 encoder.
+    """
+    level = (_MP3_MAX_KBPS - bitrate_kbps) / (_MP3_MAX_KBPS - _MP3_MIN_KBPS)
+    buffer = io.BytesIO()
+    try:
+        sf.write(
+            buffer,
+            audio_array,
+            sample_rate,
+            format="MP3",
+            compression_level=min(max(level, 0.0), 0.99),
+            bitrate_mode="CONSTANT",
+        )
+    except (sf.LibsndfileError, ValueError, TypeError):
+        buffer = io.BytesIO()
+        sf.write(buffer, audio_array, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def compact_audio(
+    audio_data: Union[str, bytes],
+    audio_format: str = "wav",
+    sample_rate: int = None,
+    bitrate_kbps: int = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Downmix to mono, resample and re-encode audio into a compact format accepted by the audio model.
+
+    The compacted version is only used when it is smaller than the original; otherwise the original
+    payload is returned untouched.
+
+    Args:
+        audio_data: Base64-encoded audio or raw audio bytes.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        sample_rate: Target sampling rate (defaults to AUDIO_COMPACTION_SAMPLE_RATE).
+        bitrate_kbps: Target MP3 bitrate (defaults to AUDIO_COMPACTION_BITRATE_KBPS).
+
+    Returns:
+        (base64 payload, format, stats) where stats holds original/compacted sizes and bytes saved.
+    """
+    settings = compaction_settings()
+    sample_rate = sample_rate or settings["sample_rate"]
+    bitrate_kbps = bitrate_kbps or settings["bitrate_kbps"]
+
+    raw = base64.b64decode(audio_data, validate=True) if isinstance(audio_data, str) else audio_data
+    with timed("audio_compaction"):
+        audio_array = decode_audio_bytes(raw, audio_format, target_sr=sample_rate)
+        encoded = encode_mp3(audio_array, sample_rate, bitrate_kbps)
+    encoded_format = "mp3" if encoded[:4] != b"RIFF" else "wav"
+
+    compacted = len(encoded) < len(raw)
+    payload, payload_format = (encoded, encoded_format) if compacted else (raw, audio_format)
+    stats = {
+        "compacted": compacted,
+        "format": payload_format,
+        "sample_rate": sample_rate,
+        "bitrate_kbps": bitrate_kbps,
+        "original_bytes": len(raw),
+        "compacted_bytes": len(payload),
+        "bytes_saved": len(raw) - len(payload),
+    }
+    with _lock:
+        _totals["requests"] += 1
+        _totals["compacted"] += int(compacted)
+        _totals["original_bytes"] += len(raw)
+        _totals["compacted_bytes"] += len(payload)
+    return base64.b64encode(payload).decode("ascii"), payload_format, stats
+
+
+def compaction_stats() -> Dict[str, Any]:
+    """Cumulative compaction counters since the process started."""
+    with _lock:
+        totals = dict(_totals)
+    totals["bytes_saved"] = totals["original_bytes"] - totals["compacted_bytes"]
+    return {"enabled": compaction_enabled(), **compaction_settings(), **totals}
@@ -0,0 +1,108 @@
+"""In-memory audio decoding utilities."""
+
+import base64
+import io
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from .metrics import timed
+
+
+def decode_audio_bytes(raw: bytes, audio_format: str = "wav", target_sr: int = 16000) -> np.ndarray:
+    """
+    Decode encoded audio bytes into a mono float32 waveform at the target sampling rate.
+
+    The payload is decoded straight from a memory buffer with soundfile (wav, mp3, flac, ogg).
+    If the local libsndfile cannot read the format, it falls back to a temp file and librosa.
+    librosa is imported lazily so importing this module stays cheap.
+
+    Args:
+        raw: Encoded audio content.
+        audio_format: Format of the audio, e.g. "wav", "mp3". Only used by the fallback path.
+        target_sr: Sampling rate of the returned waveform.
+
+    Returns:
+        Mono float32 numpy array sampled at target_sr.
+    """
+    with timed("decode"):
+        try:
+            audio_array, sampling_rate = sf.read(io.BytesIO(raw), dtype="float32", always_2d=True)
+        except sf.LibsndfileError:
+            return _decode_via_temp_file(raw, audio_format, target_sr)
+
+        audio_array = audio_array.mean(axis=1)
+        if sampling_rate != target_sr:
+            import librosa
+
+            audio_array = librosa.resample(audio_array, orig_sr=sampling_rate, target_sr=target_sr, res_type="soxr_hq")
+        return np.ascontiguousarray(audio_array, dtype=np.float32)
+
+
+def decode_audio_file(path: str, audio_format: str = "wav", target_sr: int = 16000) -> np.ndarray:
+    """
+    Decode an audio file into a mono float32 waveform at the target sampling rate.
+
+    libsndfile reads the file directly, so the encoded content is never held in memory;
+    formats it cannot read go through librosa.
+
+    Args:
+        path: Path of the audio file.
+        audio_format: Format of the audio, e.g. "wav", "mp3". Kept for symmetry with decode_audio_bytes.
+        target_sr: Sampling rate of the returned waveform.
+
+    Returns:
+        Mono float32 numpy array sampled at target_sr.
+    """
+    with timed("decode"):
+        try:
+            audio_array, sampling_rate = sf.read(path, dtype="float32", always_2d=True)
+        except sf.LibsndfileError:
+            import librosa
+
+            audio_array, _ = librosa.load(path, sr=target_sr, mono=True)
+            return audio_array.astype(np.float32, copy=False)
+
+        audio_array = audio_array.mean(axis=1)
+        if sampling_rate != target_sr:
+            import librosa
+
+            audio_array = librosa.resample(audio_array, orig_sr=sampling_rate, target_sr=target_sr, res_type="soxr_hq")
+        return np.ascontiguousarray(audio_array, dtype=np.float32)
+
+
+def decode_base64_audio(base64_data: str, audio_format: str = "wav", target_sr: int = 16000) -> np.ndarray:
+    """
+    Decode base64 audio into a mono float32 waveform at the target sampling rate.
+
+    Args:
+        base64_data: Base64-encoded content (no data URL prefix).
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        target_sr: Sampling rate of the returned waveform.
+
+    Returns:
+        Mono float32 numpy array sampled at target_sr.
+    """
+    raw = base64.b64decode(base64_data, validate=True)
+    return decode_audio_bytes(raw, audio_format, target_sr)
+
+
+def _decode_via_temp_file(raw: bytes, audio_format: str, target_sr: int) -> np.ndarray:
+    suffix = f".{audio_format}" if not audio_format.startswith(".") else audio_format
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        try:
+            os.write(fd, raw)
+        finally:
+            os.close(fd)
+        import librosa
+
+        audio_array, _ = librosa.load(path, sr=target_sr, mono=True)
+        return audio_array.astype(np.float32, copy=False)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,8 @@
+"""Reading settings from environment variables."""
+
+import os
+
+
+def env_flag(name: str, default: str) -> bool:
+    """True when the variable (or `default`, if it is unset) is "1", "true" or "yes", in any case."""
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
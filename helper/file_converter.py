@@ -4,7 +4,10 @@ import base64
 import os
 import tempfile
 
+from .metrics import timed_stage
 
+
+@timed_stage("base64_to_temp_file")
 def base64_to_temp_file(base64_data: str, file_extension: str = "wav") -> str:
     """
     Decode base64 data and write to a temporary file. Caller must unlink the file when done.
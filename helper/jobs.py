@@ -0,0 +1,228 @@
+"""Background job execution with an in-memory store and optional SQLite persistence."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the number of queued and running jobs reached the configured limit."""
+
+
+class JobStore:
+    """
+    Keeps job records in memory and, when `sqlite_path` is set, mirrors them to a SQLite table.
+
+    Records expire `ttl_seconds` after they finish and are purged whenever jobs are read, listed
+    or submitted. On startup, jobs left queued or running in SQLite by a previous process are
+    marked as failed, since their work was lost with it.
+
+    Without SQLite the records live in the memory of one process: under a pre-fork server each
+    worker only knows its own jobs, so polling a job on another worker returns nothing.
+
+    Args:
+        ttl_seconds: How long finished jobs (and their results) are kept.
+        sqlite_path: SQLite database file; None keeps jobs in memory only.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, sqlite_path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        if sqlite_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL)"
+                )
+                self._fail_interrupted(conn)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.sqlite_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fail_interrupted(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute("SELECT id, data FROM jobs WHERE expires_at IS NULL").fetchall()
+        for job_id, data in rows:
+            job = json.loads(data)
+            job.update(status="failed", error="Job interrompido pela reinicialização do servidor")
+            job["finished_at"] = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE jobs SET data = ?, expires_at = ? WHERE id = ?",
+                (json.dumps(job, ensure_ascii=False), time.time() + self.ttl_seconds, job_id),
+            )
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Insert or update a job record; finished jobs get their expiry time. The store keeps its own copy."""
+        job = dict(job)
+        if job["status"] in ("succeeded", "failed"):
+            job.setdefault("expires_at", time.time() + self.ttl_seconds)
+        with self._lock:
+            self._jobs[job["id"]] = job
+            if self.sqlite_path:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO jobs (id, data, expires_at) VALUES (?, ?, ?)",
+                        (job["id"], json.dumps(job, ensure_ascii=False), job.get("expires_at")),
+                    )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if it does not exist or has expired."""
+        self.purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and self.sqlite_path:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row:
+                    job = json.loads(row[0])
+                    # jobs of other processes are only cached once finished, so their progress stays visible
+                    if job.get("expires_at"):
+                        self._jobs[job_id] = job
+            # a copy, so callers cannot change the stored record
+            return dict(job) if job is not None else None
+
+    def purge_expired(self) -> int:
+        """Drop expired jobs from memory and SQLite; returns how many were removed from memory."""
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.get("expires_at") and job["expires_at"] < now]
+            for job_id in expired:
+                del self._jobs[job_id]
+            if self.sqlite_path:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+            return len(expired)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the unexpired jobs currently held in memory."""
+        self.purge_expired()
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+class JobManager:
+    """
+    Runs registered job kinds on a bounded thread pool and records their progress in a JobStore.
+
+    Args:
+        store: Where job records are kept.
+        max_workers: Jobs running at the same time.
+        max_pending: Maximum queued plus running jobs; `submit` raises JobQueueFullError above it.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_pending: int = 100):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        """Build a manager configured by JOBS_MAX_WORKERS, JOBS_MAX_PENDING, JOBS_RESULT_TTL_SECONDS and JOBS_SQLITE_PATH."""
+        store = JobStore(
+            ttl_seconds=float(os.getenv("JOBS_RESULT_TTL_SECONDS", "3600")),
+            sqlite_path=os.getenv("JOBS_SQLITE_PATH") or None,
+        )
+        return cls(
+            store,
+            max_workers=int(os.getenv("JOBS_MAX_WORKERS", "2")),
+            max_pending=int(os.getenv("JOBS_MAX_PENDING", "100")),
+        )
+
+    def register(self, kind: str, handler: Callable[..., Any]) -> None:
+        """Register the function executed for jobs of `kind`; it must return a JSON-serializable result."""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._handlers)
+
+    def submit(self, kind: str, *args, **kwargs) -> Dict[str, Any]:
+        """
+        Queue a job and return its record immediately.
+
+        Raises:
+            KeyError: If `kind` is not registered.
+            JobQueueFullError: If `max_pending` jobs are already queued or running.
+        """
+        handler = self._handlers[kind]
+        with self._lock:
+            if self._queued + self._running >= self.max_pending:
+                raise JobQueueFullError(f"Fila de jobs cheia ({self.max_pending} jobs pendentes)")
+            self._queued += 1
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_ms": None,
+            "run_ms": None,
+            "result": None,
+            "error": None,
+        }
+        # finished jobs expire here too, so they do not pile up when nobody polls them
+        self.store.purge_expired()
+        self.store.save(job)
+        submitted = time.perf_counter()
+        self._executor.submit(self._run, job, handler, submitted, args, kwargs)
+        return dict(job)
+
+    def _run(self, job, handler, submitted, args, kwargs) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        # every update is a new record saved as a whole, so a poll never sees a half-updated job
+        job = {**job, "status": "running", "started_at": datetime.now().isoformat(), "queue_ms": round((started - submitted) * 1000, 1)}
+        self.store.save(job)
+        outcome = {"status": "failed"}
+        try:
+            outcome = {"status": "succeeded", "result": handler(*args, **kwargs)}
+        except Exception as e:
+            outcome = {"status": "failed", "error": str(e)}
+        finally:
+            with self._lock:
+                self._running -= 1
+            self.store.save({
+                **job,
+                **outcome,
+                "finished_at": datetime.now().isoformat(),
+                "run_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, running jobs, limits and the status counts of the stored jobs."""
+        counts: Dict[str, int] = {}
+        for job in self.store.list():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "ttl_seconds": self.store.ttl_seconds,
+                "sqlite_path": self.store.sqlite_path,
+                "jobs_by_status": counts,
+                "kinds": self.kinds,
+            }
@@ -0,0 +1,434 @@
+"""Lightweight in-process metrics (counters, gauges, histograms) rendered in the Prometheus text format."""
+
+import contextvars
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; covers fast decode steps up to long LLM calls
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# bytes; from small JSON bodies up to the 50 MB upload limit
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # one slot per bucket, then +Inf, sum and count
+                state = self._values[key] = [0.0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-2]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process metrics and renders them for a `/metrics` scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Text exposition format 0.0.4."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram("stage_duration_seconds", "Duration of each pipeline stage.", ["stage"])
+stage_in_flight = registry.gauge("stage_in_flight", "Stage executions currently running.", ["stage"])
+stage_errors = registry.counter("stage_errors_total", "Stage executions that raised an exception.", ["stage"])
+payload_size = registry.histogram("audio_payload_bytes", "Size of the audio received by the API.", ["route"], SIZE_BUCKETS)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens reported by the LLM provider (prompt, completion and the cached part of the prompt).",
+    ["model", "kind", "route"],
+)
+llm_calls = registry.counter("llm_calls_total", "LLM calls by model, operation and route.", ["model", "operation", "route"])
+llm_call_duration = registry.histogram(
+    "llm_call_duration_seconds", "Duration of LLM calls, up to the last streamed chunk.", ["model", "operation", "route"]
+)
+
+# stage timings of the current HTTP request, read by the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+# route of the current HTTP request; copied contexts carry it into the pipeline's worker threads
+_request_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_route", default=None)
+_observers: List[Callable[[str, float], None]] = []
+
+
+def add_stage_observer(observer: Callable[[str, float], None]) -> None:
+    """Call `observer(stage, seconds)` for every finished stage, e.g. to keep raw samples in a benchmark."""
+    _observers.append(observer)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Time a block as `stage`: duration histogram, in-flight gauge, error counter and, inside an
+    HTTP request that collects them, the request's Server-Timing breakdown.
+    """
+    stage_in_flight.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_in_flight.dec(stage=stage)
+        stage_duration.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+        for observer in _observers:
+            observer(stage, elapsed)
+
+
+def timed_stage(stage: str):
+    """Decorator form of `timed`."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class LLMCall:
+    """Token usage and duration of one LLM call, filled by `record` with the response or its streamed chunks."""
+
+    __slots__ = ("model", "operation", "route", "started", "seconds", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+    def __init__(self, model: str, operation: str, route: str):
+        self.model = model
+        self.operation = operation
+        self.route = route
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, message) -> None:
+        """Add the `usage_metadata` of a LangChain message or chunk (streams report it on the last chunk)."""
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+        self.prompt_tokens += usage.get("input_tokens", 0)
+        self.completion_tokens += usage.get("output_tokens", 0)
+        self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "operation": self.operation,
+            "route": self.route,
+            "ms": round(self.seconds * 1000, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+        }
+
+
+class LLMUsage:
+    """
+    Per route and model totals of LLM calls, tokens and time, plus the most recent calls.
+
+    Args:
+        recent: Number of individual calls kept for inspection.
+    """
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._recent = deque(maxlen=recent)
+
+    def add(self, call: LLMCall) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(
+                (call.route, call.model),
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "seconds": 0.0},
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += call.prompt_tokens
+            totals["completion_tokens"] += call.completion_tokens
+            totals["cached_tokens"] += call.cached_tokens
+            totals["seconds"] += call.seconds
+            self._recent.append({"at": datetime.now().isoformat(), **call.as_dict()})
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals per route and model with the mean latency and tokens per call, totals per model and the recent calls."""
+        with self._lock:
+            items = [(route, model, dict(totals)) for (route, model), totals in self._totals.items()]
+            recent = list(self._recent)
+        routes: Dict[str, Dict[str, Any]] = {}
+        models: Dict[str, Dict[str, float]] = {}
+        for route, model, totals in sorted(items):
+            routes.setdefault(route, {})[model] = _usage_summary(totals)
+            model_totals = models.setdefault(model, dict.fromkeys(totals, 0))
+            for key, value in totals.items():
+                model_totals[key] += value
+        return {
+            "routes": routes,
+            "models": {model: _usage_summary(totals) for model, totals in models.items()},
+            "recent": recent,
+        }
+
+
+def _usage_summary(totals: Dict[str, float]) -> Dict[str, Any]:
+    calls = totals["calls"] or 1
+    return {
+        "calls": totals["calls"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "cached_tokens": totals["cached_tokens"],
+        "mean_ms": round(totals["seconds"] * 1000 / calls, 1),
+        "mean_prompt_tokens": round(totals["prompt_tokens"] / calls, 1),
+        "mean_completion_tokens": round(totals["completion_tokens"] / calls, 1),
+    }
+
+
+llm_usage = LLMUsage()
+
+
+def _current_route() -> str:
+    route = _request_route.get()
+    if route is None:
+        # streamed responses run their generator after the request teardown, in a re-pushed request context
+        try:
+            from flask import has_request_context, request
+
+            if has_request_context() and request.url_rule is not None:
+                route = request.url_rule.rule
+        except ImportError:
+            pass
+    return route or "background"
+
+
+@contextmanager
+def llm_call(model: str, operation: str) -> Iterator[LLMCall]:
+    """
+    Time an LLM call as the `operation` stage and account its tokens per model and route.
+
+    Pass the response, or every streamed chunk, to `call.record`. Outside an HTTP request the
+    route is "background" (jobs, scripts).
+
+    Args:
+        model: Model id, e.g. OPENROUTER_CHAT_MODEL.
+        operation: Stage name, e.g. "llm_text_analysis".
+    """
+    call = LLMCall(model, operation, _current_route())
+    with timed(operation):
+        try:
+            yield call
+        finally:
+            call.seconds = time.perf_counter() - call.started
+            llm_calls.inc(model=model, operation=operation, route=call.route)
+            llm_call_duration.observe(call.seconds, model=model, operation=operation, route=call.route)
+            llm_tokens.inc(call.prompt_tokens, model=model, kind="prompt", route=call.route)
+            llm_tokens.inc(call.completion_tokens, model=model, kind="completion", route=call.route)
+            llm_tokens.inc(call.cached_tokens, model=model, kind="cached_prompt", route=call.route)
+            llm_usage.add(call)
+
+
+def start_request_timings() -> contextvars.Token:
+    """Start collecting stage timings for the current request; returns the token for `finish_request_timings`."""
+    return _request_timings.set({})
+
+
+def finish_request_timings(token: contextvars.Token) -> Dict[str, float]:
+    """Stop collecting and return the stage durations (seconds) recorded during the request."""
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """Format stage durations as a Server-Timing header value (milliseconds)."""
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the response (headers, for streamed responses).", ["method", "route", "status"]
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being handled.", ["route"])
+
+
+def instrument_flask_app(app, server_timing: bool = False, audio_routes: Sequence[str] = ()) -> None:
+    """
+    Record request latency, in-flight requests and, for `audio_routes`, the request body size.
+
+    Args:
+        app: Flask application.
+        server_timing: Add a Server-Timing header with the stage breakdown of each request.
+        audio_routes: URL rules whose request body is an audio payload.
+    """
+    from flask import g, request
+
+    audio_routes = set(audio_routes)
+
+    def route() -> str:
+        return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_route = route()
+        g.metrics_started = time.perf_counter()
+        g.metrics_token = start_request_timings()
+        g.metrics_route_token = _request_route.set(g.metrics_route)
+        http_in_flight.inc(route=g.metrics_route)
+        if g.metrics_route in audio_routes and request.content_length:
+            payload_size.observe(request.content_length, route=g.metrics_route)
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        timings = finish_request_timings(g.pop("metrics_token"))
+        http_duration.observe(elapsed, method=request.method, route=g.metrics_route, status=response.status_code)
+        if server_timing:
+            response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+        return response
+
+    @app.teardown_request
+    def _end_request_metrics(exc=None):
+        route_name = g.pop("metrics_route", None)
+        if route_name is not None:
+            http_in_flight.dec(route=route_name)
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            finish_request_timings(token)
+        route_token = g.pop("metrics_route_token", None)
+        if route_token is not None:
+            _request_route.reset(route_token)
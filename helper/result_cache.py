@@ -0,0 +1,190 @@
+"""Content-addressed cache for pipeline stage results (transcription, emotion, analyses)."""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .audio_catalog import CatalogAudio
+from .env import env_flag
+
+
+def audio_digest(audio_data: Union[str, bytes, CatalogAudio]) -> str:
+    """
+    SHA-256 of the decoded audio bytes, so the same recording hashes the same regardless of base64 wrapping.
+
+    Args:
+        audio_data: Raw audio bytes, base64-encoded content (no data URL prefix) or a catalogued file.
+
+    Returns:
+        Hex digest of the decoded bytes.
+    """
+    if isinstance(audio_data, CatalogAudio):
+        # the catalog already hashed the file with the same digest
+        return audio_data.content_hash
+    if isinstance(audio_data, str):
+        audio_data = base64.b64decode(audio_data, validate=True)
+    return hashlib.sha256(audio_data).hexdigest()
+
+
+def cache_key(*parts: Any) -> str:
+    """Combine key parts (content hash, format, model id, prompt version, ...) into one hex key."""
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable stage results.
+
+    The memory tier is an LRU bounded by entry count and by the size of the serialized values.
+    The optional disk tier stores one JSON file per entry under `disk_dir/<stage>/`, survives
+    restarts and is promoted into memory on hit. Hits and misses are counted per stage.
+
+    Args:
+        max_entries: Maximum number of entries in memory.
+        max_bytes: Maximum total size of the serialized values kept in memory.
+        disk_dir: Directory for the disk tier; None disables it.
+        enabled: When False, every lookup is a miss and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build a cache configured by RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_MB and RESULT_CACHE_DIR."""
+        return cls(
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            disk_dir=os.getenv("RESULT_CACHE_DIR") or None,
+            enabled=env_flag("RESULT_CACHE_ENABLED", "true"),
+        )
+
+    def get(self, stage: str, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value) for a stage/key, checking memory first and then disk."""
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._entries.get((stage, key))
+            if entry is not None:
+                self._entries.move_to_end((stage, key))
+                self._count(stage, "hits")
+                return True, entry[0]
+
+        value = self._read_disk(stage, key)
+        if value is not None:
+            self._store_memory(stage, key, value)
+            with self._lock:
+                self._count(stage, "disk_hits")
+            return True, value
+
+        with self._lock:
+            self._count(stage, "misses")
+        return False, None
+
+    def peek(self, stage: str, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value) from the memory tier only, without touching the LRU order or the counters."""
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._entries.get((stage, key))
+        return (True, entry[0]) if entry is not None else (False, None)
+
+    def set(self, stage: str, key: str, value: Any) -> None:
+        """Store a JSON-serializable value in memory and, when configured, on disk."""
+        if not self.enabled:
+            return
+        self._store_memory(stage, key, value)
+        self._write_disk(stage, key, value)
+
+    def get_or_compute(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value or call `compute`, store and return its result."""
+        hit, value = self.get(stage, key)
+        if hit:
+            return value
+        value = compute()
+        self.set(stage, key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-stage hit/miss counters and memory usage."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+                "stages": {stage: dict(counters) for stage, counters in self._counters.items()},
+            }
+
+    def _count(self, stage: str, counter: str) -> None:
+        counters = self._counters.setdefault(stage, {"hits": 0, "disk_hits": 0, "misses": 0})
+        counters[counter] += 1
+
+    def _store_memory(self, stage: str, key: str, value: Any) -> None:
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((stage, key), None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[(stage, key)] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def _disk_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.disk_dir, stage, key[:2], f"{key}.json")
+
+    def _read_disk(self, stage: str, key: str) -> Any:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(stage, key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, stage: str, key: str, value: Any) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(stage, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError:
+            # the disk tier is best effort; the memory tier already holds the value
+            pass
+
+
+result_cache = ResultCache.from_env()
@@ -0,0 +1,87 @@
+"""Coalescing of identical in-flight computations (single flight)."""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+from .env import env_flag
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers of the same stage/key share one computation.
+
+    The first caller (the leader) runs the function; callers arriving while it runs wait for it and
+    get the same result, or the same exception. Nothing is kept once the call finishes, that is the
+    result cache's job: given `cache`, the leader looks the key up again before computing, so a caller
+    that just missed a finished flight reads its cached result instead of starting another one.
+
+    Args:
+        enabled: When False, every call computes on its own.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        """Build an instance configured by SINGLE_FLIGHT_ENABLED."""
+        return cls(enabled=env_flag("SINGLE_FLIGHT_ENABLED", "true"))
+
+    def do(self, stage: str, key: str, compute: Callable[[], Any], cache=None) -> Any:
+        """
+        Return `compute()`, or the result of an identical call already running.
+
+        Args:
+            stage: Stage name, e.g. "transcription"; also used for the counters.
+            key: Identity of the computation within the stage (e.g. a cache_key of the audio digest and settings).
+            compute: The computation; it stores its own result in the cache when that is worth it.
+            cache: ResultCache checked by the leader before computing.
+        """
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            flight = self._flights.get((stage, key))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(stage, key)] = Future()
+            self._count(stage, "leaders" if leader else "coalesced")
+
+        if not leader:
+            return flight.result()
+
+        try:
+            hit, value = cache.peek(stage, key) if cache is not None else (False, None)
+            if not hit:
+                value = compute()
+        except BaseException as e:
+            self._finish(stage, key)
+            flight.set_exception(e)
+            raise
+        self._finish(stage, key)
+        flight.set_result(value)
+        return value
+
+    def _finish(self, stage: str, key: str) -> None:
+        with self._lock:
+            self._flights.pop((stage, key), None)
+
+    def _count(self, stage: str, counter: str) -> None:
+        counters = self._counters.setdefault(stage, {"leaders": 0, "coalesced": 0})
+        counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the computations in flight and, per stage, how many calls led or joined one."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._flights),
+                "stages": {stage: dict(counters) for stage, counters in self._counters.items()},
+            }
+
+
+single_flight = SingleFlight.from_env()
@@ -0,0 +1,19 @@
+"""Server-Sent Events formatting."""
+
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload.
+
+    Args:
+        event: Event name (the `event:` field read by EventSource listeners).
+        data: JSON-serializable payload.
+
+    Returns:
+        The event text, terminated by the blank line that delimits SSE messages.
+    """
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,117 @@
+"""Token counting and token-aware truncation of the text sent to the LLMs."""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import registry
+
+# used when tiktoken (the `tokens` extra) is missing or cannot load its encoding, e.g. offline
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...]\n"
+
+truncations = registry.counter("llm_input_truncations_total", "Texts shortened to fit their token limit.", ["stage"])
+
+_lock = threading.Lock()
+_encodings: Dict[str, Any] = {}
+_stats = {"truncated": 0, "tokens_removed": 0}
+
+
+def _encoding(model: str):
+    """tiktoken encoding of a model ("openai/gpt-4o" and "gpt-4o" alike), or None when it is unavailable."""
+    name = model.split("/", 1)[-1]
+    with _lock:
+        if name in _encodings:
+            return _encodings[name]
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        encoding = None
+    with _lock:
+        _encodings[name] = encoding
+    return encoding
+
+
+def preload_tokenizer(model: str = "gpt-4o", background: bool = False) -> None:
+    """
+    Load the tokenizer of `model` ahead of the first request.
+
+    tiktoken downloads the BPE file of an encoding the first time it is used (cached under
+    TIKTOKEN_CACHE_DIR), which would otherwise happen inside a request. With `background` the
+    load runs in a daemon thread. When it fails, the length estimate is used from then on.
+    """
+    if background:
+        threading.Thread(target=_encoding, args=(model,), name="tokenizer-preload", daemon=True).start()
+    else:
+        _encoding(model)
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Number of tokens of `text` for `model`; estimated from its length when tiktoken is unavailable."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> Tuple[str, int]:
+    """
+    Shorten a text to at most `max_tokens`, keeping its beginning and its end.
+
+    Two thirds of the budget go to the beginning and the rest to the end, joined by TRUNCATION_MARKER,
+    so both the opening of a long account and its conclusion reach the model.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Token budget; 0 or less keeps the text whole.
+        model: Model whose tokenizer is used.
+
+    Returns:
+        tuple: The (possibly shortened) text and the number of tokens removed.
+    """
+    if max_tokens <= 0:
+        return text, 0
+    encoding = _encoding(model)
+    if encoding is None:
+        total = count_tokens(text, model)
+        if total <= max_tokens:
+            return text, 0
+        head, tail = (max_tokens * 2 // 3) * CHARS_PER_TOKEN, (max_tokens - max_tokens * 2 // 3) * CHARS_PER_TOKEN
+        return text[:head] + TRUNCATION_MARKER + (text[-tail:] if tail else ""), total - max_tokens
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text, 0
+    head = max_tokens * 2 // 3
+    tail = max_tokens - head
+    shortened = encoding.decode(tokens[:head]) + TRUNCATION_MARKER + (encoding.decode(tokens[-tail:]) if tail else "")
+    return shortened, len(tokens) - max_tokens
+
+
+def max_transcript_tokens() -> int:
+    """Token limit of the transcript sent to the text analysis, from ANALYSIS_MAX_TRANSCRIPT_TOKENS (0 disables)."""
+    return int(os.getenv("ANALYSIS_MAX_TRANSCRIPT_TOKENS", "8000"))
+
+
+def truncate_transcript(text: str, model: str, max_tokens: Optional[int] = None, stage: str = "text_analysis") -> str:
+    """Apply the transcript token limit (default: ANALYSIS_MAX_TRANSCRIPT_TOKENS) and count the truncations."""
+    text, removed = truncate_to_tokens(text, max_transcript_tokens() if max_tokens is None else max_tokens, model)
+    if removed:
+        truncations.inc(stage=stage)
+        with _lock:
+            _stats["truncated"] += 1
+            _stats["tokens_removed"] += removed
+    return text
+
+
+def token_stats() -> Dict[str, Any]:
+    """Return the transcript limit, whether tiktoken is in use and the truncation counters."""
+    with _lock:
+        stats = dict(_stats)
+        tokenizers = {name: encoding.name if encoding is not None else "estimate" for name, encoding in _encodings.items()}
+    return {"max_transcript_tokens": max_transcript_tokens(), "tokenizers": tokenizers, **stats}
@@ -0,0 +1,99 @@
+"""Reading raw and multipart audio uploads from a Flask request."""
+
+import os
+from typing import Tuple
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+CHUNK_SIZE = 64 * 1024
+
+MIMETYPE_FORMATS = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/vnd.wave": "wav",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/ogg": "ogg",
+}
+
+
+def max_upload_bytes() -> int:
+    """Maximum accepted audio body size, from MAX_AUDIO_UPLOAD_MB (default 50 MB)."""
+    return int(float(os.getenv("MAX_AUDIO_UPLOAD_MB", "50")) * 1024 * 1024)
+
+
+def _read_chunks(stream, max_bytes: int) -> bytearray:
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise RequestEntityTooLarge(f"Áudio excede o limite de {max_bytes / (1024 * 1024):g} MB")
+    # returned as is: converting to bytes would copy the whole upload
+    return buffer
+
+
+AUDIO_FORMATS = frozenset(MIMETYPE_FORMATS.values())
+
+
+def _format_from(filename: str, mimetype: str, default: str) -> str:
+    if filename and "." in filename:
+        return filename.rsplit(".", 1)[-1].lower()
+    return MIMETYPE_FORMATS.get((mimetype or "").split(";")[0].strip().lower(), default)
+
+
+def _checked_format(audio_format: str) -> str:
+    audio_format = audio_format.lower()
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Formato de áudio não suportado: '{audio_format}' (use {', '.join(sorted(AUDIO_FORMATS))})")
+    return audio_format
+
+
+def read_audio_upload(request, max_bytes: int = None) -> Tuple[bytearray, str]:
+    """
+    Read audio sent as a raw `audio/*` body or as a multipart file upload, in fixed-size chunks.
+
+    Multipart uploads use the `audio` field (or the first file sent). The format comes from the
+    `audio_format` query/form field, then the file extension, then the content type, and must be one
+    of AUDIO_FORMATS.
+
+    Args:
+        request: The current Flask request.
+        max_bytes: Size limit; defaults to MAX_AUDIO_UPLOAD_MB.
+
+    Returns:
+        (audio bytes, audio format); the bytes are the read buffer itself, without a copy.
+
+    Raises:
+        RequestEntityTooLarge: If the body is larger than the limit.
+        ValueError: If no audio was sent or its format is not supported.
+    """
+    max_bytes = max_bytes or max_upload_bytes()
+    if request.content_length is not None and request.content_length > max_bytes + CHUNK_SIZE:
+        raise RequestEntityTooLarge(f"Áudio excede o limite de {max_bytes / (1024 * 1024):g} MB")
+
+    requested_format = request.args.get("audio_format")
+    if request.mimetype == "multipart/form-data":
+        # lets werkzeug stop parsing as soon as the multipart body crosses the limit
+        request.max_content_length = max_bytes + CHUNK_SIZE
+        upload = request.files.get("audio") or next(iter(request.files.values()), None)
+        if upload is None:
+            raise ValueError("Envie o arquivo de áudio no campo 'audio'")
+        audio_format = _checked_format(
+            requested_format or request.form.get("audio_format") or _format_from(upload.filename, upload.mimetype, "wav")
+        )
+        raw = _read_chunks(upload.stream, max_bytes)
+    else:
+        if not request.mimetype.startswith("audio/") and request.mimetype != "application/octet-stream":
+            raise ValueError("Envie o áudio como corpo audio/* ou multipart/form-data")
+        audio_format = _checked_format(requested_format or _format_from("", request.mimetype, "wav"))
+        raw = _read_chunks(request.stream, max_bytes)
+
+    if not raw:
+        raise ValueError("Corpo da requisição sem áudio")
+    return raw, audio_format
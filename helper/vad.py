@@ -0,0 +1,166 @@
+"""Energy-based voice activity detection: finds speech segments and drops the silence between them."""
+
+import io
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from .audio_decoder import decode_audio_bytes
+from .env import env_flag
+from .metrics import timed
+
+_lock = threading.Lock()
+_totals = {"requests": 0, "input_seconds": 0.0, "speech_seconds": 0.0}
+
+
+def vad_enabled() -> bool:
+    """Whether silence trimming runs by default, from VAD_ENABLED (default false)."""
+    return env_flag("VAD_ENABLED", "false")
+
+
+def vad_settings() -> Dict[str, Any]:
+    """Detection settings from VAD_THRESHOLD_DB, VAD_FRAME_MS, VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS and VAD_PADDING_MS."""
+    return {
+        "threshold_db": float(os.getenv("VAD_THRESHOLD_DB", "-35")),
+        "frame_ms": int(os.getenv("VAD_FRAME_MS", "30")),
+        "min_speech_ms": int(os.getenv("VAD_MIN_SPEECH_MS", "250")),
+        "min_silence_ms": int(os.getenv("VAD_MIN_SILENCE_MS", "300")),
+        "padding_ms": int(os.getenv("VAD_PADDING_MS", "150")),
+    }
+
+
+def detect_speech(
+    audio_array: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -35.0,
+    frame_ms: int = 30,
+    min_speech_ms: int = 250,
+    min_silence_ms: int = 300,
+    padding_ms: int = 150,
+) -> List[Tuple[int, int]]:
+    """
+    Find speech in a mono waveform from the energy of short frames.
+
+    A frame is speech when its RMS level is within `threshold_db` of the loudest frame (and above
+    -50 dBFS). Pauses shorter than `min_silence_ms` are bridged, bursts shorter than `min_speech_ms`
+    are dropped and every segment is widened by `padding_ms` so word onsets and endings are kept.
+
+    Args:
+        audio_array: Mono float32 waveform.
+        sample_rate: Sampling rate of the waveform.
+        threshold_db: Level, relative to the loudest frame, above which a frame counts as speech.
+        frame_ms: Analysis frame length.
+        min_speech_ms: Shortest segment kept.
+        min_silence_ms: Shortest pause that splits two segments.
+        padding_ms: Margin added around each segment.
+
+    Returns:
+        (start, end) sample indices of each speech segment, in order and non-overlapping.
+    """
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio_array) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio_array[: n_frames * frame].reshape(n_frames, frame)
+    level_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+    threshold = max(level_db.max() + threshold_db, -50.0)
+    voiced = np.flatnonzero(level_db > threshold)
+    if len(voiced) == 0:
+        return []
+
+    # runs of consecutive voiced frames, bridging pauses shorter than min_silence_ms
+    max_gap = max(1, int(min_silence_ms / frame_ms))
+    breaks = np.flatnonzero(np.diff(voiced) > max_gap)
+    run_starts = np.concatenate(([voiced[0]], voiced[breaks + 1]))
+    run_ends = np.concatenate((voiced[breaks], [voiced[-1]])) + 1
+
+    min_frames = max(1, int(min_speech_ms / frame_ms))
+    padding = int(sample_rate * padding_ms / 1000)
+    segments: List[Tuple[int, int]] = []
+    for run_start, run_end in zip(run_starts, run_ends):
+        if run_end - run_start < min_frames:
+            continue
+        start = max(0, int(run_start) * frame - padding)
+        end = min(len(audio_array), int(run_end) * frame + padding)
+        if segments and start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+    return segments
+
+
+def trim_silence(audio_array: np.ndarray, sample_rate: int, **settings) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Keep only the speech of a waveform, concatenating its segments.
+
+    When no speech is found the waveform is returned unchanged, so a quiet recording is never
+    reduced to nothing.
+
+    Args:
+        audio_array: Mono float32 waveform.
+        sample_rate: Sampling rate of the waveform.
+        **settings: Overrides for detect_speech (defaults come from vad_settings()).
+
+    Returns:
+        (trimmed waveform, report) where the report lists the `segments` in seconds, the input and
+        speech durations and the `removed_fraction` of the audio.
+    """
+    with timed("vad"):
+        segments = detect_speech(audio_array, sample_rate, **{**vad_settings(), **settings})
+    if segments:
+        trimmed = np.concatenate([audio_array[start:end] for start, end in segments])
+    else:
+        trimmed = audio_array
+
+    input_seconds = len(audio_array) / sample_rate
+    speech_seconds = len(trimmed) / sample_rate
+    with _lock:
+        _totals["requests"] += 1
+        _totals["input_seconds"] += input_seconds
+        _totals["speech_seconds"] += speech_seconds
+
+    report = {
+        "speech_detected": bool(segments),
+        "segments": [{"start": round(start / sample_rate, 2), "end": round(end / sample_rate, 2)} for start, end in segments],
+        "input_seconds": round(input_seconds, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "removed_fraction": round(1 - speech_seconds / input_seconds, 4) if input_seconds else 0.0,
+    }
+    return trimmed, report
+
+
+def trim_audio_bytes(raw: bytes, audio_format: str = "wav", sample_rate: int = 16000) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Decode encoded audio, trim its silence and re-encode the speech as 16-bit PCM WAV.
+
+    Args:
+        raw: Encoded audio content.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        sample_rate: Sampling rate of the decoded and returned audio.
+
+    Returns:
+        (WAV bytes, report) with the same report as trim_silence.
+    """
+    trimmed, report = trim_silence(decode_audio_bytes(raw, audio_format, target_sr=sample_rate), sample_rate)
+    buffer = io.BytesIO()
+    sf.write(buffer, trimmed, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue(), report
+
+
+def vad_stats() -> Dict[str, Any]:
+    """Cumulative seconds analysed and kept since the process started."""
+    with _lock:
+        totals = dict(_totals)
+    removed = 1 - totals["speech_seconds"] / totals["input_seconds"] if totals["input_seconds"] else 0.0
+    return {
+        "enabled": vad_enabled(),
+        **vad_settings(),
+        "requests": totals["requests"],
+        "input_seconds": round(totals["input_seconds"], 2),
+        "speech_seconds": round(totals["speech_seconds"], 2),
+        "removed_fraction": round(removed, 4),
+    }
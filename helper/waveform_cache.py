@@ -0,0 +1,83 @@
+"""Bounded in-memory cache of decoded waveforms."""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+
+class WaveformCache:
+    """
+    LRU of decoded waveforms keyed by content hash and sampling rate, bounded by their total size.
+
+    Decoding (and resampling) a recording costs far more than the model's feature extraction for
+    short clips, so audios that are analysed again and again, such as the catalogued files of
+    `audios/`, are decoded once. Cached arrays are read-only, since every caller shares them.
+
+    Args:
+        max_bytes: Maximum total size of the cached arrays; 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_env(cls) -> "WaveformCache":
+        """Build a cache configured by AUDIO_WAVEFORM_CACHE_MB."""
+        return cls(max_bytes=int(float(os.getenv("AUDIO_WAVEFORM_CACHE_MB", "256")) * 1024 * 1024))
+
+    def get_or_decode(self, content_hash: str, sampling_rate: int, decode: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Return the cached waveform of a recording, or decode, store and return it.
+
+        Args:
+            content_hash: Hash of the encoded file, e.g. the catalog's `content_hash`.
+            sampling_rate: Sampling rate the waveform was decoded at.
+            decode: Produces the waveform on a miss.
+        """
+        key = (content_hash, sampling_rate)
+        with self._lock:
+            waveform = self._entries.get(key)
+            if waveform is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return waveform
+            self._misses += 1
+
+        waveform = decode()
+        waveform.setflags(write=False)
+        if 0 < waveform.nbytes <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = waveform
+                    self._bytes += waveform.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return waveform
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number and size of the cached waveforms and the hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+waveform_cache = WaveformCache.from_env()
@@ -0,0 +1,36 @@
+"""Decoded waveforms shared by the local models of a request."""
+
+import base64
+from typing import Union
+
+import numpy as np
+
+from .audio_catalog import CatalogAudio
+from .audio_decoder import decode_audio_bytes
+from .result_cache import audio_digest, cache_key
+from .single_flight import single_flight
+from .waveform_cache import waveform_cache
+
+
+def load_waveform(audio: Union[str, bytes, CatalogAudio], audio_format: str = "wav", target_sr: int = 16000) -> np.ndarray:
+    """
+    Mono float32 waveform of a recording at `target_sr`, decoded once for every local model that needs it.
+
+    Uploads and base64 payloads go through the same waveform cache as the catalogued files, keyed by the
+    digest of their bytes, and concurrent stages asking for the same recording (the emotion prediction and
+    the local transcription of one request) wait for a single decode. The array is read-only.
+
+    Args:
+        audio: Encoded audio bytes, base64-encoded content or a catalogued file.
+        audio_format: Format of the audio, e.g. "wav", "mp3".
+        target_sr: Sampling rate of the returned waveform.
+    """
+    if isinstance(audio, CatalogAudio):
+        return audio.waveform(target_sr)
+    raw = base64.b64decode(audio, validate=True) if isinstance(audio, str) else audio
+    digest = audio_digest(raw)
+    return single_flight.do(
+        "decode",
+        cache_key(digest, target_sr),
+        lambda: waveform_cache.get_or_decode(digest, target_sr, lambda: decode_audio_bytes(raw, audio_format, target_sr)),
+    )
@@ -1,20 +1,97 @@
-from flask import request, Flask, jsonify, send_from_directory, send_file
+from flask import request, Blueprint, Flask, jsonify, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv, set_key, find_dotenv
-from agents import analyse_psicological_issue
+# Carrega o .env antes dos agentes: batcher, cache e pools leem a configuração na importação
+load_dotenv()
+from agents import analyse_psicological_issue, analyse_patient_audio, analyse_patient_batch, stream_patient_audio, PipelineStageError
+from agents import PIPELINE_MODES, AnalysisSchemaError
+from clients import registry_stats, scheduler as llm_scheduler, LLMQueueTimeoutError
+from clients.openrouter import OPENROUTER_CHAT_MODEL
+from helper import result_cache, single_flight, read_audio_upload, format_sse, JobManager, JobQueueFullError, compaction_stats, vad_stats
+from helper import metrics_registry, instrument_flask_app, AudioCatalog, waveform_cache, llm_usage, token_stats, env_flag
+from helper import preload_tokenizer
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
+import json
+import time
+import hashlib
 from datetime import datetime
 import importlib
 audio_analyser = importlib.import_module("agents.audio-analyser")
 transcribe_audio_file = audio_analyser.transcribe_audio
 analyse_audio_psicological_issue = audio_analyser.analyse_audio_psicological_issue
+stream_audio_psicological_analysis = audio_analyser.stream_audio_psicological_analysis
+get_transcription = audio_analyser.get_transcription
+get_audio_psicological_analysis = audio_analyser.get_audio_psicological_analysis
+local_transcriber = audio_analyser.local_transcriber
+TRANSCRIPTION_BACKENDS = audio_analyser.TRANSCRIPTION_BACKENDS
 emotion_analyser = importlib.import_module("agents.emotion-analyser")
 predict_emotion_from_base64 = emotion_analyser.predict_emotion_from_base64
-load_dotenv()
-app = Flask(__name__)
-CORS(app)  # Habilita CORS para permitir requisições do frontend
+predict_emotion_timeline_from_base64 = emotion_analyser.predict_emotion_timeline_from_base64
+predict_emotion_from_bytes = emotion_analyser.predict_emotion_from_bytes
+predict_emotion_timeline_from_bytes = emotion_analyser.predict_emotion_timeline_from_bytes
+emotion_batcher = emotion_analyser.batcher
+emotion_model_holder = emotion_analyser.model_holder
+EmotionQueueFullError = emotion_analyser.EmotionQueueFullError
+EmotionTimelineTooLongError = emotion_analyser.EmotionTimelineTooLongError
+# Rotas registradas em um Blueprint; a aplicação é montada por create_app (servidor de desenvolvimento ou wsgi.py)
+api = Blueprint('api', __name__)
+
+# Jobs assíncronos: as análises longas rodam em um pool limitado de workers em segundo plano
+job_manager = JobManager.from_env()
+job_manager.register('patient', analyse_patient_audio)
+job_manager.register('audio-analysis', get_audio_psicological_analysis)
+job_manager.register('transcription', lambda audio_data, audio_format: {"transcription": get_transcription(audio_data, audio_format)})
+job_manager.register('emotion', lambda audio_data, audio_format: {
+    "emotion": (predict_emotion_from_base64 if isinstance(audio_data, str) else predict_emotion_from_bytes)(audio_data, audio_format)
+})
+
+# Catálogo da pasta audios: indexada uma vez e atualizada de forma incremental (mtime), com ETag nas listagens
+audio_catalog = AudioCatalog.from_env(os.path.join(os.path.dirname(__file__), 'audios'))
+
+# Rotas com áudio no corpo: o tamanho do payload entra nas métricas
+AUDIO_ROUTES = [
+    '/transcribe-audio', '/predict-emotion', '/analyse-audio-psycological-issue', '/analyse-patient-psychological-issue',
+    '/transcribe-audio/upload', '/predict-emotion/upload', '/analyse-patient-psychological-issue/upload',
+    '/analyse-patient-psychological-issue/stream', '/analyse-audio-psycological-issue/stream', '/jobs',
+    '/analyse-patient-psychological-issue/batch',
+]
+
+def create_app(model_loading=None):
+    """
+    Cria a aplicação Flask com as rotas da API.
 
-@app.route('/', methods=['GET'])
+    model_loading define quando o modelo de emoção é carregado:
+    "background" (padrão) em uma thread, para as rotas leves responderem imediatamente;
+    "now" antes de retornar e sem aquecimento, no processo pai do gunicorn (ver wsgi.py);
+    "lazy" na primeira requisição. Sem valor, EMOTION_MODEL_PRELOAD=false equivale a "lazy".
+    """
+    if model_loading is None:
+        model_loading = 'background' if env_flag('EMOTION_MODEL_PRELOAD', 'true') else 'lazy'
+    if model_loading not in ('background', 'now', 'lazy'):
+        raise ValueError(f"model_loading inválido: {model_loading} (use 'background', 'now' ou 'lazy')")
+
+    app = Flask(__name__)
+    CORS(app)  # Habilita CORS para permitir requisições do frontend
+    app.register_blueprint(api)
+
+    # Métricas Prometheus em /metrics; SERVER_TIMING_HEADER=true adiciona o detalhamento por etapa em cada resposta
+    instrument_flask_app(app, server_timing=env_flag('SERVER_TIMING_HEADER', 'false'), audio_routes=AUDIO_ROUTES)
+
+    if model_loading == 'background':
+        emotion_analyser.preload_model(background=True, warmup=env_flag('EMOTION_MODEL_WARMUP', 'true'))
+    elif model_loading == 'now':
+        # sem inferência no processo pai: o pool de threads do torch não sobrevive ao fork dos workers
+        emotion_model_holder.preload(background=False, warmup=False)
+    # com TRANSCRIPTION_BACKEND=local o Whisper local é carregado junto com o modelo de emoção
+    if model_loading != 'lazy' and os.getenv('TRANSCRIPTION_BACKEND', 'openrouter').lower() == 'local':
+        local_transcriber.preload(background=model_loading == 'background')
+    # o tokenizador da análise de texto (tiktoken) baixa seu arquivo no primeiro uso: melhor aqui do que numa requisição
+    if model_loading != 'lazy':
+        preload_tokenizer(OPENROUTER_CHAT_MODEL, background=model_loading == 'background')
+    return app
+
+@api.route('/', methods=['GET'])
 def home():
     """Rota raiz que retorna informações sobre a API"""
     return jsonify({
@@ -38,7 +115,7 @@ def home():
         "status": "operacional"
     })
 
-@app.route('/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health_check():
     """Health check da API"""
     try:
@@ -56,7 +133,22 @@ def health_check():
                 "openrouter_configured": bool(openrouter_key and openrouter_key.startswith('sk-or-v1')),
                 "flask_operacional": True,
                 "langchain_operacional": True
-            }
+            },
+            "emotion_model": emotion_model_holder.status(),
+            "emotion_models": emotion_analyser.registry.stats(),
+            "local_transcription_model": local_transcriber.status(),
+            "emotion_batcher": emotion_batcher.stats(),
+            "llm_clients": registry_stats(),
+            "llm_scheduler": llm_scheduler.stats(),
+            "llm_usage": llm_usage.stats(),
+            "llm_input_tokens": token_stats(),
+            "result_cache": result_cache.stats(),
+            "single_flight": single_flight.stats(),
+            "audio_catalog": audio_catalog.stats(),
+            "waveform_cache": waveform_cache.stats(),
+            "audio_compaction": compaction_stats(),
+            "vad": vad_stats(),
+            "jobs": job_manager.stats()
         }
         
         # Adiciona warnings se alguma configuração estiver faltando
@@ -79,129 +171,487 @@ def health_check():
             "error": str(e)
         }), 500
 
-@app.route('/transcribe-audio', methods=['POST'])
+@api.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 apenas quando o modelo de emoção está carregado"""
+    status = emotion_model_holder.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+def _flag_option(options, name):
+    """Lê uma opção booleana (JSON, formulário ou query string); None usa o padrão configurado por variável de ambiente"""
+    value = options.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def _audio_flags(options):
+    """Opções "compact" (compactação do áudio enviado ao OpenRouter) e "vad" (remoção de silêncio)"""
+    return _flag_option(options, 'compact'), _flag_option(options, 'vad')
+
+def _pipeline_mode(options):
+    """Opção "pipeline_mode" ("two_call" ou "single_call"); None usa PATIENT_PIPELINE_MODE. Retorna (modo, resposta de erro)"""
+    mode = options.get('pipeline_mode')
+    if mode is None or mode in PIPELINE_MODES:
+        return mode, None
+    return None, (jsonify({"error": f"pipeline_mode inválido: {mode}", "pipeline_modes": list(PIPELINE_MODES)}), 400)
+
+def _transcription_backend(options):
+    """Opção "transcription_backend" ("openrouter" ou "local"); None usa TRANSCRIPTION_BACKEND. Retorna (backend, resposta de erro)"""
+    backend = options.get('transcription_backend')
+    if backend is None or backend in TRANSCRIPTION_BACKENDS:
+        return backend, None
+    return None, (jsonify({"error": f"transcription_backend inválido: {backend}", "transcription_backends": list(TRANSCRIPTION_BACKENDS)}), 400)
+
+def _emotion_model(options):
+    """Opção "emotion_model" (nome de um modelo de EMOTION_MODELS); None usa EMOTION_MODEL. Retorna (modelo, resposta de erro)"""
+    model = options.get('emotion_model')
+    if model is None or model in emotion_analyser.registry.names:
+        return model, None
+    return None, (jsonify({"error": f"emotion_model inválido: {model}", "emotion_models": list(emotion_analyser.registry.names)}), 400)
+
+# Valores lidos no momento da coleta (scrape), a partir das estatísticas já mantidas pelos componentes
+emotion_model_ready_gauge = metrics_registry.gauge('emotion_model_ready', 'Modelo de emoção carregado (1) ou não (0).')
+emotion_queue_gauge = metrics_registry.gauge('emotion_batch_queue_depth', 'Requisições aguardando o lote de emoção.')
+jobs_gauge = metrics_registry.gauge('jobs', 'Jobs assíncronos por estado.', ['state'])
+cache_entries_gauge = metrics_registry.gauge('result_cache_entries', 'Entradas no cache de resultados em memória.')
+cache_lookups_gauge = metrics_registry.gauge('result_cache_lookups', 'Consultas ao cache de resultados por etapa e resultado.', ['stage', 'result'])
+single_flight_gauge = metrics_registry.gauge('single_flight_calls', 'Chamadas por etapa que executaram o cálculo (leaders) ou aguardaram um idêntico em andamento (coalesced).', ['stage', 'role'])
+llm_queue_gauge = metrics_registry.gauge('llm_requests', 'Chamadas ao LLM por modelo: aguardando vaga (waiting) e em andamento (in_flight).', ['model', 'state'])
+llm_scheduler_gauge = metrics_registry.gauge('llm_scheduler_events', 'Totais do agendador de chamadas ao LLM por modelo (requisições, retries, 429, hedges, falhas).', ['model', 'event'])
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    emotion_model_ready_gauge.set(1 if emotion_model_holder.ready else 0)
+    emotion_queue_gauge.set(emotion_batcher.stats()["queue_depth"])
+    jobs = job_manager.stats()
+    jobs_gauge.set(jobs["queued"], state='queued')
+    jobs_gauge.set(jobs["running"], state='running')
+    cache = result_cache.stats()
+    cache_entries_gauge.set(cache["entries"])
+    for stage, counters in cache["stages"].items():
+        for result, value in counters.items():
+            cache_lookups_gauge.set(value, stage=stage, result=result)
+    for stage, counters in single_flight.stats()["stages"].items():
+        for role, value in counters.items():
+            single_flight_gauge.set(value, stage=stage, role=role)
+    for model, state in llm_scheduler.stats()["models"].items():
+        llm_queue_gauge.set(state["waiting"], model=model, state='waiting')
+        llm_queue_gauge.set(state["in_flight"], model=model, state='in_flight')
+        for event in ('requests', 'retries', 'rate_limited', 'hedged', 'hedge_wins', 'failures', 'queue_timeouts'):
+            llm_scheduler_gauge.set(state[event], model=model, event=event)
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+def _json_audio(data):
+    """
+    Áudio de uma requisição JSON: "audio_data" em base64 ou "audio_id" de um arquivo do catálogo (/list-audios).
+    Retorna (áudio, formato, None) ou (None, None, resposta de erro).
+    """
+    audio_id = data.get('audio_id')
+    if audio_id:
+        # o arquivo é lido do disco pelo servidor, sem ida e volta do conteúdo em base64
+        audio = audio_catalog.resolve(str(audio_id))
+        if audio is None:
+            return None, None, (jsonify({"error": f"audio_id não encontrado no catálogo: {audio_id}"}), 404)
+        return audio, audio.format, None
+    audio_data = data.get('audio_data')
+    if not audio_data:
+        return None, None, (jsonify({"error": "audio_data ou audio_id é obrigatório"}), 400)
+    return audio_data, data.get('audio_format', 'wav'), None
+
+@api.route('/transcribe-audio', methods=['POST'])
 def transcribe_audio():
     data = request.get_json()
-    audio_data = data.get('audio_data')
-    audio_format = data.get('audio_format', 'wav')
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
 
-    if not audio_data:
-        return jsonify({"error": "audio_data é obrigatório"}), 400
+    backend, error = _transcription_backend(data)
+    if error:
+        return error
 
-    result = transcribe_audio_file(audio_data, audio_format)
+    result = transcribe_audio_file(audio_data, audio_format, *_audio_flags(data), backend)
     return result
 
-@app.route('/analyse-audio-psycological-issue', methods=['POST'])
+@api.route('/analyse-audio-psycological-issue', methods=['POST'])
 def analyse_audio_psicological_issue_route():
     data = request.get_json()
-    audio_data = data.get('audio_data')
-    audio_format = data.get('audio_format', 'wav')
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
 
-    if not audio_data:
-        return jsonify({"error": "audio_data é obrigatório"}), 400
-
-    result = analyse_audio_psicological_issue(audio_data, audio_format)
+    result = analyse_audio_psicological_issue(audio_data, audio_format, *_audio_flags(data))
     return result
 
-@app.route('/predict-emotion', methods=['POST'])
+@api.route('/predict-emotion', methods=['POST'])
 def predict_emotion():
     data = request.get_json()
-    audio_data = data.get('audio_data')
-    audio_format = data.get('audio_format', 'wav')
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
 
-    if not audio_data:
-        return jsonify({"error": "audio_data é obrigatório"}), 400
-    result = predict_emotion_from_base64(audio_data, audio_format)
-    return jsonify({ "emotion": result })
+    return _predict_emotion_response(audio_data, audio_format, data)
+
+def _predict_emotion_response(audio_data, audio_format, options):
+    """Executa a predição de emoção para áudio em base64 (str), bytes de upload ou arquivo do catálogo"""
+    from_bytes = not isinstance(audio_data, str)
+    model, error = _emotion_model(options)
+    if error:
+        return error
+
+    # mode "timeline" analisa o áudio inteiro em janelas sobrepostas de 30 s
+    if options.get('mode') == 'timeline':
+        try:
+            window_seconds = float(options.get('window_seconds', 30.0))
+            hop_seconds = float(options.get('hop_seconds', 15.0))
+        except (ValueError, TypeError):
+            window_seconds = hop_seconds = None
+        if window_seconds is None or not 0 < window_seconds <= 30 or not 0 < hop_seconds < float('inf'):
+            return jsonify({"error": "window_seconds deve estar entre 0 e 30 e hop_seconds deve ser positivo"}), 400
+        predict_timeline = predict_emotion_timeline_from_bytes if from_bytes else predict_emotion_timeline_from_base64
+        try:
+            result = predict_timeline(audio_data, audio_format, window_seconds, hop_seconds, model=model)
+        except EmotionTimelineTooLongError as e:
+            return jsonify({"error": str(e)}), 413
+        return jsonify(result)
 
-@app.route('/analyse-patient-psychological-issue', methods=['POST'])
+    try:
+        predict = predict_emotion_from_bytes if from_bytes else predict_emotion_from_base64
+        vad_report = {}
+        result = predict(audio_data, audio_format, vad=_flag_option(options, 'vad'), vad_report=vad_report, model=model)
+    except EmotionQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    response = { "emotion": result }
+    if vad_report:
+        response["vad"] = vad_report
+    return jsonify(response)
+
+@api.route('/analyse-patient-psychological-issue', methods=['POST'])
 def analyse_patient_psychological_issue():
     data = request.get_json()
-    audio_data = data.get('audio_data')
-    audio_format = data.get('audio_format', 'wav')
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
 
-    if not audio_data:
-        return jsonify({"error": "audio_data é obrigatório"}), 400
+    return _patient_pipeline_response(audio_data, audio_format, data)
+
+def _patient_pipeline_response(audio_data, audio_format, options):
+    mode, error = _pipeline_mode(options)
+    if error:
+        return error
+    backend, error = _transcription_backend(options)
+    if error:
+        return error
+    emotion_model, error = _emotion_model(options)
+    if error:
+        return error
+    try:
+        result = analyse_patient_audio(audio_data, audio_format, *_audio_flags(options), mode, backend, emotion_model)
+    except PipelineStageError as e:
+        if isinstance(e.error, (EmotionQueueFullError, LLMQueueTimeoutError)):
+            status = 503
+        else:
+            # resposta do modelo fora do schema da análise (modo single_call)
+            status = 502 if isinstance(e.error, AnalysisSchemaError) else 500
+        return jsonify({"error": str(e), "stage": e.stage}), status
+
+    return jsonify(result)
+
+# Variantes com upload binário: corpo audio/* (ex.: audio/mpeg) ou multipart/form-data com o campo "audio".
+# Evitam o base64 dentro do JSON (33% maior) e as cópias extras do payload em memória.
+def _read_upload():
+    """Lê o áudio enviado; retorna ((bytes, formato), None) ou (None, resposta de erro)"""
+    try:
+        return read_audio_upload(request), None
+    except RequestEntityTooLarge as e:
+        return None, (jsonify({"error": e.description}), 413)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+def _upload_options():
+    """Opções das rotas de upload: campos do formulário multipart ou a query string"""
+    return request.form if request.mimetype == 'multipart/form-data' else request.args
+
+@api.route('/transcribe-audio/upload', methods=['POST'])
+def transcribe_audio_upload():
+    upload, error = _read_upload()
+    if error:
+        return error
+    audio_bytes, audio_format = upload
+    backend, error = _transcription_backend(_upload_options())
+    if error:
+        return error
+    return transcribe_audio_file(audio_bytes, audio_format, *_audio_flags(_upload_options()), backend)
 
-    result = transcribe_audio_file(audio_data, audio_format)
-    # transcribe_audio_file returns a Flask Response or (Response, status_code) on error
-    if isinstance(result, tuple):
-        return result
-    response_data = result.get_json()
-    transcription = response_data.get('transcription', '') if isinstance(response_data, dict) else ''
+@api.route('/predict-emotion/upload', methods=['POST'])
+def predict_emotion_upload():
+    upload, error = _read_upload()
+    if error:
+        return error
+    audio_bytes, audio_format = upload
+    return _predict_emotion_response(audio_bytes, audio_format, _upload_options())
 
-    emotion_result = predict_emotion_from_base64(audio_data, audio_format)
-    psychological_response = analyse_psicological_issue(transcription, emotion_result)
-    psychological_data = psychological_response.get_json() if hasattr(psychological_response, 'get_json') else psychological_response
+@api.route('/analyse-patient-psychological-issue/upload', methods=['POST'])
+def analyse_patient_psychological_issue_upload():
+    upload, error = _read_upload()
+    if error:
+        return error
+    audio_bytes, audio_format = upload
+    return _patient_pipeline_response(audio_bytes, audio_format, _upload_options())
+
+# Variantes com streaming (Server-Sent Events): cada etapa concluída é enviada assim que termina
+# e os tokens da análise chegam conforme o modelo os gera.
+def _sse_response(events):
+    def generate():
+        for event, data in events:
+            yield format_sse(event, data)
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api.route('/analyse-patient-psychological-issue/stream', methods=['POST'])
+def analyse_patient_psychological_issue_stream():
+    data = request.get_json()
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
+
+    mode, error = _pipeline_mode(data)
+    if error:
+        return error
+    backend, error = _transcription_backend(data)
+    if error:
+        return error
+    emotion_model, error = _emotion_model(data)
+    if error:
+        return error
+
+    return _sse_response(stream_patient_audio(audio_data, audio_format, *_audio_flags(data), mode, backend, emotion_model))
+
+@api.route('/analyse-audio-psycological-issue/stream', methods=['POST'])
+def analyse_audio_psicological_issue_stream():
+    data = request.get_json()
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
+
+    def events():
+        chunks = stream_audio_psicological_analysis(audio_data, audio_format, *_audio_flags(data))
+        try:
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as stop:
+                    yield "result", stop.value
+                    return
+                yield "token", {"content": chunk}
+        except Exception as e:
+            yield "error", {"stage": "analysis", "error": f"Erro na análise do áudio: {str(e)}"}
+
+    return _sse_response(events())
+
+# Lote: vários áudios em uma requisição; cada item é respondido em NDJSON (uma linha JSON) assim que termina
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '500'))
+
+def _batch_item_loader(item):
+    """Leitura do áudio de um item: inline ("audio_data" em base64) ou do catálogo ("audio_id" ou "audio_file" da pasta audios)"""
+    def load():
+        if not isinstance(item, dict):
+            raise ValueError("cada item deve ser um objeto")
+        if item.get('audio_data'):
+            return item['audio_data'], item.get('audio_format', 'wav')
+        if item.get('audio_id'):
+            audio = audio_catalog.resolve(str(item['audio_id']))
+            if audio is None:
+                raise FileNotFoundError(f"audio_id não encontrado no catálogo: {item['audio_id']}")
+            return audio, audio.format
+        filename = item.get('audio_file')
+        if not filename:
+            raise ValueError("audio_data, audio_id ou audio_file é obrigatório")
+        audio = audio_catalog.resolve_name(str(filename))
+        if audio is None:
+            raise FileNotFoundError(f"Arquivo não encontrado: {filename}")
+        return audio, item.get('audio_format') or audio.format
+    return load
+
+@api.route('/analyse-patient-psychological-issue/batch', methods=['POST'])
+def analyse_patient_psychological_issue_batch():
+    data = request.get_json()
+    items = data.get('items')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items deve ser uma lista não vazia"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"O lote aceita no máximo {BATCH_MAX_ITEMS} itens"}), 400
+
+    max_concurrency = data.get('max_concurrency')
+    if max_concurrency is not None and (not isinstance(max_concurrency, int) or max_concurrency < 1):
+        return jsonify({"error": "max_concurrency deve ser um inteiro positivo"}), 400
+    mode, error = _pipeline_mode(data)
+    if error:
+        return error
+    backend, error = _transcription_backend(data)
+    if error:
+        return error
+    emotion_model, error = _emotion_model(data)
+    if error:
+        return error
+
+    entries = [
+        (item.get('id', index) if isinstance(item, dict) else index, _batch_item_loader(item))
+        for index, item in enumerate(items)
+    ]
+    records = analyse_patient_batch(
+        entries, *_audio_flags(data), max_concurrency=max_concurrency, mode=mode, transcription_backend=backend,
+        emotion_model=emotion_model,
+    )
+
+    def generate():
+        started = time.perf_counter()
+        counts = {"succeeded": 0, "failed": 0}
+        for record in records:
+            counts[record["status"]] += 1
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        summary = {"total": len(entries), **counts, "total_ms": round((time.perf_counter() - started) * 1000, 1)}
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# API de jobs assíncronos: o envio retorna um job_id imediatamente (202) e o resultado é consultado depois
+@api.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    kind = data.get('pipeline', 'patient')
+    audio_data, audio_format, error = _json_audio(data)
+    if error:
+        return error
+    if kind not in job_manager.kinds:
+        return jsonify({"error": f"pipeline inválido: {kind}", "pipelines": job_manager.kinds}), 400
+
+    try:
+        job = job_manager.submit(kind, audio_data, audio_format)
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
 
     return jsonify({
-        "resume": psychological_data,
-        "emotion": emotion_result,
-        "transcription": transcription
-    })
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+        "result_url": f"/jobs/{job['id']}/result"
+    }), 202
+
+@api.route('/jobs', methods=['GET'])
+def jobs_stats():
+    """Profundidade da fila, jobs em execução e contagem por status"""
+    return jsonify(job_manager.stats())
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado ou expirado"}), 404
+    job.pop('result', None)
+    return jsonify(job)
+
+@api.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = job_manager.store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado ou expirado"}), 404
+    if job["status"] in ("queued", "running"):
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
+    if job["status"] == "failed":
+        return jsonify({"job_id": job_id, "status": "failed", "error": job["error"]}), 500
+    return jsonify(job["result"])
 
 # Rotas para servir o frontend
-@app.route('/frontend/<path:filename>')
+@api.route('/frontend/<path:filename>')
 def serve_frontend_files(filename):
     """Serve arquivos estáticos do frontend (CSS, JS, etc)"""
     return send_from_directory('Front', filename)
 
-@app.route('/frontend')
-@app.route('/frontend/')
+@api.route('/frontend')
+@api.route('/frontend/')
 def serve_frontend():
     """Serve o frontend HTML"""
     return send_from_directory('Front', 'index.html')
 
-@app.route('/test-audio')
+AUDIO_LIST_MAX_PAGE_SIZE = 1000
+
+def _conditional_json(build_payload):
+    """
+    Resposta JSON com ETag derivada do catálogo e da query string; 304 quando o cliente já tem a listagem.
+    A ETag só depende da impressão digital do catálogo, então o 304 sai sem montar a listagem.
+    """
+    audio_catalog.refresh()
+    etag = hashlib.sha256(f"{audio_catalog.fingerprint}|{request.path}|{request.query_string.decode()}".encode()).hexdigest()[:32]
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/test-audio')
 def test_audio():
     """Rota de teste para verificar se os áudios estão acessíveis"""
-    audio_dir = os.path.join(os.path.dirname(__file__), 'audios')
-    files = []
-    for filename in os.listdir(audio_dir):
-        if filename.lower().endswith(('.mp3', '.wav')):
-            file_path = os.path.join(audio_dir, filename)
-            files.append({
-                'name': filename,
-                'exists': os.path.exists(file_path),
-                'size': os.path.getsize(file_path) if os.path.exists(file_path) else 0,
-                'url': f'/audio/{filename}'
-            })
-    return jsonify({'files': files, 'audio_dir': audio_dir})
+    def payload():
+        files = [
+            {
+                'name': audio['name'],
+                'exists': True,
+                'size': audio['size'],
+                'url': f"/audio/{audio['name']}"
+            }
+            for audio in audio_catalog.list()['audios']
+        ]
+        return {'files': files, 'audio_dir': audio_catalog.directory}
+    return _conditional_json(payload)
 
-@app.route('/list-audios', methods=['GET'])
+@api.route('/list-audios', methods=['GET'])
 def list_audios():
-    """Lista todos os arquivos de áudio disponíveis na pasta audios"""
+    """
+    Lista os arquivos de áudio da pasta audios com duração, taxa de amostragem, canais e hash do conteúdo.
+
+    Filtros opcionais na query string: format, q (trecho do nome), min_duration e max_duration (segundos);
+    paginação com page e page_size (sem page_size, retorna todos).
+    """
     try:
-        audio_dir = os.path.join(os.path.dirname(__file__), 'audios')
-        
-        if not os.path.exists(audio_dir):
+        if not audio_catalog.exists:
             return jsonify({"error": "Diretório de áudios não encontrado"}), 404
-        
-        audio_files = []
-        for filename in os.listdir(audio_dir):
-            if filename.lower().endswith(('.mp3', '.wav')):
-                file_path = os.path.join(audio_dir, filename)
-                file_stats = os.stat(file_path)
-                
-                audio_files.append({
-                    "name": filename,
-                    "format": "mp3" if filename.lower().endswith('.mp3') else "wav",
-                    "size": file_stats.st_size,
-                    "modified": datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-                })
-        
-        # Ordena por nome
-        audio_files.sort(key=lambda x: x['name'])
-        
-        return jsonify({
-            "audios": audio_files,
-            "total": len(audio_files)
-        })
-    
+
+        try:
+            min_duration = request.args.get('min_duration', type=float)
+            max_duration = request.args.get('max_duration', type=float)
+            page = int(request.args.get('page', 1))
+            page_size = int(request.args['page_size']) if 'page_size' in request.args else None
+        except ValueError:
+            return jsonify({"error": "page e page_size devem ser inteiros"}), 400
+        if page < 1 or (page_size is not None and not 1 <= page_size <= AUDIO_LIST_MAX_PAGE_SIZE):
+            return jsonify({"error": f"page deve ser positivo e page_size entre 1 e {AUDIO_LIST_MAX_PAGE_SIZE}"}), 400
+
+        return _conditional_json(lambda: audio_catalog.list(
+            audio_format=request.args.get('format'),
+            name_contains=request.args.get('q'),
+            min_duration=min_duration,
+            max_duration=max_duration,
+            page=page,
+            page_size=page_size,
+        ))
+
     except Exception as e:
         return jsonify({"error": f"Erro ao listar áudios: {str(e)}"}), 500
 
-@app.route('/audio/<path:filename>', methods=['GET'])
+@api.route('/audio/<path:filename>', methods=['GET'])
 def serve_audio(filename):
     """Serve um arquivo de áudio específico"""
     try:
@@ -224,13 +674,13 @@ def serve_audio(filename):
 
 
 # Rotas para configuração de chaves de API
-@app.route('/config')
-@app.route('/config/')
+@api.route('/config')
+@api.route('/config/')
 def serve_config_page():
     """Serve a página de configuração"""
     return send_from_directory('Front', 'config.html')
 
-@app.route('/config/check', methods=['GET'])
+@api.route('/config/check', methods=['GET'])
 def check_env_file():
     """Verifica se o arquivo .env existe e quais chaves estão configuradas"""
     try:
@@ -258,7 +708,7 @@ def check_env_file():
     except Exception as e:
         return jsonify({"error": f"Erro ao verificar .env: {str(e)}"}), 500
 
-@app.route('/config/get', methods=['GET'])
+@api.route('/config/get', methods=['GET'])
 def get_current_config():
     """Retorna as chaves atuais (parcialmente mascaradas)"""
     try:
@@ -273,7 +723,7 @@ def get_current_config():
     except Exception as e:
         return jsonify({"error": f"Erro ao obter configurações: {str(e)}"}), 500
 
-@app.route('/config/save', methods=['POST'])
+@api.route('/config/save', methods=['POST'])
 def save_config():
     """Salva ou atualiza as chaves no arquivo .env"""
     try:
@@ -321,7 +771,7 @@ def save_config():
     except Exception as e:
         return jsonify({"error": f"Erro ao salvar configurações: {str(e)}"}), 500
 
-@app.route('/config/test-openrouter', methods=['GET'])
+@api.route('/config/test-openrouter', methods=['GET'])
 def test_openrouter():
     """Testa se a chave do OpenRouter está funcionando"""
     try:
@@ -358,4 +808,5 @@ def test_openrouter():
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001)
+    # Servidor de desenvolvimento; em produção use o gunicorn (gunicorn -c gunicorn.conf.py wsgi:app)
+    create_app().run(host='0.0.0.0', port=5001)
@@ -0,0 +1 @@
+"""Maintenance and benchmarking command-line tools. Run them from the project root with `python -m scripts.<name>`."""
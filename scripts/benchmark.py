@@ -0,0 +1,312 @@
+"""
+Offline end-to-end benchmark: every route of main.py against a local OpenRouter stand-in.
+
+Usage:
+    python -m scripts.benchmark [--requests 20] [--concurrency 4] [--llm-latency-ms 800]
+                                [--routes transcribe,patient] [--output benchmarks/run.json]
+                                [--baseline benchmarks/previous.json]
+
+The LLM calls go to scripts.llm_stub (no network, no API key needed) and the API is served
+in-process by a threaded werkzeug server, so the numbers include HTTP parsing and JSON
+encoding. The result cache is disabled unless --cache is given, so repeated fixtures are
+really recomputed.
+
+The JSON report has, per route, throughput and p50/p95/p99 latency, the error count and the
+per-stage timings (every helper.metrics stage: decode, feature_extraction, model_forward,
+llm_transcription, ...) recorded while that route ran, plus the process peak RSS. With --baseline, the p50/p95 deltas against a previous
+report are printed.
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from scripts.llm_stub import StubSettings, start_stub_server
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return round(ordered[index], 1)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 1) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": round(max(values), 1) if values else None,
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageTimer:
+    """Collects durations per stage name across all server threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+
+    def record(self, stage, elapsed_ms):
+        with self._lock:
+            self._durations.setdefault(stage, []).append(elapsed_ms)
+
+    def reset(self):
+        with self._lock:
+            durations, self._durations = self._durations, {}
+        return durations
+
+    def observe(self, stage, seconds):
+        """Stage observer for helper.metrics (durations arrive in seconds)."""
+        self.record(stage, seconds * 1000)
+
+
+def load_fixtures(audio_dir):
+    fixtures = []
+    for filename in sorted(os.listdir(audio_dir)):
+        if filename.lower().endswith((".mp3", ".wav")):
+            with open(os.path.join(audio_dir, filename), "rb") as f:
+                raw = f.read()
+            audio_format = filename.rsplit(".", 1)[-1].lower()
+            fixtures.append({
+                "name": filename,
+                "format": audio_format,
+                "bytes": raw,
+                "base64": base64.b64encode(raw).decode("ascii"),
+            })
+    return fixtures
+
+
+def build_scenarios(fixtures):
+    """(name, function(http client, fixture) -> response) for every benchmarked route."""
+
+    def audio_json(fixture, **extra):
+        return {"audio_data": fixture["base64"], "audio_format": fixture["format"], **extra}
+
+    def upload(fixture):
+        mimetype = "audio/mpeg" if fixture["format"] == "mp3" else "audio/wav"
+        return {"content": fixture["bytes"], "headers": {"Content-Type": mimetype}}
+
+    def job(client, fixture):
+        response = client.post("/jobs", json=audio_json(fixture, pipeline="patient"))
+        if response.status_code != 202:
+            return response
+        result_url = response.json()["result_url"]
+        while True:
+            response = client.get(result_url)
+            if response.status_code != 202:
+                return response
+            time.sleep(0.05)
+
+    def batch(client, fixture):
+        # every fixture in one request, so the route's fan-out (and max_concurrency) is what gets measured
+        items = [{"id": f["name"], **audio_json(f)} for f in fixtures]
+        return client.post("/analyse-patient-psychological-issue/batch", json={"items": items})
+
+    return [
+        ("GET /", lambda c, f: c.get("/")),
+        ("GET /health", lambda c, f: c.get("/health")),
+        ("GET /health/ready", lambda c, f: c.get("/health/ready")),
+        ("GET /metrics", lambda c, f: c.get("/metrics")),
+        ("GET /list-audios", lambda c, f: c.get("/list-audios")),
+        ("GET /test-audio", lambda c, f: c.get("/test-audio")),
+        ("GET /audio/<filename>", lambda c, f: c.get(f"/audio/{f['name']}")),
+        ("GET /frontend", lambda c, f: c.get("/frontend")),
+        ("GET /config/check", lambda c, f: c.get("/config/check")),
+        ("POST /transcribe-audio", lambda c, f: c.post("/transcribe-audio", json=audio_json(f))),
+        ("POST /predict-emotion", lambda c, f: c.post("/predict-emotion", json=audio_json(f))),
+        ("POST /predict-emotion (timeline)", lambda c, f: c.post("/predict-emotion", json=audio_json(f, mode="timeline"))),
+        ("POST /analyse-audio-psycological-issue", lambda c, f: c.post("/analyse-audio-psycological-issue", json=audio_json(f))),
+        ("POST /analyse-patient-psychological-issue", lambda c, f: c.post("/analyse-patient-psychological-issue", json=audio_json(f))),
+        ("POST /transcribe-audio/upload", lambda c, f: c.post("/transcribe-audio/upload", **upload(f))),
+        ("POST /predict-emotion/upload", lambda c, f: c.post("/predict-emotion/upload", **upload(f))),
+        ("POST /analyse-patient-psychological-issue/upload", lambda c, f: c.post("/analyse-patient-psychological-issue/upload", **upload(f))),
+        ("POST /analyse-patient-psychological-issue/stream", lambda c, f: c.post("/analyse-patient-psychological-issue/stream", json=audio_json(f))),
+        ("POST /analyse-audio-psycological-issue/stream", lambda c, f: c.post("/analyse-audio-psycological-issue/stream", json=audio_json(f))),
+        ("POST /jobs (patient)", job),
+        ("POST /analyse-patient-psychological-issue/batch", batch),
+    ]
+
+
+def run_scenario(client, scenario, fixtures, requests, concurrency):
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def one(i):
+        fixture = fixtures[i % len(fixtures)]
+        started = time.perf_counter()
+        try:
+            response = scenario(client, fixture)
+            status = response.status_code
+            # SSE routes report failures as an error event and the batch route per item, both with a 200
+            failed = status >= 400 or b"event: error" in response.content or b'"status": "failed"' in response.content
+        except Exception as e:
+            status, failed = type(e).__name__, True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            if failed:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall_seconds = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(requests / wall_seconds, 2),
+        "errors": sum(errors.values()),
+        "errors_by_status": errors,
+        "latency": summarize(latencies),
+    }
+
+
+def wait_for_model(holder, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = holder.status()
+        if status["ready"] or status["state"] == "failed":
+            return status
+        time.sleep(0.5)
+    return holder.status()
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'rota':55} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>6}")
+    for name, route in report["routes"].items():
+        latency = route["latency"]
+        print(f"{name:55} {route['throughput_rps']:>8} {latency['p50_ms']!s:>9} {latency['p95_ms']!s:>9} "
+              f"{latency['p99_ms']!s:>9} {route['errors']:>6}")
+        if baseline and name in baseline.get("routes", {}):
+            previous = baseline["routes"][name]["latency"]
+            deltas = []
+            for key in ("p50_ms", "p95_ms"):
+                if latency[key] is not None and previous.get(key):
+                    deltas.append(f"{key[:3]} {100 * (latency[key] - previous[key]) / previous[key]:+.1f}%")
+            if deltas:
+                print(f"{'  vs. baseline':55} {', '.join(deltas)}")
+    print("\netapas (todas as rotas):")
+    for stage, summary in report["stages"].items():
+        print(f"  {stage:20} n={summary['count']:<6} p50={summary['p50_ms']} p95={summary['p95_ms']} p99={summary['p99_ms']}")
+    print(f"\npico de RSS: {report['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--routes", default="", help="comma-separated substrings; only matching routes run")
+    parser.add_argument("--audio-dir", default="audios")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-chunk-ms", type=float, default=15, help="delay between streamed chunks")
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--model-timeout", type=float, default=900, help="seconds to wait for the emotion model")
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    stub, base_url = start_stub_server(settings=StubSettings(args.llm_latency_ms, args.llm_jitter_ms, args.llm_chunk_ms))
+    # set before importing main: load_dotenv does not override variables that already exist
+    os.environ["OPENROUTER_BASE_URL"] = base_url
+    os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-v1-benchmark")
+    os.environ.setdefault("OPEN_AI_API_KEY", "sk-benchmark")
+    os.environ["RESULT_CACHE_ENABLED"] = "true" if args.cache else "false"
+    os.environ["RESULT_CACHE_DIR"] = ""
+    os.environ["JOBS_SQLITE_PATH"] = ""
+
+    import logging
+
+    import httpx
+    from werkzeug.serving import make_server
+
+    import main as api
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    from helper import add_stage_observer
+
+    timer = StageTimer()
+    add_stage_observer(timer.observe)
+    app = api.create_app()
+    print("Aguardando o modelo de emoção...", file=sys.stderr)
+    model_status = wait_for_model(api.emotion_model_holder, args.model_timeout)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="benchmark-api", daemon=True).start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{server.server_port}", timeout=600)
+
+    fixtures = load_fixtures(args.audio_dir)
+    selected = [part.strip() for part in args.routes.split(",") if part.strip()]
+    routes = {}
+    all_stages = {}
+    timer.reset()
+    for name, scenario in build_scenarios(fixtures):
+        if selected and not any(part in name for part in selected):
+            continue
+        print(f"{name} ...", file=sys.stderr)
+        route = run_scenario(client, scenario, fixtures, args.requests, args.concurrency)
+        stages = timer.reset()
+        route["stages"] = {stage: summarize(values) for stage, values in stages.items()}
+        route["peak_rss_mb"] = peak_rss_mb()
+        routes[name] = route
+        for stage, values in stages.items():
+            all_stages.setdefault(stage, []).extend(values)
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "emotion_model": model_status,
+            "fixtures": [fixture["name"] for fixture in fixtures],
+        },
+        "llm_stub_requests": stub.settings.requests,
+        "routes": routes,
+        "stages": {stage: summarize(values) for stage, values in all_stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    output = args.output or os.path.join("benchmarks", f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nRelatório salvo em {output}")
+
+    server.shutdown()
+    stub.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Latency and token cost of the two patient pipeline modes: two LLM calls (transcription, then the text
+analysis) against a single multimodal call that returns the transcription and the analysis together.
+
+Usage:
+    python -m scripts.compare_pipeline_modes [--repeats 3] [--llm-latency-ms 800] [--live]
+                                             [--output benchmarks/pipeline-modes.json]
+
+Every fixture of --audio-dir runs through analyse_patient_audio in both modes, one request at a
+time and with the result cache disabled, so each request pays for all of its calls. By default the
+LLM calls go to scripts.llm_stub and the token counts are the stub's estimates (four characters per
+token, the audio payload included); with --live they go to the configured OpenRouter account and
+the counts are the ones the provider reports.
+
+The report has, per mode, the p50/p95 end-to-end latency, the per-stage timings, the LLM calls and
+prompt/completion/cached tokens per request (also per model) and how many answers followed the analysis
+schema (agents.schema).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from scripts.benchmark import load_fixtures, summarize, wait_for_model
+from scripts.llm_stub import StubSettings, start_stub_server
+
+MODES = ("two_call", "single_call")
+
+
+def usage_snapshot(models, llm_usage):
+    """Cumulative LLM calls and tokens per model."""
+    totals = llm_usage.stats()["models"]
+    return {
+        model: {key: totals.get(model, {}).get(key, 0) for key in ("calls", "prompt_tokens", "completion_tokens", "cached_tokens")}
+        for model in models
+    }
+
+
+def usage_delta(before, after):
+    return {
+        model: {key: after[model][key] - before[model][key] for key in after[model]}
+        for model in after
+    }
+
+
+def run_mode(mode, fixtures, repeats, models, analyse_patient_audio, analysis_schema_errors, llm_usage):
+    latencies = []
+    stages = {}
+    usage = {model: {"calls": [], "prompt_tokens": [], "completion_tokens": [], "cached_tokens": []} for model in models}
+    errors = {}
+    schema_failures = 0
+
+    for _ in range(repeats):
+        for fixture in fixtures:
+            before = usage_snapshot(models, llm_usage)
+            started = time.perf_counter()
+            try:
+                result = analyse_patient_audio(fixture["bytes"], fixture["format"], mode=mode)
+            except Exception as e:
+                stage = getattr(e, "stage", type(e).__name__)
+                errors[stage] = errors.get(stage, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            for stage, elapsed_ms in result["timings"].items():
+                if stage != "total_ms":
+                    stages.setdefault(stage, []).append(elapsed_ms)
+            if analysis_schema_errors(result["resume"]):
+                schema_failures += 1
+            for model, counts in usage_delta(before, usage_snapshot(models, llm_usage)).items():
+                for key, value in counts.items():
+                    usage[model][key].append(value)
+
+    def per_request(values):
+        return round(sum(values) / len(values), 1) if values else None
+
+    totals = {
+        key: per_request([sum(usage[model][key][i] for model in models) for i in range(len(latencies))])
+        for key in ("calls", "prompt_tokens", "completion_tokens", "cached_tokens")
+    }
+    return {
+        "requests": repeats * len(fixtures),
+        "succeeded": len(latencies),
+        "errors_by_stage": errors,
+        "schema_failures": schema_failures,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+        "per_request": totals,
+        "per_request_by_model": {
+            model: {key: per_request(values) for key, values in counts.items()} for model, counts in usage.items()
+        },
+    }
+
+
+def print_report(report):
+    print(f"\n{'modo':12} {'ok':>5} {'p50':>9} {'p95':>9} {'chamadas':>9} {'prompt':>9} {'completion':>11} {'schema':>7}")
+    for mode, summary in report["modes"].items():
+        latency = summary["latency"]
+        per_request = summary["per_request"]
+        print(f"{mode:12} {summary['succeeded']:>5} {latency['p50_ms']!s:>9} {latency['p95_ms']!s:>9} "
+              f"{per_request['calls']!s:>9} {per_request['prompt_tokens']!s:>9} {per_request['completion_tokens']!s:>11} "
+              f"{summary['succeeded'] - summary['schema_failures']:>4}/{summary['succeeded']}")
+        for stage, stage_summary in summary["stages"].items():
+            print(f"  {stage:30} p50={stage_summary['p50_ms']} p95={stage_summary['p95_ms']}")
+        if summary["errors_by_stage"]:
+            print(f"  erros: {summary['errors_by_stage']}")
+
+    two_call, single_call = report["modes"]["two_call"], report["modes"]["single_call"]
+    deltas = []
+    for label, a, b in (
+        ("p50", two_call["latency"]["p50_ms"], single_call["latency"]["p50_ms"]),
+        ("p95", two_call["latency"]["p95_ms"], single_call["latency"]["p95_ms"]),
+        ("tokens", _tokens(two_call), _tokens(single_call)),
+    ):
+        if a and b is not None:
+            deltas.append(f"{label} {100 * (b - a) / a:+.1f}%")
+    if deltas:
+        print(f"\nsingle_call vs. two_call: {', '.join(deltas)}")
+
+
+def _tokens(summary):
+    per_request = summary["per_request"]
+    if per_request["prompt_tokens"] is None:
+        return None
+    return per_request["prompt_tokens"] + per_request["completion_tokens"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the fixtures per mode")
+    parser.add_argument("--audio-dir", default="audios")
+    parser.add_argument("--live", action="store_true", help="call the configured OpenRouter account instead of the stub")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--model-timeout", type=float, default=900, help="seconds to wait for the emotion model")
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/pipeline-modes-<timestamp>.json)")
+    args = parser.parse_args()
+
+    stub = None
+    if not args.live:
+        stub, base_url = start_stub_server(settings=StubSettings(args.llm_latency_ms, args.llm_jitter_ms))
+        # set before importing the agents: the clients read them on import
+        os.environ["OPENROUTER_BASE_URL"] = base_url
+        os.environ.setdefault("OPENROUTER_API_KEY", "sk-or-v1-benchmark")
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    os.environ["RESULT_CACHE_DIR"] = ""
+
+    import importlib
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from agents import analyse_patient_audio, analysis_schema_errors
+    from clients.openrouter import OPENROUTER_AUDIO_MODEL, OPENROUTER_CHAT_MODEL
+    from helper import llm_usage
+
+    emotion_analyser = importlib.import_module("agents.emotion-analyser")
+    emotion_analyser.preload_model(background=True)
+    print("Aguardando o modelo de emoção...", file=sys.stderr)
+    model_status = wait_for_model(emotion_analyser.model_holder, args.model_timeout)
+
+    fixtures = load_fixtures(args.audio_dir)
+    models = (OPENROUTER_AUDIO_MODEL, OPENROUTER_CHAT_MODEL)
+    modes = {}
+    for mode in MODES:
+        print(f"{mode} ...", file=sys.stderr)
+        modes[mode] = run_mode(
+            mode, fixtures, args.repeats, models, analyse_patient_audio, analysis_schema_errors, llm_usage
+        )
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "config": vars(args),
+        "token_counts": "provider" if args.live else "stub estimate",
+        "emotion_model": model_status,
+        "fixtures": [fixture["name"] for fixture in fixtures],
+        "modes": modes,
+    }
+
+    output = args.output or os.path.join("benchmarks", f"pipeline-modes-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_report(report)
+    print(f"\nRelatório salvo em {output}")
+    if stub is not None:
+        stub.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Side-by-side report of the emotion models of the registry (EMOTION_MODELS): accuracy, latency and memory
+on a labelled set of clips.
+
+Usage:
+    python -m scripts.emotion_model_report [--models whisper-large-v3,wav2vec2-base] [--repeats 3]
+                                           [--audio-dir audios] [--output benchmarks/emotion-models.json]
+
+The expected emotion of a clip comes from its file name: the first token that maps to the common label
+space (pt-br-angry-2.mp3 -> angry, en-neutral.mp3 -> neutral); clips without one only count for latency.
+Each model runs in its own subprocess, so its load time and peak RSS are not mixed with the other
+models'. Per model, the report has the load and warmup seconds, the p50/p95 latency of one clip
+(feature extraction and forward pass, decoding excluded), the accuracy, the label predicted for each
+clip, the labels of the checkpoint and the peak RSS before and after loading it. EMOTION_BACKEND and
+the thread settings apply as in the server, so torch and onnx can be compared with two runs.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from scripts.benchmark import load_fixtures, peak_rss_mb, summarize
+
+
+def expected_label(filename, normalize_label, other_label):
+    """First token of the file name that is an emotion label, or None."""
+    for token in re.split(r"[^a-z]+", os.path.splitext(filename)[0].lower()):
+        if token and normalize_label(token) != other_label:
+            return normalize_label(token)
+    return None
+
+
+def run_worker(name, audio_dir, repeats):
+    """Load one model and run it over the fixtures; returns its report."""
+    from helper import decode_audio_bytes
+
+    emotion_analyser = importlib.import_module("agents.emotion-analyser")
+    holder = emotion_analyser.registry.holder(name)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    backend, feature_extractor, id2label = holder.get()
+    load_seconds = time.perf_counter() - started
+    holder.warmup()
+
+    latencies, predictions = [], {}
+    correct = labelled = 0
+    for fixture in load_fixtures(audio_dir):
+        waveform = decode_audio_bytes(fixture["bytes"], fixture["format"], feature_extractor.sampling_rate)
+        for _ in range(repeats):
+            started = time.perf_counter()
+            label = emotion_analyser.predict_emotion_batch([waveform], backend, feature_extractor, id2label)[0]
+            latencies.append((time.perf_counter() - started) * 1000)
+        expected = expected_label(fixture["name"], emotion_analyser.normalize_label, emotion_analyser.OTHER_LABEL)
+        predictions[fixture["name"]] = {"expected": expected, "predicted": label}
+        if expected is not None:
+            labelled += 1
+            correct += label == expected
+
+    return {
+        "model_id": holder.model_id,
+        "backend": holder.backend_name,
+        "labels": sorted(set(id2label.values())),
+        "load_seconds": round(load_seconds, 3),
+        "warmup_seconds": holder.status()["warmup_seconds"],
+        "latency": summarize(latencies),
+        "accuracy": round(correct / labelled, 3) if labelled else None,
+        "correct": correct,
+        "labelled": labelled,
+        "predictions": predictions,
+        "rss_before_load_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_model(name, args):
+    """Run the report of one model in a fresh interpreter and return it (or the error)."""
+    command = [
+        sys.executable, "-m", "scripts.emotion_model_report",
+        "--worker", name, "--audio-dir", args.audio_dir, "--repeats", str(args.repeats),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=args.model_timeout)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"código de saída {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_report(report):
+    print(f"\n{'modelo':20} {'acurácia':>9} {'carga s':>8} {'p50':>8} {'p95':>8} {'RSS MB':>8} {'Δ RSS':>8}")
+    for name, summary in report["models"].items():
+        if "error" in summary:
+            print(f"{name:20} erro: {summary['error']}")
+            continue
+        accuracy = f"{summary['correct']}/{summary['labelled']}"
+        latency = summary["latency"]
+        growth = round(summary["peak_rss_mb"] - summary["rss_before_load_mb"], 1)
+        print(f"{name:20} {accuracy:>9} {summary['load_seconds']:>8} {latency['p50_ms']!s:>8} {latency['p95_ms']!s:>8} "
+              f"{summary['peak_rss_mb']:>8} {growth:>8}")
+
+    files = sorted({filename for summary in report["models"].values() for filename in summary.get("predictions", {})})
+    if files:
+        print(f"\n{'arquivo':28} {'esperado':>10} " + " ".join(f"{name[:14]:>14}" for name in report["models"]))
+        for filename in files:
+            row = [summary.get("predictions", {}).get(filename, {}) for summary in report["models"].values()]
+            expected = next((cell["expected"] for cell in row if cell), None)
+            print(f"{filename[:28]:28} {expected!s:>10} " + " ".join(f"{cell.get('predicted', '-'):>14}" for cell in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default=None, help="comma-separated registry names (default: all of EMOTION_MODELS)")
+    parser.add_argument("--audio-dir", default="audios")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per clip")
+    parser.add_argument("--model-timeout", type=float, default=1800, help="seconds allowed per model, load included")
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/emotion-models-<timestamp>.json)")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.audio_dir, args.repeats), ensure_ascii=False))
+        return 0
+
+    emotion_analyser = importlib.import_module("agents.emotion-analyser")
+    registry = emotion_analyser.registry
+    names = [name.strip() for name in args.models.split(",") if name.strip()] if args.models else list(registry.names)
+    for name in names:
+        registry.resolve(name)
+
+    models = {}
+    for name in names:
+        print(f"{name} ({registry.model_id(name)}) ...", file=sys.stderr)
+        try:
+            models[name] = run_model(name, args)
+        except subprocess.TimeoutExpired:
+            models[name] = {"error": f"tempo esgotado após {args.model_timeout:.0f} s"}
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "config": vars(args),
+        "labels": list(emotion_analyser.EMOTION_LABELS),
+        "models": models,
+    }
+
+    output = args.output or os.path.join("benchmarks", f"emotion-models-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_report(report)
+    print(f"\nRelatório salvo em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Export an emotion checkpoint of the registry to ONNX and check label parity against the torch backend.
+
+Usage:
+    python -m scripts.export_emotion_onnx [--model whisper-large-v3] [--no-quantize] [--onnx-dir .onnx-cache]
+                                          [--min-agreement 1.0]
+
+The exported graph is written where EMOTION_BACKEND=onnx expects it, so the server
+picks it up on the next start instead of exporting on its first request.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+
+from helper import decode_audio_bytes
+
+emotion_analyser = importlib.import_module("agents.emotion-analyser")
+backends = importlib.import_module("agents.emotion-analyser.backends")
+
+
+def load_fixtures(audio_dir, sampling_rate):
+    clips = {}
+    for filename in sorted(os.listdir(audio_dir)):
+        if filename.lower().endswith((".mp3", ".wav")):
+            with open(os.path.join(audio_dir, filename), "rb") as f:
+                clips[filename] = decode_audio_bytes(f.read(), filename.rsplit(".", 1)[-1], sampling_rate)
+    return clips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="registry name of the model (default: EMOTION_MODEL)")
+    parser.add_argument("--onnx-dir", default=os.getenv("EMOTION_ONNX_DIR", ".onnx-cache"))
+    parser.add_argument("--no-quantize", action="store_true", help="export fp32 only, without INT8 quantization")
+    parser.add_argument("--audio-dir", default="audios")
+    parser.add_argument("--min-agreement", type=float, default=1.0, help="minimum label agreement to exit with 0")
+    args = parser.parse_args()
+
+    quantize = not args.no_quantize
+    reference_holder = emotion_analyser.EmotionModelHolder(
+        emotion_analyser.registry.model_id(args.model), backend="torch", label_map=emotion_analyser.normalize_label
+    )
+    reference, feature_extractor, id2label = reference_holder.get()
+
+    onnx_path = backends.onnx_model_path(args.onnx_dir, reference_holder.model_id, quantize)
+    if not os.path.exists(onnx_path):
+        print(f"Exportando {reference_holder.model_id} para {onnx_path} ...", file=sys.stderr)
+        backends.export_onnx(reference.model, feature_extractor, onnx_path, quantize=quantize)
+    candidate = backends.OnnxEmotionBackend(onnx_path)
+
+    clips = load_fixtures(args.audio_dir, feature_extractor.sampling_rate)
+    report = backends.check_parity(reference, candidate, feature_extractor, id2label, list(clips.values()))
+    report["files"] = list(clips.keys())
+    report["onnx_path"] = onnx_path
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["label_agreement"] >= args.min_agreement else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Local OpenAI-compatible stand-in for OpenRouter, with canned answers and artificial latency.
+
+Usage:
+    python -m scripts.llm_stub [--port 8089] [--latency-ms 800] [--jitter-ms 200] [--chunk-ms 15]
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1 python main.py
+
+Serves POST /v1/chat/completions. Audio requests whose prompt does not ask for JSON (the
+transcription prompt) get a canned transcript, audio requests whose JSON has a "transcription"
+field (the single-call pipeline prompt) get both, and every other request gets a canned analysis
+that follows the PSYCOLOGICAL_ANALYSIS schema. `stream: true` is answered with server-sent events,
+one chunk every `--chunk-ms`. Token usage is estimated at four characters per token; like OpenAI's
+automatic prompt caching, a system message of 1024 tokens or more already seen is reported as cached.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_TRANSCRIPTION = (
+    "Eu tenho me sentido muito cansada nas últimas semanas. Durmo mal, acordo várias vezes durante a noite "
+    "e no trabalho não consigo me concentrar. Às vezes fico irritada com coisas pequenas e depois me sinto culpada."
+)
+
+CANNED_ANALYSIS = {
+    "disclaimer": "Esta é apenas uma análise e deve ser usada por um psicólogo certificado; não é um diagnóstico.",
+    "text_summary": "A pessoa relata cansaço, sono fragmentado, dificuldade de concentração e irritabilidade.",
+    "observed_cues": [
+        {"cue": "Durmo mal, acordo várias vezes", "category": "sleep", "why_it_matters": "Sono fragmentado pode afetar o humor."},
+        {"cue": "fico irritada com coisas pequenas", "category": "mood", "why_it_matters": "Irritabilidade pode sinalizar estresse."},
+    ],
+    "possible_interpretations": [{"interpretation": "Os sinais podem ser consistentes com estresse prolongado."}],
+    "alternative_explanations_and_limitations": [
+        "Relato curto e sem contexto clínico.",
+        "Fatores físicos podem explicar o cansaço.",
+        "A emoção detectada no áudio pode não refletir o estado geral.",
+    ],
+    "risk_screening": {
+        "self_harm_or_suicide_signals": "none",
+        "violence_or_imminent_danger_signals": "none",
+        "recommended_action_if_risk": "",
+    },
+    "conclusion_for_psychologist": "Os sinais sugerem sobrecarga e sono prejudicado. Recomenda-se investigar rotina e fontes de estresse.",
+    "confiability_score": {"score": 55, "rating_label": "medium", "justification": ["Texto curto", "Sinais consistentes"]},
+    "follow_up_questions_for_clinician": [
+        "Há quanto tempo o sono está assim?",
+        "O que mudou na rotina recentemente?",
+        "Como está o apoio de pessoas próximas?",
+    ],
+    "recommendation": "Respire fundo pelo nariz, conte até 10 e solte o ar pela boca.",
+}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _cached_tokens(payload: dict, settings: "StubSettings") -> int:
+    """Tokens of a repeated system message long enough to be cached (OpenAI caches prefixes from 1024 tokens)."""
+    messages = payload.get("messages", [])
+    if not messages or messages[0].get("role") != "system" or not isinstance(messages[0].get("content"), str):
+        return 0
+    prefix = messages[0]["content"]
+    tokens = _estimate_tokens(prefix)
+    with settings.lock:
+        seen = prefix in settings.prefixes
+        settings.prefixes.add(prefix)
+    return tokens if seen and tokens >= 1024 else 0
+
+
+def canned_answer(payload: dict) -> str:
+    """Pick the canned answer for a chat completion request."""
+    # agents.prompts is not imported here: importing the agents package reads OPENROUTER_BASE_URL
+    texts, has_audio = [], False
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            texts.extend(part.get("text", "") for part in content if part.get("type") == "text")
+            has_audio = has_audio or any(part.get("type") == "input_audio" for part in content)
+        elif isinstance(content, str):
+            texts.append(content)
+    text = " ".join(texts)
+    if has_audio and "JSON" not in text:
+        return CANNED_TRANSCRIPTION
+    if has_audio and '"transcription"' in text:
+        return json.dumps({"transcription": CANNED_TRANSCRIPTION, "analysis": CANNED_ANALYSIS}, ensure_ascii=False)
+    return json.dumps(CANNED_ANALYSIS, ensure_ascii=False)
+
+
+class StubSettings:
+    """Latency knobs shared by all request handlers; they can be changed while the server runs."""
+
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 200, chunk_ms: float = 15, chunk_chars: int = 24):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_ms = chunk_ms
+        self.chunk_chars = chunk_chars
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.prefixes = set()
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+
+def _handler(settings: StubSettings):
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            payload = json.loads(body or b"{}")
+            with settings.lock:
+                settings.requests += 1
+
+            content = canned_answer(payload)
+            usage = {
+                "prompt_tokens": _estimate_tokens(body.decode("utf-8", "ignore")),
+                "completion_tokens": _estimate_tokens(content),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            usage["prompt_tokens_details"] = {"cached_tokens": _cached_tokens(payload, settings)}
+            time.sleep(settings.delay())
+
+            if payload.get("stream"):
+                self._stream(payload, content, usage)
+            else:
+                self._complete(payload, content, usage)
+
+        def _complete(self, payload, content, usage):
+            data = json.dumps({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, payload, content, usage):
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+            def event(choices, **extra):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": payload.get("model", "stub"),
+                    "choices": choices,
+                    **extra,
+                }
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+            def delta(content_delta, finish_reason=None):
+                event([{"index": 0, "delta": content_delta, "finish_reason": finish_reason}])
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            delta({"role": "assistant", "content": ""})
+            for start in range(0, len(content), settings.chunk_chars):
+                time.sleep(settings.chunk_ms / 1000)
+                delta({"content": content[start:start + settings.chunk_chars]})
+            delta({}, "stop")
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                event([], usage=usage)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return ChatCompletionsHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, settings: StubSettings = None):
+    """
+    Start the stub in a daemon thread.
+
+    Returns:
+        (server, base_url) where base_url is the value for OPENROUTER_BASE_URL.
+    """
+    settings = settings or StubSettings()
+    server = ThreadingHTTPServer((host, port), _handler(settings))
+    server.daemon_threads = True
+    server.settings = settings
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=800, help="delay before the first byte of each answer")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="uniform +/- jitter added to the latency")
+    parser.add_argument("--chunk-ms", type=float, default=15, help="delay between streamed chunks")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency_ms, args.jitter_ms, args.chunk_ms)
+    server, base_url = start_stub_server(args.host, args.port, settings)
+    print(f"Stub OpenAI-compatível em {base_url} (OPENROUTER_BASE_URL={base_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Shared fixtures: an offline app, a stand-in emotion model and short synthetic clips."""
+
+import base64
+import importlib
+import io
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# the agents and helpers read their settings on import, so these are set before any test imports them
+os.environ.update({
+    "EMOTION_MODEL_PRELOAD": "false",
+    "RESULT_CACHE_ENABLED": "false",
+    "RESULT_CACHE_DIR": "",
+    "JOBS_SQLITE_PATH": "",
+    "AUDIO_CATALOG_INDEX": "",
+    "OPENROUTER_API_KEY": "sk-or-v1-test",
+    # nothing listens there: a test that reaches the LLM fails instead of calling a real provider
+    "OPENROUTER_BASE_URL": "http://127.0.0.1:9/v1",
+})
+
+SAMPLING_RATE = 16000
+
+
+def tone(seconds, amplitude=0.5, sampling_rate=SAMPLING_RATE, frequency=220.0):
+    """Mono float32 sine wave."""
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def wav_bytes(audio_array, sampling_rate=SAMPLING_RATE):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_array, sampling_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class FakeFeatureExtractor:
+    """Passes the waveforms through as `input_values`, padded to the longest one, like wav2vec2's."""
+
+    sampling_rate = SAMPLING_RATE
+    model_input_names = ["input_values"]
+
+    def __call__(self, audio_arrays, sampling_rate=None, return_tensors="np", **kwargs):
+        longest = max(len(audio_array) for audio_array in audio_arrays)
+        return {"input_values": np.stack([np.pad(a, (0, longest - len(a))) for a in audio_arrays])}
+
+
+class FakeBackend:
+    """Answers "sad" for loud input and "neutral" for quiet input."""
+
+    name = "fake"
+
+    def predict_proba(self, input_values):
+        loud = np.abs(input_values).mean(axis=-1) > 0.1
+        return np.stack([np.where(loud, 0.2, 0.8), np.where(loud, 0.8, 0.2)], axis=-1)
+
+
+FAKE_ID2LABEL = {0: "neutral", 1: "sad"}
+
+
+@pytest.fixture
+def emotion_core():
+    return importlib.import_module("agents.emotion-analyser.core")
+
+
+@pytest.fixture
+def fake_emotion_model(monkeypatch, emotion_core):
+    """Serves the default emotion model with FakeBackend instead of loading a checkpoint."""
+    loaded = (FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL)
+    monkeypatch.setattr(emotion_core.model_holder, "get", lambda: loaded)
+    return loaded
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+
+    return main.create_app("lazy")
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def wav_base64():
+    return base64.b64encode(wav_bytes(tone(1.0))).decode("ascii")
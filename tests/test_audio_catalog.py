@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import main
+from conftest import tone, wav_bytes
+from helper import AudioCatalog
+
+
+@pytest.fixture
+def audio_dir(tmp_path):
+    (tmp_path / "long.wav").write_bytes(wav_bytes(tone(2.0)))
+    (tmp_path / "short.wav").write_bytes(wav_bytes(tone(0.5)))
+    (tmp_path / "notes.txt").write_text("not audio")
+    return tmp_path
+
+
+def test_indexes_audio_files_only(audio_dir):
+    listing = AudioCatalog(str(audio_dir)).list()
+
+    assert [audio["name"] for audio in listing["audios"]] == ["long.wav", "short.wav"]
+    assert listing["audios"][0]["duration"] == 2.0
+    assert listing["audios"][0]["sample_rate"] == 16000
+    assert listing["audios"][0]["id"] == listing["audios"][0]["content_hash"][:16]
+
+
+def test_filters_and_pages(audio_dir):
+    catalog = AudioCatalog(str(audio_dir))
+
+    assert [a["name"] for a in catalog.list(min_duration=1.0)["audios"]] == ["long.wav"]
+    assert [a["name"] for a in catalog.list(name_contains="SHO")["audios"]] == ["short.wav"]
+    assert catalog.list(audio_format="mp3")["total"] == 0
+    page = catalog.list(page=2, page_size=1)
+    assert (page["total"], page["pages"], [a["name"] for a in page["audios"]]) == (2, 2, ["short.wav"])
+
+
+def test_only_changed_files_are_probed_again(audio_dir):
+    catalog = AudioCatalog(str(audio_dir), refresh_seconds=0)
+    catalog.list()
+    fingerprint = catalog.fingerprint
+
+    assert not catalog.refresh()
+    (audio_dir / "short.wav").write_bytes(wav_bytes(tone(0.75)))
+    os.utime(audio_dir / "short.wav", (1, 1))
+
+    assert catalog.refresh()
+    assert catalog.stats()["files_probed"] == 3
+    assert catalog.fingerprint != fingerprint
+
+
+def test_index_file_survives_a_restart(audio_dir, tmp_path_factory):
+    index_path = str(tmp_path_factory.mktemp("index") / "catalog.json")
+    AudioCatalog(str(audio_dir), index_path=index_path).list()
+
+    restarted = AudioCatalog(str(audio_dir), index_path=index_path)
+    restarted.list()
+
+    assert restarted.stats()["files_probed"] == 0
+
+
+def test_resolve_by_id(audio_dir):
+    catalog = AudioCatalog(str(audio_dir))
+    entry = catalog.get("long.wav")
+
+    audio = catalog.resolve(entry["id"])
+
+    assert audio.read() == (audio_dir / "long.wav").read_bytes()
+    assert catalog.resolve("0000000000000000") is None
+
+
+def test_listing_is_conditional(client):
+    first = client.get("/list-audios")
+
+    second = client.get("/list-audios", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+
+
+def test_not_modified_listing_is_not_built(client, monkeypatch):
+    etag = client.get("/list-audios?page_size=5").headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("listing built for a 304")
+
+    monkeypatch.setattr(main.audio_catalog, "list", fail)
+    response = client.get("/list-audios?page_size=5", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("query", ["page=0", "page_size=0", "page=x", "page_size=100000"])
+def test_invalid_paging_is_400(client, query):
+    assert client.get(f"/list-audios?{query}").status_code == 400
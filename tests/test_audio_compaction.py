@@ -0,0 +1,47 @@
+import base64
+import io
+
+import numpy as np
+import soundfile as sf
+
+import helper.audio_compaction as audio_compaction
+from conftest import tone, wav_bytes
+from helper import compact_audio
+
+
+def stereo_wav(seconds=2.0, sampling_rate=44100):
+    mono = tone(seconds, sampling_rate=sampling_rate)
+    return wav_bytes(np.stack([mono, mono], axis=1), sampling_rate)
+
+
+def test_compacted_audio_is_smaller_mono_and_resampled():
+    raw = stereo_wav()
+
+    payload, payload_format, stats = compact_audio(raw, "wav", sample_rate=16000, bitrate_kbps=32)
+
+    assert stats["compacted"] and stats["bytes_saved"] > 0
+    assert stats["compacted_bytes"] < len(raw)
+    audio, sampling_rate = sf.read(io.BytesIO(base64.b64decode(payload)))
+    assert sampling_rate == 16000
+    assert audio.ndim == 1
+    assert payload_format == stats["format"]
+
+
+def test_base64_input_gives_the_same_result():
+    raw = stereo_wav()
+
+    from_bytes = compact_audio(raw, "wav", sample_rate=16000, bitrate_kbps=32)
+    from_base64 = compact_audio(base64.b64encode(raw).decode("ascii"), "wav", sample_rate=16000, bitrate_kbps=32)
+
+    assert from_base64[2] == from_bytes[2]
+
+
+def test_original_is_kept_when_compaction_does_not_shrink_it(monkeypatch):
+    raw = stereo_wav(0.5)
+    monkeypatch.setattr(audio_compaction, "encode_mp3", lambda *args: b"\0" * (len(raw) + 1))
+
+    payload, payload_format, stats = compact_audio(raw, "wav")
+
+    assert not stats["compacted"]
+    assert base64.b64decode(payload) == raw
+    assert payload_format == "wav"
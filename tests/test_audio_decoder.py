@@ -0,0 +1,40 @@
+import base64
+
+import numpy as np
+
+from conftest import SAMPLING_RATE, tone, wav_bytes
+from helper import decode_audio_bytes, decode_base64_audio
+
+
+def test_decodes_in_memory_at_the_same_rate():
+    clip = tone(1.0)
+
+    waveform = decode_audio_bytes(wav_bytes(clip), "wav", SAMPLING_RATE)
+
+    assert waveform.dtype == np.float32
+    assert len(waveform) == len(clip)
+    assert np.abs(waveform - clip).max() < 1e-3
+
+
+def test_stereo_is_downmixed():
+    left, right = tone(0.5, amplitude=0.4), tone(0.5, amplitude=0.2)
+
+    waveform = decode_audio_bytes(wav_bytes(np.stack([left, right], axis=1)), "wav", SAMPLING_RATE)
+
+    assert waveform.ndim == 1
+    assert np.abs(waveform - (left + right) / 2).max() < 1e-3
+
+
+def test_resamples_to_the_target_rate():
+    waveform = decode_audio_bytes(wav_bytes(tone(1.0, sampling_rate=8000), 8000), "wav", SAMPLING_RATE)
+
+    assert len(waveform) == SAMPLING_RATE
+
+
+def test_base64_matches_the_bytes():
+    encoded = wav_bytes(tone(0.25))
+
+    assert np.array_equal(
+        decode_base64_audio(base64.b64encode(encoded).decode("ascii"), "wav", SAMPLING_RATE),
+        decode_audio_bytes(encoded, "wav", SAMPLING_RATE),
+    )
@@ -0,0 +1,43 @@
+import base64
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def catalogued(client):
+    return next(audio for audio in client.get("/list-audios").get_json()["audios"] if audio["name"] == "pt-br-sad.mp3")
+
+
+def test_listed_id_answers_like_the_inline_audio(client, fake_emotion_model, catalogued):
+    with open(os.path.join(main.audio_catalog.directory, catalogued["name"]), "rb") as f:
+        audio_data = base64.b64encode(f.read()).decode("ascii")
+
+    by_id = client.post("/predict-emotion", json={"audio_id": catalogued["id"]})
+    inline = client.post("/predict-emotion", json={"audio_data": audio_data, "audio_format": "mp3"})
+
+    assert by_id.status_code == 200
+    assert by_id.get_json() == inline.get_json()
+
+
+@pytest.mark.parametrize("url", [
+    "/predict-emotion",
+    "/transcribe-audio",
+    "/analyse-patient-psychological-issue",
+    "/analyse-patient-psychological-issue/stream",
+    "/jobs",
+])
+def test_unknown_id_is_404(client, url):
+    response = client.post(url, json={"audio_id": "0000000000000000"})
+
+    assert response.status_code == 404
+    assert "0000000000000000" in response.get_json()["error"]
+
+
+def test_neither_audio_data_nor_audio_id_is_400(client):
+    response = client.post("/predict-emotion", json={})
+
+    assert response.status_code == 400
+    assert "audio_id" in response.get_json()["error"]
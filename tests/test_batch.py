@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import main
+
+BATCH_URL = "/analyse-patient-psychological-issue/batch"
+
+
+@pytest.mark.parametrize("body", [{}, {"items": []}, {"items": "clip.wav"}])
+def test_items_must_be_a_non_empty_list(client, body):
+    response = client.post(BATCH_URL, json=body)
+
+    assert response.status_code == 400
+    assert "items" in response.get_json()["error"]
+
+
+def test_too_many_items_is_400(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    response = client.post(BATCH_URL, json={"items": [{"audio_file": "a.wav"}] * 3})
+
+    assert response.status_code == 400
+    assert "2" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("max_concurrency", [0, -1, "4", 1.5])
+def test_invalid_max_concurrency_is_400(client, max_concurrency):
+    response = client.post(BATCH_URL, json={"items": [{"audio_file": "a.wav"}], "max_concurrency": max_concurrency})
+
+    assert response.status_code == 400
+    assert "max_concurrency" in response.get_json()["error"]
+
+
+def test_invalid_pipeline_mode_is_400(client):
+    response = client.post(BATCH_URL, json={"items": [{"audio_file": "a.wav"}], "pipeline_mode": "three_call"})
+
+    assert response.status_code == 400
+    assert response.get_json()["pipeline_modes"] == list(main.PIPELINE_MODES)
+
+
+def test_bad_items_fail_on_their_own_line(client):
+    response = client.post(BATCH_URL, json={"items": [{"id": "x"}, "not an object", {"audio_id": "missing"}]})
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert {record["id"] for record in records[:-1]} == {"x", 1, 2}
+    assert all(record["status"] == "failed" and record["stage"] == "input" for record in records[:-1])
+    assert records[-1]["summary"]["failed"] == 3
@@ -0,0 +1,126 @@
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+batching = importlib.import_module("agents.emotion-analyser.batching")
+EmotionBatcher = batching.EmotionBatcher
+EmotionQueueFullError = batching.EmotionQueueFullError
+EmotionQueueTimeoutError = batching.EmotionQueueTimeoutError
+
+
+def test_concurrent_requests_share_a_batch():
+    batch_sizes = []
+
+    def predict_batch(arrays):
+        batch_sizes.append(len(arrays))
+        return [f"label-{int(a[0])}" for a in arrays]
+
+    batcher = EmotionBatcher(predict_batch, max_batch_size=8, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        labels = list(pool.map(lambda i: batcher.submit(np.full(10, i, dtype=np.float32), timeout=5), range(4)))
+
+    assert labels == [f"label-{i}" for i in range(4)]
+    assert sum(batch_sizes) == 4
+    assert len(batch_sizes) < 4
+    assert batcher.stats()["requests"] == 4
+
+
+def test_batch_size_is_capped():
+    batch_sizes = []
+    release = threading.Event()
+
+    def predict_batch(arrays):
+        release.wait(5)
+        batch_sizes.append(len(arrays))
+        return ["ok"] * len(arrays)
+
+    batcher = EmotionBatcher(predict_batch, max_batch_size=2, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(batcher.submit, np.zeros(10, dtype=np.float32), 5) for _ in range(5)]
+        time.sleep(0.2)
+        release.set()
+        assert [f.result() for f in futures] == ["ok"] * 5
+    assert max(batch_sizes) <= 2
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def predict_batch(arrays):
+        raise RuntimeError("forward failed")
+
+    batcher = EmotionBatcher(predict_batch, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="forward failed"):
+        batcher.submit(np.zeros(10, dtype=np.float32), timeout=5)
+
+
+def test_label_count_mismatch_fails_the_whole_batch():
+    def predict_batch(arrays):
+        return []
+
+    batcher = EmotionBatcher(predict_batch, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="0 labels for a batch of 1"):
+        batcher.submit(np.zeros(10, dtype=np.float32), timeout=5)
+
+
+def test_submit_waits_at_most_the_default_timeout():
+    release = threading.Event()
+
+    def predict_batch(arrays):
+        release.wait(5)
+        return ["ok"] * len(arrays)
+
+    batcher = EmotionBatcher(predict_batch, max_wait_ms=0, timeout=0.1)
+    try:
+        with pytest.raises(EmotionQueueTimeoutError):
+            batcher.submit(np.zeros(10, dtype=np.float32))
+        assert batcher.stats()["timed_out"] == 1
+    finally:
+        release.set()
+
+
+def test_full_queue_rejects_new_requests():
+    started, release = threading.Event(), threading.Event()
+
+    def predict_batch(arrays):
+        started.set()
+        release.wait(5)
+        return ["ok"] * len(arrays)
+
+    batcher = EmotionBatcher(predict_batch, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        running = pool.submit(batcher.submit, np.zeros(10, dtype=np.float32), 5)
+        assert started.wait(5)
+        queued = pool.submit(batcher.submit, np.zeros(10, dtype=np.float32), 5)
+        deadline = time.time() + 5
+        while batcher.stats()["queue_depth"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        with pytest.raises(EmotionQueueFullError):
+            batcher.submit(np.zeros(10, dtype=np.float32), timeout=5)
+        assert batcher.stats()["rejected"] == 1
+    finally:
+        release.set()
+        pool.shutdown()
+    assert running.result() == queued.result() == "ok"
+
+
+def test_predict_emotion_runs_through_the_batcher(client, fake_emotion_model, wav_base64):
+    response = client.post("/predict-emotion", json={"audio_data": wav_base64, "audio_format": "wav"})
+
+    assert response.status_code == 200
+    assert response.get_json()["emotion"] == "sad"
+
+
+def test_predict_emotion_full_queue_is_503(client, fake_emotion_model, emotion_core, monkeypatch, wav_base64):
+    def full(audio_array, timeout=None):
+        raise EmotionQueueFullError("Fila de inferência de emoção cheia (64 requisições pendentes)")
+
+    monkeypatch.setattr(emotion_core.batcher, "submit", full)
+    response = client.post("/predict-emotion", json={"audio_data": wav_base64, "audio_format": "wav"})
+
+    assert response.status_code == 503
+    assert "cheia" in response.get_json()["error"]
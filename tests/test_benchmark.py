@@ -0,0 +1,27 @@
+import pytest
+
+from scripts.benchmark import percentile, summarize
+
+
+@pytest.mark.parametrize("values, q, expected", [
+    ([1, 2], 50, 1),
+    ([1, 2, 3, 4, 5, 6], 50, 3),
+    ([1, 2, 3, 4, 5, 6], 100, 6),
+    (list(range(1, 101)), 95, 95),
+    (list(range(1, 101)), 99, 99),
+    ([7], 0, 7),
+    ([3, 1, 2], 50, 2),
+])
+def test_nearest_rank_percentile(values, q, expected):
+    assert percentile(values, q) == expected
+
+
+def test_empty_values():
+    assert percentile([], 50) is None
+    assert summarize([])["p50_ms"] is None
+
+
+def test_summarize():
+    summary = summarize([10.0, 20.0, 30.0, 40.0])
+
+    assert summary == {"count": 4, "mean_ms": 25.0, "p50_ms": 20.0, "p95_ms": 40.0, "p99_ms": 40.0, "max_ms": 40.0}
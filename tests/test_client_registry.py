@@ -0,0 +1,24 @@
+from clients import ScheduledChatOpenAI, get_chat_client, get_http_client, registry_stats
+
+BASE_URL = "http://127.0.0.1:9/v1"
+
+
+def test_same_settings_reuse_the_client():
+    first = get_chat_client(model="test/model", temperature=0.0, api_key="sk-test", base_url=BASE_URL)
+
+    assert get_chat_client(model="test/model", temperature=0.0, api_key="sk-test", base_url=BASE_URL) is first
+    assert isinstance(first, ScheduledChatOpenAI)
+    assert first.max_retries == 0
+
+
+def test_clients_of_a_provider_share_one_pool():
+    cold = get_chat_client(model="test/model", temperature=0.0, api_key="sk-test", base_url=BASE_URL)
+    warm = get_chat_client(model="test/model", temperature=0.7, api_key="sk-test", base_url=BASE_URL)
+
+    assert warm is not cold
+    assert warm.http_client is cold.http_client is get_http_client(BASE_URL)
+
+
+def test_each_provider_gets_its_own_pool():
+    assert get_http_client(BASE_URL) is not get_http_client("http://127.0.0.1:9/other")
+    assert {BASE_URL, "http://127.0.0.1:9/other"} <= set(registry_stats()["http_pools"])
@@ -0,0 +1,67 @@
+import importlib
+
+import numpy as np
+
+from conftest import FAKE_ID2LABEL, FakeBackend, FakeFeatureExtractor, SAMPLING_RATE, tone
+
+backends = importlib.import_module("agents.emotion-analyser.backends")
+
+
+class FakeLogMelExtractor(FakeFeatureExtractor):
+    """Whisper-style extractor: returns the fixed-length clips it receives as `input_features`."""
+
+    model_input_names = ["input_features"]
+
+    def __call__(self, audio_arrays, sampling_rate=None, return_tensors="np", max_length=None, **kwargs):
+        return {"input_features": np.stack(audio_arrays)}
+
+
+class RecordingBackend(FakeBackend):
+    def __init__(self, name):
+        self.name = name
+        self.shapes = []
+
+    def predict_proba(self, input_values):
+        self.shapes.append(input_values.shape)
+        return super().predict_proba(input_values)
+
+
+def test_log_mel_input_is_padded_to_the_window():
+    features = backends.extract_features([tone(1.0), tone(40.0)], FakeLogMelExtractor())
+
+    assert features["input_features"].shape == (2, 30 * SAMPLING_RATE)
+
+
+def test_waveform_input_is_padded_to_the_longest_clip():
+    features = backends.extract_features([tone(1.0), tone(2.0)], FakeFeatureExtractor())
+
+    assert features["input_values"].shape == (2, 2 * SAMPLING_RATE)
+
+
+def test_parity_uses_the_serving_features():
+    reference, candidate = RecordingBackend("torch"), RecordingBackend("onnx")
+    clips = [tone(1.0), tone(2.0, amplitude=0.01)]
+
+    report = backends.check_parity(reference, candidate, FakeFeatureExtractor(), FAKE_ID2LABEL, clips)
+
+    assert reference.shapes == candidate.shapes == [(1, SAMPLING_RATE), (1, 2 * SAMPLING_RATE)]
+    assert report["label_agreement"] == 1.0
+    assert report["max_probability_diff"] == 0.0
+    assert report["reference"]["labels"] == ["sad", "neutral"]
+
+
+def test_softmax_rows_sum_to_one():
+    probabilities = backends._softmax(np.array([[1000.0, 1000.0], [0.0, np.log(3.0)]]))
+
+    assert np.allclose(probabilities, [[0.5, 0.5], [0.25, 0.75]])
+
+
+def test_onnx_path_per_checkpoint_and_quantization():
+    assert backends.onnx_model_path("cache", "org/model v2", True).endswith("org__model__v2/model.int8.onnx")
+    assert backends.onnx_model_path("cache", "org/model", False).endswith("org__model/model.onnx")
+
+
+def test_backends_are_not_wrapped_again():
+    backend = FakeBackend()
+
+    assert backends.as_backend(backend) is backend
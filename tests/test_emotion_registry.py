@@ -0,0 +1,71 @@
+import importlib
+
+import pytest
+
+from conftest import FakeBackend, FakeFeatureExtractor
+
+registry_module = importlib.import_module("agents.emotion-analyser.registry")
+EmotionModelRegistry = registry_module.EmotionModelRegistry
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("hap", "happy"), ("Anger", "angry"), (" calm ", "neutral"), ("sad", "sad"), ("ps", "surprised"), ("boredom", "other"),
+])
+def test_labels_map_to_the_common_space(label, expected):
+    assert registry_module.normalize_label(label) == expected
+
+
+def test_parse_models():
+    models = registry_module.parse_models(" wav2vec2-base , mine = org/my-checkpoint ,")
+
+    assert models == {"wav2vec2-base": "superb/wav2vec2-base-superb-er", "mine": "org/my-checkpoint"}
+
+
+def test_unknown_bare_name_is_rejected():
+    with pytest.raises(ValueError, match="desconhecido"):
+        registry_module.parse_models("not-a-model")
+
+
+def test_default_must_be_configured():
+    with pytest.raises(ValueError):
+        EmotionModelRegistry({"mine": "org/my-checkpoint"}, "other", make_batcher=lambda holder: None)
+
+
+def test_models_are_created_on_first_use():
+    batchers = []
+    registry = EmotionModelRegistry(
+        {"a": "org/a", "b": "org/b"}, "a", make_batcher=lambda holder: batchers.append(holder) or holder
+    )
+
+    assert registry.stats()["models"]["b"] == {"model_id": "org/b", "state": "not_used"}
+    assert registry.holder() is registry.batcher("a")
+    assert registry.holder("b").model_id == "org/b"
+    assert len(batchers) == 2
+    with pytest.raises(ValueError, match="inválido"):
+        registry.holder("c")
+
+
+def test_request_chooses_the_model(client, monkeypatch, emotion_core, wav_base64):
+    other = emotion_core.registry.names[1]
+    loaded = (FakeBackend(), FakeFeatureExtractor(), {0: "happy", 1: "angry"})
+    monkeypatch.setattr(emotion_core.registry.holder(other), "get", lambda: loaded)
+
+    response = client.post("/predict-emotion", json={"audio_data": wav_base64, "emotion_model": other})
+
+    assert response.status_code == 200
+    assert response.get_json()["emotion"] == "angry"
+
+
+@pytest.mark.parametrize("url", ["/predict-emotion", "/analyse-patient-psychological-issue"])
+def test_invalid_model_is_400(client, emotion_core, wav_base64, url):
+    response = client.post(url, json={"audio_data": wav_base64, "emotion_model": "not-a-model"})
+
+    assert response.status_code == 400
+    assert response.get_json()["emotion_models"] == list(emotion_core.registry.names)
+
+
+def test_health_lists_the_models(client, emotion_core):
+    models = client.get("/health").get_json()["emotion_models"]
+
+    assert models["default"] == emotion_core.registry.default
+    assert set(models["models"]) == set(emotion_core.registry.names)
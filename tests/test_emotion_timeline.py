@@ -0,0 +1,75 @@
+import base64
+
+import numpy as np
+import pytest
+
+from conftest import FAKE_ID2LABEL, SAMPLING_RATE, FakeBackend, FakeFeatureExtractor, tone, wav_bytes
+
+
+def test_windows_cover_the_whole_recording(emotion_core):
+    # 10 s of silence followed by 20 s of tone
+    audio = np.concatenate([np.zeros(10 * SAMPLING_RATE, dtype=np.float32), tone(20.0)])
+
+    result = emotion_core.predict_emotion_timeline(
+        audio, FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL, window_seconds=10.0, hop_seconds=10.0
+    )
+
+    assert [(w["start"], w["end"], w["emotion"]) for w in result["timeline"]] == [
+        (0.0, 10.0, "neutral"), (10.0, 20.0, "sad"), (20.0, 30.0, "sad"),
+    ]
+    assert result["emotion"] == "sad"
+    assert result["duration"] == 30.0
+    assert sum(result["scores"].values()) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_last_window_is_aligned_to_the_end(emotion_core):
+    result = emotion_core.predict_emotion_timeline(
+        tone(25.0), FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL, window_seconds=10.0, hop_seconds=10.0
+    )
+
+    assert [(w["start"], w["end"]) for w in result["timeline"]] == [(0.0, 10.0), (10.0, 20.0), (15.0, 25.0)]
+
+
+def test_too_many_windows_are_rejected(emotion_core):
+    with pytest.raises(emotion_core.EmotionTimelineTooLongError):
+        emotion_core.predict_emotion_timeline(
+            tone(30.0), FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL,
+            window_seconds=5.0, hop_seconds=1.0, max_windows=10,
+        )
+
+
+def test_timeline_route(client, fake_emotion_model):
+    audio = base64.b64encode(wav_bytes(tone(40.0))).decode("ascii")
+    response = client.post("/predict-emotion", json={"audio_data": audio, "audio_format": "wav", "mode": "timeline"})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["emotion"] == "sad"
+    assert [(w["start"], w["end"]) for w in body["timeline"]] == [(0.0, 30.0), (10.0, 40.0)]
+
+
+@pytest.mark.parametrize("options", [
+    {"window_seconds": "abc"},
+    {"hop_seconds": None},
+    {"window_seconds": 31},
+    {"hop_seconds": 0},
+    {"hop_seconds": "inf"},
+    {"window_seconds": "nan"},
+])
+def test_invalid_timeline_parameters_are_400(client, fake_emotion_model, wav_base64, options):
+    response = client.post(
+        "/predict-emotion", json={"audio_data": wav_base64, "audio_format": "wav", "mode": "timeline", **options}
+    )
+
+    assert response.status_code == 400
+    assert "window_seconds" in response.get_json()["error"]
+
+
+def test_too_long_timeline_is_413(client, fake_emotion_model, emotion_core, monkeypatch, wav_base64):
+    monkeypatch.setattr(emotion_core, "TIMELINE_MAX_WINDOWS", 2)
+    response = client.post(
+        "/predict-emotion",
+        json={"audio_data": wav_base64, "audio_format": "wav", "mode": "timeline", "window_seconds": 0.2, "hop_seconds": 0.1},
+    )
+
+    assert response.status_code == 413
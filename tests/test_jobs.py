@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+import main
+from helper import JobManager, JobQueueFullError, JobStore
+
+
+def wait_for(store, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_finished_jobs_expire_after_the_ttl():
+    store = JobStore(ttl_seconds=0.05)
+    store.save({"id": "done", "status": "succeeded"})
+    store.save({"id": "running", "status": "running"})
+    assert store.get("done") is not None
+
+    time.sleep(0.1)
+
+    assert store.get("done") is None
+    assert [job["id"] for job in store.list()] == ["running"]
+
+
+def test_listing_purges_expired_jobs_without_polling():
+    store = JobStore(ttl_seconds=0.05)
+    store.save({"id": "done", "status": "failed"})
+    time.sleep(0.1)
+
+    assert store.list() == []
+    assert store.purge_expired() == 0
+
+
+def test_sqlite_store_fails_jobs_interrupted_by_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    JobStore(sqlite_path=path).save({"id": "lost", "status": "running"})
+
+    job = JobStore(sqlite_path=path).get("lost")
+
+    assert job["status"] == "failed"
+    assert "reinicialização" in job["error"]
+
+
+def test_manager_records_results_and_errors():
+    manager = JobManager(JobStore(), max_workers=2)
+    manager.register("double", lambda x: x * 2)
+    manager.register("boom", lambda: 1 / 0)
+
+    succeeded = wait_for(manager.store, manager.submit("double", 21)["id"])
+    failed = wait_for(manager.store, manager.submit("boom")["id"])
+
+    assert succeeded["result"] == 42 and succeeded["run_ms"] is not None
+    assert failed["status"] == "failed" and "division" in failed["error"]
+
+
+def test_polls_never_see_a_half_finished_job():
+    class RecordingStore(JobStore):
+        def __init__(self):
+            super().__init__()
+            self.saved = []
+
+        def save(self, job):
+            self.saved.append(job)
+            super().save(job)
+
+    store = RecordingStore()
+    manager = JobManager(store, max_workers=1)
+    manager.register("answer", lambda: 42)
+
+    job_id = manager.submit("answer")["id"]
+    wait_for(store, job_id)
+
+    assert [job["status"] for job in store.saved] == ["queued", "running", "succeeded"]
+    # each update is a record of its own, never the earlier one changed in place
+    assert len({id(job) for job in store.saved}) == 3
+    assert store.saved[1]["result"] is None and store.saved[2]["result"] == 42
+
+
+def test_manager_rejects_jobs_over_the_pending_limit():
+    release = threading.Event()
+    manager = JobManager(JobStore(), max_workers=1, max_pending=1)
+    manager.register("wait", lambda: release.wait(5))
+    try:
+        manager.submit("wait")
+        with pytest.raises(JobQueueFullError):
+            manager.submit("wait")
+    finally:
+        release.set()
+
+
+def test_emotion_job_round_trip(client, fake_emotion_model, wav_base64):
+    response = client.post("/jobs", json={"pipeline": "emotion", "audio_data": wav_base64, "audio_format": "wav"})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    wait_for(main.job_manager.store, job_id)
+    result = client.get(f"/jobs/{job_id}/result")
+
+    assert result.status_code == 200
+    assert result.get_json() == {"emotion": "sad"}
+
+
+def test_unknown_pipeline_is_400(client, wav_base64):
+    response = client.post("/jobs", json={"pipeline": "nope", "audio_data": wav_base64})
+
+    assert response.status_code == 400
+    assert "pipelines" in response.get_json()
+
+
+def test_full_job_queue_is_503(client, monkeypatch, wav_base64):
+    def full(*args, **kwargs):
+        raise JobQueueFullError("Fila de jobs cheia (100 jobs pendentes)")
+
+    monkeypatch.setattr(main.job_manager, "submit", full)
+    response = client.post("/jobs", json={"pipeline": "emotion", "audio_data": wav_base64})
+
+    assert response.status_code == 503
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/result").status_code == 404
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from helper import count_tokens, llm_call, llm_usage, preload_tokenizer, token_stats, truncate_to_tokens, truncate_transcript
+from helper.tokens import TRUNCATION_MARKER
+
+
+def test_short_text_is_kept():
+    assert truncate_to_tokens("Tenho dormido mal.", 100) == ("Tenho dormido mal.", 0)
+    assert truncate_to_tokens("Tenho dormido mal.", 0) == ("Tenho dormido mal.", 0)
+
+
+def test_long_text_keeps_its_beginning_and_end():
+    text = "Começo do relato. " + "Falo de outras coisas. " * 2000 + "Conclusão do relato."
+
+    shortened, removed = truncate_to_tokens(text, 300)
+
+    assert shortened.startswith("Começo do relato.")
+    assert shortened.endswith("Conclusão do relato.")
+    assert TRUNCATION_MARKER in shortened
+    assert removed == count_tokens(text) - 300
+    assert count_tokens(shortened) <= 300 + count_tokens(TRUNCATION_MARKER) + 2
+
+
+def test_truncations_are_counted(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_MAX_TRANSCRIPT_TOKENS", "50")
+    before = token_stats()["truncated"]
+
+    truncate_transcript("palavra " * 1000, "openai/gpt-4o")
+
+    assert token_stats()["truncated"] == before + 1
+    assert token_stats()["max_transcript_tokens"] == 50
+
+
+def test_llm_call_accounts_tokens_per_model_and_route():
+    usage = {"input_tokens": 1200, "output_tokens": 300, "input_token_details": {"cache_read": 1024}}
+
+    with llm_call("test/usage-model", "llm_text_analysis") as call:
+        call.record(SimpleNamespace(usage_metadata=usage))
+        call.record(SimpleNamespace(usage_metadata=None))
+
+    totals = llm_usage.stats()["routes"]["background"]["test/usage-model"]
+    assert totals["calls"] == 1
+    assert (totals["prompt_tokens"], totals["completion_tokens"], totals["cached_tokens"]) == (1200, 300, 1024)
+    assert llm_usage.stats()["recent"][-1]["operation"] == "llm_text_analysis"
+
+
+def test_health_reports_llm_usage(client):
+    assert "models" in client.get("/health").get_json()["llm_usage"]
+
+
+def test_preloaded_tokenizer_is_reported():
+    preload_tokenizer("openai/gpt-4o-mini")
+
+    # tiktoken's encoding, or the length estimate when it is missing or cannot download it
+    assert "gpt-4o-mini" in token_stats()["tokenizers"]
@@ -0,0 +1,68 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import SAMPLING_RATE
+
+audio_analyser = importlib.import_module("agents.audio-analyser")
+audio_core = importlib.import_module("agents.audio-analyser.core")
+
+
+class FakeASRPipeline:
+    """Stands in for the transformers speech-recognition pipeline and records its calls."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=SAMPLING_RATE)
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append((inputs, kwargs))
+        return {"text": "  Olá, tudo bem?  "}
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    asr = FakeASRPipeline()
+    monkeypatch.setattr(audio_core.local_transcriber, "_pipeline", asr)
+    return asr
+
+
+def test_size_names_map_to_checkpoints():
+    assert audio_analyser.LocalWhisperTranscriber("tiny").model_id == "openai/whisper-tiny"
+    assert audio_analyser.LocalWhisperTranscriber("org/custom-whisper").model_id == "org/custom-whisper"
+
+
+def test_backend_from_env(monkeypatch):
+    monkeypatch.setenv("TRANSCRIPTION_BACKEND", "Local")
+    assert audio_core.transcription_backend() == "local"
+    assert audio_core.transcription_backend("openrouter") == "openrouter"
+
+    monkeypatch.setenv("TRANSCRIPTION_BACKEND", "whisper")
+    with pytest.raises(ValueError):
+        audio_core.transcription_backend()
+
+
+def test_transcribes_locally(client, fake_whisper, wav_base64):
+    response = client.post("/transcribe-audio", json={"audio_data": wav_base64, "transcription_backend": "local"})
+
+    assert response.status_code == 200
+    assert response.get_json()["transcription"] == "Olá, tudo bem?"
+    inputs, kwargs = fake_whisper.calls[0]
+    assert inputs["sampling_rate"] == SAMPLING_RATE
+    assert len(inputs["raw"]) == SAMPLING_RATE
+    assert kwargs["generate_kwargs"]["task"] == "transcribe"
+    assert audio_core.local_transcriber.status()["transcriptions"] >= 1
+
+
+@pytest.mark.parametrize("url", [
+    "/transcribe-audio",
+    "/analyse-patient-psychological-issue",
+    "/analyse-patient-psychological-issue/stream",
+])
+def test_invalid_backend_is_400(client, wav_base64, url):
+    response = client.post(url, json={"audio_data": wav_base64, "transcription_backend": "whisper"})
+
+    assert response.status_code == 400
+    assert response.get_json()["transcription_backends"] == ["openrouter", "local"]
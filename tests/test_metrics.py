@@ -0,0 +1,59 @@
+import pytest
+
+from helper.metrics import MetricsRegistry, registry, server_timing_header, stage_errors, timed
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = MetricsRegistry()
+    histogram = metrics.histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, stage="decode")
+
+    lines = metrics.render().splitlines()
+
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{stage="decode",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="decode",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="decode",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="decode"} 6.05' in lines
+    assert 'latency_seconds_count{stage="decode"} 4' in lines
+
+
+def test_label_values_are_escaped():
+    metrics = MetricsRegistry()
+    metrics.counter("calls_total", "Calls.", ["route"]).inc(route='a"b\\c\nd')
+
+    assert 'calls_total{route="a\\"b\\\\c\\nd"} 1' in metrics.render()
+
+
+def test_same_name_returns_the_registered_metric():
+    metrics = MetricsRegistry()
+
+    assert metrics.gauge("depth", "Depth.") is metrics.gauge("depth", "Depth.")
+
+
+def test_timed_counts_errors():
+    errors = stage_errors.value(stage="test_stage")
+
+    with pytest.raises(RuntimeError):
+        with timed("test_stage"):
+            raise RuntimeError("decode failed")
+
+    assert 'stage_duration_seconds_count{stage="test_stage"}' in registry.render()
+    assert stage_errors.value(stage="test_stage") == errors + 1
+
+
+def test_server_timing_header():
+    assert server_timing_header({"decode": 0.0123}, 0.05) == "decode;dur=12.3, total;dur=50.0"
+
+
+def test_metrics_route(client):
+    client.get("/list-audios")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/list-audios",status="200"}' in body
+    assert "# TYPE emotion_model_ready gauge" in body
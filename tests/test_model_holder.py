@@ -0,0 +1,59 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import FAKE_ID2LABEL, FakeBackend, FakeFeatureExtractor, SAMPLING_RATE
+
+EmotionModelHolder = importlib.import_module("agents.emotion-analyser.model_holder").EmotionModelHolder
+
+
+@pytest.fixture
+def loaded_holder(monkeypatch):
+    holder = EmotionModelHolder("org/checkpoint")
+    monkeypatch.setattr(holder, "_loaded", (FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL))
+    return holder
+
+
+def test_importing_the_app_loads_no_model():
+    script = "import main, sys; print(any(name in sys.modules for name in ('torch', 'transformers', 'librosa')))"
+    completed = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    assert completed.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_invalid_backend_is_rejected():
+    with pytest.raises(ValueError):
+        EmotionModelHolder("org/checkpoint", backend="tensorrt")
+
+
+def test_failed_load_is_reported(tmp_path):
+    holder = EmotionModelHolder(str(tmp_path))
+
+    assert holder.preload(background=False) is None
+    status = holder.status()
+    assert status["state"] == "failed"
+    assert status["error"]
+    assert not status["ready"]
+
+
+def test_warmup_runs_one_second_of_silence(loaded_holder):
+    batches = []
+    loaded_holder.warmup(batches.append)
+
+    assert len(batches) == 1
+    assert len(batches[0][0]) == SAMPLING_RATE
+    assert not batches[0][0].any()
+    assert loaded_holder.status()["warm"]
+
+
+def test_readiness_follows_the_model(client, monkeypatch, emotion_core):
+    assert client.get("/health/ready").status_code == 503
+
+    monkeypatch.setattr(emotion_core.model_holder, "_loaded", (FakeBackend(), FakeFeatureExtractor(), FAKE_ID2LABEL))
+    assert client.get("/health/ready").status_code == 200
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from agents import PipelineStageError, analyse_patient_audio, pipeline
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Stand-in stages: transcription and emotion only return once both are running at the same time."""
+    both_running = threading.Barrier(2, timeout=5)
+
+    def transcribe(audio_data, audio_format, compact, compaction_report, vad, vad_report, backend):
+        both_running.wait()
+        return "Tenho dormido mal."
+
+    def predict_emotion(audio_data, audio_format, max_duration, vad, vad_report, model):
+        both_running.wait()
+        return "sad"
+
+    monkeypatch.setattr(pipeline.audio_analyser, "get_transcription", transcribe)
+    monkeypatch.setattr(pipeline.emotion_analyser, "predict_emotion_from_base64", predict_emotion)
+    monkeypatch.setattr(
+        pipeline.psycological_analyser, "get_psicological_analysis",
+        lambda transcription, emotion: {"text_summary": f"{transcription} ({emotion})"},
+    )
+
+
+def test_transcription_and_emotion_run_concurrently(stages):
+    result = analyse_patient_audio("UklGRg==", "wav", mode="two_call", transcription_backend="openrouter")
+
+    assert result["resume"] == {"text_summary": "Tenho dormido mal. (sad)"}
+    assert result["emotion"] == "sad"
+    assert result["transcription"] == "Tenho dormido mal."
+    assert set(result["timings"]) == {"transcription_ms", "emotion_ms", "analysis_ms", "total_ms"}
+
+
+def test_failed_stage_is_named(stages, monkeypatch):
+    def transcribe(*args):
+        raise TimeoutError("provider timed out")
+
+    monkeypatch.setattr(pipeline.audio_analyser, "get_transcription", transcribe)
+    monkeypatch.setattr(pipeline.emotion_analyser, "predict_emotion_from_base64", lambda *args: "sad")
+
+    with pytest.raises(PipelineStageError) as raised:
+        analyse_patient_audio("UklGRg==", "wav", mode="two_call", transcription_backend="openrouter")
+    assert raised.value.stage == "transcription"
+    assert isinstance(raised.value.error, TimeoutError)
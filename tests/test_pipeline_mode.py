@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+
+import main
+from agents import AnalysisSchemaError, PipelineStageError, pipeline_mode
+from agents.schema import analysis_schema_errors, validate_analysis
+from scripts.llm_stub import CANNED_ANALYSIS
+
+PATIENT_URL = "/analyse-patient-psychological-issue"
+
+
+def test_canned_analysis_follows_the_schema():
+    assert validate_analysis(CANNED_ANALYSIS) is CANNED_ANALYSIS
+
+
+def test_schema_errors_are_all_reported():
+    analysis = copy.deepcopy(CANNED_ANALYSIS)
+    del analysis["recommendation"]
+    analysis["risk_screening"]["self_harm_or_suicide_signals"] = "maybe"
+    analysis["confiability_score"]["score"] = 150
+
+    errors = analysis_schema_errors(analysis)
+
+    assert len(errors) == 3
+    with pytest.raises(AnalysisSchemaError) as raised:
+        validate_analysis(analysis)
+    assert raised.value.errors == errors
+
+
+def test_answer_that_is_not_an_object():
+    assert analysis_schema_errors(["not", "an", "object"]) == ["a análise deve ser um objeto JSON, não list"]
+
+
+@pytest.mark.parametrize("value, expected", [(None, "two_call"), ("single_call", "single_call"), ("SINGLE_CALL", "single_call"), ("other", "two_call")])
+def test_default_mode_from_env(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("PATIENT_PIPELINE_MODE", raising=False)
+    else:
+        monkeypatch.setenv("PATIENT_PIPELINE_MODE", value)
+
+    assert pipeline_mode() == expected
+
+
+@pytest.mark.parametrize("url", [PATIENT_URL, f"{PATIENT_URL}/stream"])
+def test_invalid_mode_is_400(client, wav_base64, url):
+    response = client.post(url, json={"audio_data": wav_base64, "pipeline_mode": "three_call"})
+
+    assert response.status_code == 400
+    assert response.get_json()["pipeline_modes"] == ["two_call", "single_call"]
+
+
+def test_invalid_mode_on_upload_is_400(client):
+    response = client.post(f"{PATIENT_URL}/upload?pipeline_mode=three_call", data=b"RIFF", content_type="audio/wav")
+
+    assert response.status_code == 400
+
+
+def test_mode_reaches_the_pipeline(client, monkeypatch, wav_base64):
+    calls = []
+    monkeypatch.setattr(main, "analyse_patient_audio", lambda *args: calls.append(args) or {"ok": True})
+
+    response = client.post(PATIENT_URL, json={"audio_data": wav_base64, "pipeline_mode": "single_call"})
+
+    assert response.status_code == 200
+    assert "single_call" in calls[0]
+
+
+def test_answer_outside_the_schema_is_502(client, monkeypatch, wav_base64):
+    def analyse(*args):
+        raise PipelineStageError("transcription_analysis", AnalysisSchemaError(["campo obrigatório ausente: recommendation"]))
+
+    monkeypatch.setattr(main, "analyse_patient_audio", analyse)
+    response = client.post(PATIENT_URL, json={"audio_data": wav_base64, "pipeline_mode": "single_call"})
+
+    assert response.status_code == 502
+    assert response.get_json()["stage"] == "transcription_analysis"
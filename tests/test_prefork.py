@@ -0,0 +1,65 @@
+import gc
+import importlib.util
+import os
+
+import pytest
+
+from helper import env_flag
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("value, expected", [("1", True), ("TRUE", True), ("yes", True), ("0", False), ("off", False)])
+def test_env_flag(monkeypatch, value, expected):
+    monkeypatch.setenv("SOME_FLAG", value)
+
+    assert env_flag("SOME_FLAG", "false") is expected
+
+
+def test_env_flag_default(monkeypatch):
+    monkeypatch.delenv("SOME_FLAG", raising=False)
+
+    assert env_flag("SOME_FLAG", "true") is True
+
+
+@pytest.fixture
+def gunicorn_conf(monkeypatch):
+    """Loads gunicorn.conf.py, then undoes what it does to the process (environment, GC state)."""
+    for name in ("EMOTION_TORCH_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        # set first so that monkeypatch restores the variable, whatever the config writes to it
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", os.path.join(ROOT, "gunicorn.conf.py"))
+    conf = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(conf)
+        yield conf
+    finally:
+        gc.unfreeze()
+        gc.enable()
+
+
+def test_master_collects_again_once_the_app_is_loaded(gunicorn_conf):
+    assert not gc.isenabled()
+
+    gunicorn_conf.when_ready(server=None)
+
+    assert gc.isenabled()
+    assert gc.get_freeze_count() > 0
+
+
+def test_torch_threads_are_split_between_workers(gunicorn_conf):
+    expected = str(max(1, (os.cpu_count() or 1) // 2))
+
+    assert gunicorn_conf.preload_app
+    assert os.environ["EMOTION_TORCH_THREADS"] == expected
+    assert os.environ["OMP_NUM_THREADS"] == expected
+
+
+def test_wsgi_app_loads_lazily_without_preload():
+    import wsgi
+
+    assert os.environ["EMOTION_MODEL_PRELOAD"] == "false"
+    assert wsgi._model_loading() == "lazy"
+    assert wsgi.app.test_client().get("/metrics").status_code == 200
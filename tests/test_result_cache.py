@@ -0,0 +1,64 @@
+import base64
+
+from helper import ResultCache, audio_digest, cache_key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.set("emotion", "a", "sad")
+    cache.set("emotion", "b", "happy")
+    assert cache.get("emotion", "a") == (True, "sad")
+
+    cache.set("emotion", "c", "angry")
+
+    assert cache.get("emotion", "b") == (False, None)
+    assert cache.get("emotion", "a") == (True, "sad")
+    assert cache.get("emotion", "c") == (True, "angry")
+
+
+def test_size_limit_evicts_oldest_entries():
+    cache = ResultCache(max_entries=100, max_bytes=20)
+    cache.set("transcription", "a", "x" * 10)
+    cache.set("transcription", "b", "y" * 10)
+
+    assert cache.get("transcription", "a") == (False, None)
+    assert cache.get("transcription", "b") == (True, "y" * 10)
+    assert cache.stats()["bytes"] <= 20
+
+
+def test_values_larger_than_the_limit_are_not_kept():
+    cache = ResultCache(max_bytes=8)
+    cache.set("analysis", "a", "z" * 100)
+
+    assert cache.get("analysis", "a") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_counters_per_stage():
+    cache = ResultCache()
+    cache.set("emotion", "a", "sad")
+    cache.get("emotion", "a")
+    cache.get("emotion", "b")
+
+    assert cache.stats()["stages"]["emotion"] == {"hits": 1, "disk_hits": 0, "misses": 1}
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).set("analysis", "k" * 64, {"resume": "ok"})
+    cache = ResultCache(disk_dir=str(tmp_path))
+
+    assert cache.get("analysis", "k" * 64) == (True, {"resume": "ok"})
+    assert cache.stats()["stages"]["analysis"]["disk_hits"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(enabled=False)
+    cache.set("emotion", "a", "sad")
+
+    assert cache.get("emotion", "a") == (False, None)
+
+
+def test_audio_digest_ignores_the_encoding():
+    raw = b"RIFF audio"
+    assert audio_digest(raw) == audio_digest(base64.b64encode(raw).decode("ascii"))
+    assert cache_key(audio_digest(raw), "wav", "model") != cache_key(audio_digest(raw), "mp3", "model")
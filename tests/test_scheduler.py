@@ -0,0 +1,182 @@
+import email.utils
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+import main
+from agents import PipelineStageError
+from clients import LLMQueueTimeoutError, OutboundScheduler
+from clients.scheduler import is_retryable, retry_after_seconds
+
+REQUEST = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")
+
+
+def status_error(status_code, headers=None):
+    response = httpx.Response(status_code, headers=headers or {}, request=REQUEST)
+    error_class = openai.RateLimitError if status_code == 429 else openai.APIStatusError
+    return error_class("provider error", response=response, body=None)
+
+
+def failing(*errors, result="ok"):
+    """A request that raises `errors` in turn and then returns `result`; counts its calls."""
+    calls = []
+
+    def func():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return func, calls
+
+
+def fast_scheduler(**kwargs):
+    settings = {"max_retries": 3, "retry_base_seconds": 0.001, "retry_max_seconds": 1.0, "queue_timeout_seconds": 1.0}
+    return OutboundScheduler(**{**settings, **kwargs})
+
+
+def test_retry_after_ms_takes_precedence():
+    assert retry_after_seconds(status_error(429, {"retry-after-ms": "250", "retry-after": "9"})) == 0.25
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(status_error(429, {"retry-after": "2"})) == 2.0
+
+
+def test_retry_after_http_date():
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+
+    assert 25 < retry_after_seconds(status_error(503, {"retry-after": date})) <= 30
+
+
+def test_retry_after_missing_or_invalid():
+    assert retry_after_seconds(status_error(429)) is None
+    assert retry_after_seconds(status_error(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(ValueError("no response")) is None
+
+
+@pytest.mark.parametrize("status_code, retryable", [(429, True), (500, True), (503, True), (408, True), (400, False), (401, False)])
+def test_retryable_status_codes(status_code, retryable):
+    assert is_retryable(status_error(status_code)) is retryable
+
+
+def test_connection_errors_are_retryable():
+    assert is_retryable(openai.APIConnectionError(request=REQUEST))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_retries_then_succeeds():
+    scheduler = fast_scheduler()
+    func, calls = failing(status_error(500), status_error(429))
+
+    assert scheduler.call("model", func) == "ok"
+    assert len(calls) == 3
+    counters = scheduler.stats()["models"]["model"]
+    assert counters["retries"] == 2
+    assert counters["rate_limited"] == 1
+    assert counters["failures"] == 0
+
+
+def test_non_retryable_error_is_raised_at_once():
+    scheduler = fast_scheduler()
+    func, calls = failing(status_error(400))
+
+    with pytest.raises(openai.APIStatusError):
+        scheduler.call("model", func)
+    assert len(calls) == 1
+    assert scheduler.stats()["models"]["model"]["failures"] == 1
+
+
+def test_gives_up_after_max_retries():
+    scheduler = fast_scheduler(max_retries=2)
+    func, calls = failing(*[status_error(502)] * 5)
+
+    with pytest.raises(openai.APIStatusError):
+        scheduler.call("model", func)
+    assert len(calls) == 3
+
+
+def test_waits_for_retry_after():
+    scheduler = fast_scheduler()
+    func, calls = failing(status_error(429, {"retry-after-ms": "100"}))
+
+    assert scheduler.call("model", func) == "ok"
+    assert calls[1] - calls[0] >= 0.1
+
+
+def test_retry_after_longer_than_the_max_is_raised():
+    scheduler = fast_scheduler(retry_max_seconds=1.0)
+    func, calls = failing(status_error(429, {"retry-after": "120"}))
+
+    with pytest.raises(openai.RateLimitError):
+        scheduler.call("model", func)
+    assert len(calls) == 1
+
+
+def test_retry_after_holds_back_the_other_requests_of_the_model():
+    scheduler = fast_scheduler()
+    func, _ = failing(status_error(429, {"retry-after-ms": "200"}))
+    limited = threading.Thread(target=scheduler.call, args=("model", func))
+    limited.start()
+    while scheduler.limiter("model").stats()["blocked_seconds"] == 0:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    scheduler.call("other-model", lambda: "ok")
+    assert time.monotonic() - started < 0.1
+    scheduler.call("model", lambda: "ok")
+    assert time.monotonic() - started >= 0.1
+    limited.join()
+
+
+def test_queue_timeout_when_every_slot_is_busy():
+    scheduler = fast_scheduler(max_concurrency=1, queue_timeout_seconds=0.05)
+    release = threading.Event()
+    holder = threading.Thread(target=scheduler.call, args=("model", release.wait))
+    holder.start()
+    try:
+        while scheduler.limiter("model").stats()["in_flight"] != 1:
+            time.sleep(0.001)
+        with pytest.raises(LLMQueueTimeoutError):
+            scheduler.call("model", lambda: "ok")
+    finally:
+        release.set()
+        holder.join()
+    counters = scheduler.stats()["models"]["model"]
+    assert (counters["queue_timeouts"], counters["failures"], counters["retries"]) == (1, 0, 0)
+
+
+def test_hedged_request_answers_from_the_faster_attempt():
+    scheduler = fast_scheduler(max_concurrency=2, hedge_after_seconds=0.02)
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    try:
+        assert scheduler.call("model", func, hedge=True) == "fast"
+    finally:
+        release.set()
+    counters = scheduler.stats()["models"]["model"]
+    assert (counters["hedged"], counters["hedge_wins"]) == (1, 1)
+    # one hedge thread per slot of the model
+    assert scheduler.limiter("model").hedge_executor()._max_workers == 2
+
+
+def test_queue_timeout_is_503(client, monkeypatch, wav_base64):
+    def analyse(*args, **kwargs):
+        raise PipelineStageError("analysis", LLMQueueTimeoutError("Nenhuma vaga para chamar o LLM"))
+
+    monkeypatch.setattr(main, "analyse_patient_audio", analyse)
+    response = client.post("/analyse-patient-psychological-issue", json={"audio_data": wav_base64})
+
+    assert response.status_code == 503
+    assert response.get_json()["stage"] == "analysis"
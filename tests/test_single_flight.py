@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from helper import ResultCache, SingleFlight
+
+
+def run_concurrently(flight, callers, compute, key="key"):
+    """Start `callers` identical calls while `compute` is held; returns their futures and the gate to release it."""
+    started, gate = threading.Event(), threading.Event()
+
+    def held():
+        started.set()
+        gate.wait(5)
+        return compute()
+
+    executor = ThreadPoolExecutor(callers)
+    leader = executor.submit(flight.do, "stage", key, held)
+    started.wait(5)
+    followers = [executor.submit(flight.do, "stage", key, held) for _ in range(callers - 1)]
+    while flight.stats()["stages"]["stage"]["coalesced"] < callers - 1:
+        time.sleep(0.001)
+    gate.set()
+    executor.shutdown(wait=True)
+    return [leader, *followers]
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    futures = run_concurrently(flight, 4, lambda: calls.append(1) or "result")
+
+    assert [future.result() for future in futures] == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"enabled": True, "in_flight": 0, "stages": {"stage": {"leaders": 1, "coalesced": 3}}}
+
+
+def test_every_caller_gets_the_exception():
+    flight = SingleFlight()
+
+    def compute():
+        raise RuntimeError("provider down")
+
+    futures = run_concurrently(flight, 3, compute)
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="provider down"):
+            future.result()
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_a_finished_flight_is_not_reused():
+    flight = SingleFlight()
+    results = iter(["first", "second"])
+
+    assert flight.do("stage", "key", lambda: next(results)) == "first"
+    assert flight.do("stage", "key", lambda: next(results)) == "second"
+
+
+def test_disabled_computes_every_call():
+    flight = SingleFlight(enabled=False)
+    calls = []
+
+    for _ in range(3):
+        flight.do("stage", "key", lambda: calls.append(1))
+
+    assert len(calls) == 3
+    assert flight.stats()["stages"] == {}
+
+
+def test_leader_reads_the_cache_before_computing():
+    cache = ResultCache()
+    cache.set("stage", "key", "cached")
+    flight = SingleFlight()
+
+    assert flight.do("stage", "key", lambda: pytest.fail("computed despite the cached result"), cache=cache) == "cached"
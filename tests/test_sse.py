@@ -0,0 +1,31 @@
+import json
+
+import main
+from helper import format_sse
+
+
+def test_format_sse():
+    assert format_sse("emotion", {"emotion": "triste"}) == 'event: emotion\ndata: {"emotion": "triste"}\n\n'
+
+
+def test_stream_route_sends_each_event(client, monkeypatch, wav_base64):
+    def stream(audio_data, audio_format, *options):
+        yield "emotion", {"emotion": "sad"}
+        yield "result", {"emotion": "sad", "transcription": "olá"}
+
+    monkeypatch.setattr(main, "stream_patient_audio", stream)
+    response = client.post("/analyse-patient-psychological-issue/stream", json={"audio_data": wav_base64})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = [block.split("\n", 1) for block in response.get_data(as_text=True).strip().split("\n\n")]
+    assert [(event, json.loads(data[len("data: "):])) for event, data in events] == [
+        ("event: emotion", {"emotion": "sad"}),
+        ("event: result", {"emotion": "sad", "transcription": "olá"}),
+    ]
+
+
+def test_stream_route_without_audio_is_400(client):
+    response = client.post("/analyse-patient-psychological-issue/stream", json={})
+
+    assert response.status_code == 400
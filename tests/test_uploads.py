@@ -0,0 +1,60 @@
+import io
+
+from conftest import tone, wav_bytes
+
+
+def test_raw_upload(client, fake_emotion_model):
+    response = client.post("/predict-emotion/upload", data=wav_bytes(tone(1.0)), content_type="audio/wav")
+
+    assert response.status_code == 200
+    assert response.get_json()["emotion"] == "sad"
+
+
+def test_multipart_upload(client, fake_emotion_model):
+    response = client.post(
+        "/predict-emotion/upload",
+        data={"audio": (io.BytesIO(wav_bytes(tone(1.0))), "clip.wav")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["emotion"] == "sad"
+
+
+def test_body_that_is_not_audio_is_400(client):
+    response = client.post("/predict-emotion/upload", data="{}", content_type="application/json")
+
+    assert response.status_code == 400
+
+
+def test_multipart_without_a_file_is_400(client):
+    response = client.post("/predict-emotion/upload", data={"other": "x"}, content_type="multipart/form-data")
+
+    assert response.status_code == 400
+    assert "audio" in response.get_json()["error"]
+
+
+def test_upload_over_the_limit_is_413(client, monkeypatch):
+    monkeypatch.setenv("MAX_AUDIO_UPLOAD_MB", "0.1")
+    response = client.post("/predict-emotion/upload", data=b"\0" * 300_000, content_type="audio/wav")
+
+    assert response.status_code == 413
+
+
+def test_unsupported_extension_is_400(client, fake_emotion_model):
+    response = client.post(
+        "/predict-emotion/upload",
+        data={"audio": (io.BytesIO(wav_bytes(tone(1.0))), "clip.exe")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
+    assert "exe" in response.get_json()["error"]
+
+
+def test_requested_format_is_validated(client, fake_emotion_model):
+    response = client.post(
+        "/predict-emotion/upload?audio_format=../etc", data=wav_bytes(tone(1.0)), content_type="audio/wav"
+    )
+
+    assert response.status_code == 400
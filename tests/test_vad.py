@@ -0,0 +1,122 @@
+import base64
+import importlib
+import io
+
+import numpy as np
+import soundfile as sf
+
+from conftest import SAMPLING_RATE, tone, wav_bytes
+from helper import detect_speech, trim_audio_bytes, trim_silence
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLING_RATE), dtype=np.float32)
+
+
+def seconds(segments):
+    return [(round(start / SAMPLING_RATE, 2), round(end / SAMPLING_RATE, 2)) for start, end in segments]
+
+
+def test_speech_is_found_between_silences():
+    audio = np.concatenate([silence(1.0), tone(1.0), silence(1.0)])
+
+    segments = detect_speech(audio, SAMPLING_RATE, padding_ms=0)
+
+    assert seconds(segments) == [(0.99, 2.01)]
+
+
+def test_padding_widens_segments():
+    audio = np.concatenate([silence(1.0), tone(1.0), silence(1.0)])
+
+    (start, end), = detect_speech(audio, SAMPLING_RATE, padding_ms=150)
+
+    assert abs(start / SAMPLING_RATE - 0.84) < 0.02
+    assert abs(end / SAMPLING_RATE - 2.16) < 0.02
+
+
+def test_short_pauses_are_bridged_and_long_ones_split():
+    short_pause = np.concatenate([tone(1.0), silence(0.1), tone(1.0)])
+    long_pause = np.concatenate([tone(1.0), silence(1.0), tone(1.0)])
+
+    assert len(detect_speech(short_pause, SAMPLING_RATE, min_silence_ms=300, padding_ms=0)) == 1
+    assert len(detect_speech(long_pause, SAMPLING_RATE, min_silence_ms=300, padding_ms=0)) == 2
+
+
+def test_short_bursts_are_dropped():
+    audio = np.concatenate([silence(1.0), tone(0.1), silence(1.0), tone(1.0)])
+
+    segments = detect_speech(audio, SAMPLING_RATE, min_speech_ms=250, padding_ms=0)
+
+    assert seconds(segments) == [(2.1, 3.09)]
+
+
+def test_silence_has_no_speech():
+    assert detect_speech(silence(2.0), SAMPLING_RATE) == []
+    assert detect_speech(np.zeros(10, dtype=np.float32), SAMPLING_RATE) == []
+
+
+def test_trim_silence_keeps_only_speech():
+    audio = np.concatenate([silence(2.0), tone(1.0), silence(2.0)])
+
+    trimmed, report = trim_silence(audio, SAMPLING_RATE, padding_ms=0)
+
+    assert report["speech_detected"]
+    assert abs(len(trimmed) / SAMPLING_RATE - 1.0) < 0.05
+    assert report["input_seconds"] == 5.0
+    assert abs(report["removed_fraction"] - 0.8) < 0.01
+
+
+def test_trim_silence_keeps_a_silent_recording_unchanged():
+    audio = silence(1.0)
+
+    trimmed, report = trim_silence(audio, SAMPLING_RATE)
+
+    assert trimmed is audio
+    assert not report["speech_detected"]
+    assert report["removed_fraction"] == 0.0
+
+
+def test_trim_audio_bytes_returns_wav():
+    raw = wav_bytes(np.concatenate([silence(1.0), tone(1.0), silence(1.0)]))
+
+    trimmed, report = trim_audio_bytes(raw, "wav")
+
+    audio, sampling_rate = sf.read(io.BytesIO(trimmed))
+    assert sampling_rate == SAMPLING_RATE
+    assert len(audio) / SAMPLING_RATE < 2.0
+    assert report["speech_detected"]
+
+
+def test_predict_emotion_reports_the_trimmed_audio(client, fake_emotion_model):
+    audio = base64.b64encode(wav_bytes(np.concatenate([silence(2.0), tone(1.0)]))).decode("ascii")
+    response = client.post("/predict-emotion", json={"audio_data": audio, "audio_format": "wav", "vad": True})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["emotion"] == "sad"
+    assert body["vad"]["speech_detected"]
+    assert body["vad"]["removed_fraction"] > 0.5
+
+
+def test_trimming_without_compaction_never_grows_the_upload():
+    audio_core = importlib.import_module("agents.audio-analyser.core")
+    buffer = io.BytesIO()
+    sf.write(buffer, np.concatenate([silence(0.5), tone(3.0), silence(0.5)]), SAMPLING_RATE, format="MP3")
+    mp3 = buffer.getvalue()
+    report = {}
+
+    payload, payload_format = audio_core._upload_payload(mp3, "mp3", compact=False, vad=True, vad_report=report)
+
+    assert len(base64.b64decode(payload)) <= len(mp3)
+    assert (payload_format, report["trimmed_upload"]) == ("mp3", False)
+    assert report["speech_detected"]
+
+
+def test_trimming_without_compaction_uploads_the_smaller_wav():
+    audio_core = importlib.import_module("agents.audio-analyser.core")
+    raw = wav_bytes(np.concatenate([silence(2.0), tone(1.0), silence(2.0)]))
+
+    payload, payload_format = audio_core._upload_payload(raw, "wav", compact=False, vad=True)
+
+    assert payload_format == "wav"
+    assert len(base64.b64decode(payload)) < len(raw) / 2
@@ -0,0 +1,26 @@
+"""
+Entry point WSGI para produção com um servidor pre-fork:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Com preload_app (ver gunicorn.conf.py) este módulo é importado uma única vez, no processo pai. Os pesos
+do modelo de emoção são carregados aqui e os workers os compartilham por copy-on-write após o fork,
+em vez de cada um manter a própria cópia em memória.
+"""
+from main import create_app, emotion_analyser, emotion_model_holder
+from helper import env_flag
+
+def _model_loading():
+    if not env_flag('EMOTION_MODEL_PRELOAD', 'true'):
+        return 'lazy'
+    # a sessão do ONNX Runtime não sobrevive ao fork: com esse backend cada worker carrega o modelo (init_worker)
+    return 'now' if emotion_model_holder.backend_name == 'torch' else 'lazy'
+
+app = create_app(model_loading=_model_loading())
+
+def init_worker():
+    """Executado em cada worker logo após o fork (hook post_fork do gunicorn.conf.py)"""
+    emotion_model_holder.apply_thread_limits()
+    if env_flag('EMOTION_MODEL_PRELOAD', 'true'):
+        # com torch o modelo já veio do processo pai e só é aquecido; com ONNX é carregado aqui
+        emotion_analyser.preload_model(background=True, warmup=env_flag('EMOTION_MODEL_WARMUP', 'true'))